@@ -1,17 +1,35 @@
 from flask import Flask
+from core import metrics
 from core.config   import SECRET_KEY
-from core.database import init_db
+from core.database import init_db, release_db
 from core.problems import load_problems
 from routes.participant import participant_bp
 from routes.admin       import admin_bp
 
-app = Flask(__name__)
-app.secret_key = SECRET_KEY
 
-app.register_blueprint(participant_bp)
-app.register_blueprint(admin_bp)
+def create_app():
+    """
+    Build the Flask app, migrating the database and loading the problems first.
 
-if __name__ == "__main__":
+    Under gunicorn with preload_app (see gunicorn.conf.py) this runs once in
+    the master, and the forked workers share the loaded problems copy-on-write.
+    Without preloading every worker runs it; migrations serialize on SQLite's
+    write lock, so only the first one changes anything.
+    """
     init_db()
     load_problems()
-    app.run(host="0.0.0.0", port=5000, debug=True)
\ No newline at end of file
+
+    app = Flask(__name__)
+    app.secret_key = SECRET_KEY
+    app.teardown_appcontext(release_db)
+    metrics.instrument(app)
+
+    app.register_blueprint(participant_bp)
+    app.register_blueprint(admin_bp)
+    return app
+
+
+app = create_app()
+
+if __name__ == "__main__":
+    app.run(host="0.0.0.0", port=5000, debug=True)
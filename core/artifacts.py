@@ -0,0 +1,111 @@
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+from core.config import ARTIFACT_CACHE_DIR, ARTIFACT_CACHE_MAX_MB
+
+
+def artifact_key(language, full_code):
+    return hashlib.sha256(f"{language}\0{full_code}".encode("utf-8")).hexdigest()
+
+
+class ArtifactCache:
+    """
+    Size-bounded LRU store of build outputs on disk, one directory per key.
+
+    Entries are built in a private temp directory and renamed into place, so a
+    reader never sees a half-written entry and two processes racing on the same
+    key simply keep whichever rename lands first. Recency is the entry
+    directory's mtime, refreshed on every hit.
+    """
+
+    def __init__(self, root, max_bytes):
+        self.root      = root
+        self.max_bytes = max_bytes
+        self.hits      = 0
+        self.misses    = 0
+        self.evictions = 0
+        self._lock     = threading.Lock()
+        self._building = {}
+
+    def get_or_build(self, key, build):
+        """Return the entry directory for ``key``, calling ``build(dir)`` on a miss."""
+        path = os.path.join(self.root, key)
+        if self._touch(path):
+            with self._lock:
+                self.hits += 1
+            return path
+
+        with self._lock:
+            key_lock = self._building.setdefault(key, threading.Lock())
+        with key_lock:
+            if self._touch(path):
+                with self._lock:
+                    self.hits += 1
+                return path
+            with self._lock:
+                self.misses += 1
+            os.makedirs(self.root, exist_ok=True)
+            tmp = tempfile.mkdtemp(prefix=".build-", dir=self.root)
+            try:
+                build(tmp)
+                try:
+                    os.rename(tmp, path)
+                except OSError:
+                    pass    # another process published the same key first
+            finally:
+                shutil.rmtree(tmp, ignore_errors=True)
+        with self._lock:
+            self._building.pop(key, None)
+        self._evict()
+        return path
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits":      self.hits,
+                "misses":    self.misses,
+                "evictions": self.evictions,
+                "bytes":     sum(size for _, size, _ in self._entries()),
+                "max_bytes": self.max_bytes,
+            }
+
+    def _touch(self, path):
+        try:
+            os.utime(path)
+            return True
+        except OSError:
+            return False
+
+    def _entries(self):
+        try:
+            names = os.listdir(self.root)
+        except OSError:
+            return []
+        entries = []
+        for name in names:
+            if name.startswith("."):
+                continue
+            path = os.path.join(self.root, name)
+            try:
+                size  = sum(e.stat().st_size for e in os.scandir(path) if e.is_file())
+                mtime = os.stat(path).st_mtime
+            except OSError:
+                continue
+            entries.append((mtime, size, path))
+        return entries
+
+    def _evict(self):
+        entries = sorted(self._entries())
+        total   = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+            with self._lock:
+                self.evictions += 1
+
+
+artifact_cache = ArtifactCache(ARTIFACT_CACHE_DIR, ARTIFACT_CACHE_MAX_MB * 1024 * 1024)
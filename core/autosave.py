@@ -0,0 +1,122 @@
+import atexit
+import hashlib
+import threading
+import time
+from core.config import AUTOSAVE_FLUSH_INTERVAL, AUTOSAVE_MAX_PENDING
+from core.database import get_db
+
+# Upsert one draft. Rows are only touched when the draft is newer than what is
+# stored (a late flush never overwrites a later submit or a newer draft from
+# another worker) and its content hash differs.
+UPSERT = (
+    "INSERT INTO submissions (participant_id, problem_id, language, code, code_hash, passed_all, wrong_attempts, first_opened_at, last_updated) "
+    "VALUES (?,?,?,?,?,0,0,?,?) "
+    "ON CONFLICT(participant_id, problem_id) DO UPDATE SET "
+    "language=excluded.language, code=excluded.code, code_hash=excluded.code_hash, last_updated=excluded.last_updated "
+    "WHERE excluded.last_updated > COALESCE(submissions.last_updated, '') "
+    "AND submissions.code_hash IS NOT excluded.code_hash"
+)
+
+
+def code_hash(language, code):
+    return hashlib.sha256(f"{language}\0{code}".encode("utf-8")).hexdigest()
+
+
+class AutosaveBuffer:
+    """
+    Write-behind buffer for /api/save_code.
+
+    Keeps only the latest draft per (participant, problem) and writes all
+    pending drafts in one transaction every ``flush_interval`` seconds, so
+    autosave traffic costs one commit per interval instead of one per call.
+    Memory is bounded by ``max_pending`` drafts (at most one per problem per
+    participant, each capped by the caller); a save beyond that flushes
+    inline. A crash loses at most the drafts of the last interval.
+    ``flush_interval`` 0 writes every save through.
+    """
+
+    def __init__(self, flush_interval, max_pending):
+        self.flush_interval = flush_interval
+        self.max_pending    = max_pending
+        self._lock          = threading.Lock()
+        self._flush_lock    = threading.Lock()
+        self._pending       = {}        # (participant_id, problem_id) -> row tuple for UPSERT
+        self._thread        = None
+        self.saves          = 0
+        self.flushed_rows   = 0
+        self.flushes        = 0
+
+    def save(self, participant_id, problem_id, language, code, now):
+        row = (participant_id, problem_id, language, code, code_hash(language, code), now, now)
+        with self._lock:
+            self.saves += 1
+        if self.flush_interval <= 0:
+            self._write([row])
+            return
+        self._start()
+        with self._lock:
+            self._pending[(participant_id, problem_id)] = row
+            full = len(self._pending) >= self.max_pending
+        if full:
+            self.flush()
+
+    def discard(self, participant_id, problem_id, before):
+        """Drop a pending draft saved at or before ``before``, e.g. one a stored submission superseded."""
+        with self._lock:
+            row = self._pending.get((participant_id, problem_id))
+            if row is not None and row[5] <= before:
+                del self._pending[(participant_id, problem_id)]
+
+    def flush(self, participant_id=None):
+        """Write pending drafts (only ``participant_id``'s if given) now."""
+        with self._lock:
+            if participant_id is None:
+                rows, self._pending = list(self._pending.values()), {}
+            else:
+                keys = [k for k in self._pending if k[0] == participant_id]
+                rows = [self._pending.pop(k) for k in keys]
+        if rows:
+            try:
+                self._write(rows)
+            except Exception:
+                with self._lock:
+                    for row in rows:            # retry later unless superseded
+                        self._pending.setdefault((row[0], row[1]), row)
+                raise
+
+    def pending(self):
+        return len(self._pending)
+
+    def _write(self, rows):
+        # One writer at a time keeps batches from interleaving out of order.
+        with self._flush_lock:
+            conn = get_db()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.executemany(UPSERT, rows)
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            self.flushed_rows += len(rows)
+            self.flushes      += 1
+
+    def _start(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="autosave-flush", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except Exception:
+                pass        # the batch was re-queued; retry on the next tick
+
+
+autosave_buffer = AutosaveBuffer(AUTOSAVE_FLUSH_INTERVAL, AUTOSAVE_MAX_PENDING)
+atexit.register(autosave_buffer.flush)
@@ -7,8 +7,127 @@ JUDGE0_URL               = os.getenv("JUDGE0_URL", "http://localhost:2358")
 ADMIN_PASSWORD           = os.getenv("ADMIN_PASSWORD", "changeme")
 CONTEST_DURATION_SECONDS = int(os.getenv("CONTEST_DURATION_SECONDS", 3600))
 DB_PATH                  = os.getenv("DB_PATH", "contest.db")
+DB_POOL_SIZE             = int(os.getenv("DB_POOL_SIZE", 16))
+DB_BUSY_TIMEOUT_MS       = int(os.getenv("DB_BUSY_TIMEOUT_MS", 5000))
 SECRET_KEY               = os.getenv("SECRET_KEY", "dev-only-secret")
 
+# /api/save_code drafts are buffered in memory and written in one transaction
+# every AUTOSAVE_FLUSH_INTERVAL seconds (0 writes each save through).
+AUTOSAVE_FLUSH_INTERVAL  = float(os.getenv("AUTOSAVE_FLUSH_INTERVAL", 5))
+AUTOSAVE_MAX_PENDING     = int(os.getenv("AUTOSAVE_MAX_PENDING", 5000))
+AUTOSAVE_MAX_CODE_KB     = int(os.getenv("AUTOSAVE_MAX_CODE_KB", 64))
+
+# Problem definitions. The file is re-read when it changes on disk, checked at
+# most every PROBLEMS_RELOAD_INTERVAL seconds.
+PROBLEMS_FILE            = os.getenv("PROBLEMS_FILE", os.path.join("data", "problems_fake.json"))
+PROBLEMS_RELOAD_INTERVAL = float(os.getenv("PROBLEMS_RELOAD_INTERVAL", 1))
+
+# Contest config and ended participants are cached per process; a write
+# replaces this file so other worker processes notice with a stat().
+CONTEST_STATE_VERSION_FILE = os.getenv("CONTEST_STATE_VERSION_FILE", DB_PATH + "-state")
+CONTEST_STATE_MAX_AGE    = float(os.getenv("CONTEST_STATE_MAX_AGE", 5))
+
+# "judge0" sends programs to JUDGE0_URL; "local" runs them in this machine's
+# sandboxed worker pool (see routes/local_judge.py).
+JUDGE_BACKEND            = os.getenv("JUDGE_BACKEND", "judge0")
+
+JUDGE0_BATCH_SIZE        = int(os.getenv("JUDGE0_BATCH_SIZE", 20))
+JUDGE0_POLL_INTERVAL     = float(os.getenv("JUDGE0_POLL_INTERVAL", 0.25))
+JUDGE0_TIMEOUT_SECONDS   = float(os.getenv("JUDGE0_TIMEOUT_SECONDS", 60))
+
+# Calls to Judge0 share one keep-alive session with at most
+# JUDGE0_MAX_CONCURRENCY requests in flight per process. Connection errors and
+# 429/502/503/504 are retried JUDGE0_RETRIES times with jittered exponential
+# backoff; after JUDGE0_BREAKER_FAILURES exhausted calls in a row the breaker
+# fails calls fast for JUDGE0_BREAKER_RESET_SECONDS.
+JUDGE0_CONNECT_TIMEOUT   = float(os.getenv("JUDGE0_CONNECT_TIMEOUT", 3))
+JUDGE0_MAX_CONCURRENCY   = int(os.getenv("JUDGE0_MAX_CONCURRENCY", 8))
+JUDGE0_RETRIES           = int(os.getenv("JUDGE0_RETRIES", 3))
+JUDGE0_RETRY_BASE_SECONDS = float(os.getenv("JUDGE0_RETRY_BASE_SECONDS", 0.25))
+JUDGE0_RETRY_MAX_SECONDS = float(os.getenv("JUDGE0_RETRY_MAX_SECONDS", 4))
+JUDGE0_BREAKER_FAILURES  = int(os.getenv("JUDGE0_BREAKER_FAILURES", 5))
+JUDGE0_BREAKER_RESET_SECONDS = float(os.getenv("JUDGE0_BREAKER_RESET_SECONDS", 15))
+
+JUDGE_WORKERS            = int(os.getenv("JUDGE_WORKERS", 4))
+JUDGE_QUEUE_CAPACITY     = int(os.getenv("JUDGE_QUEUE_CAPACITY", 64))
+JUDGE_JOB_TTL_SECONDS    = int(os.getenv("JUDGE_JOB_TTL_SECONDS", 300))
+# Each process refreshes the rows of its unfinished jobs every
+# JUDGE_JOB_HEARTBEAT_SECONDS; a job silent for JUDGE_JOB_STALE_SECONDS was
+# lost with its worker process and is failed, freeing the participant's slot.
+JUDGE_JOB_HEARTBEAT_SECONDS = float(os.getenv("JUDGE_JOB_HEARTBEAT_SECONDS", 5))
+JUDGE_JOB_STALE_SECONDS  = float(os.getenv("JUDGE_JOB_STALE_SECONDS", 30))
+
+# Judge admission (core/jobs.py). Per participant and kind: jobs queued or
+# running at once, and a token bucket of jobs per minute with bursts.
+JUDGE_JOBS_PER_PARTICIPANT = int(os.getenv("JUDGE_JOBS_PER_PARTICIPANT", 1))
+JUDGE_SUBMIT_RATE_PER_MINUTE = float(os.getenv("JUDGE_SUBMIT_RATE_PER_MINUTE", 6))
+JUDGE_SUBMIT_BURST       = int(os.getenv("JUDGE_SUBMIT_BURST", 3))
+JUDGE_RUNS_PER_PARTICIPANT = int(os.getenv("JUDGE_RUNS_PER_PARTICIPANT", 1))
+JUDGE_RUN_RATE_PER_MINUTE = float(os.getenv("JUDGE_RUN_RATE_PER_MINUTE", 12))
+JUDGE_RUN_BURST          = int(os.getenv("JUDGE_RUN_BURST", 4))
+
+# Compiled languages can be built locally once per distinct program and shipped
+# to Judge0 as a prebuilt "Multi-file program" instead of being recompiled per
+# test. Off by default: the compiler then runs on this host, outside Judge0's
+# sandbox, and can read whatever files the server's user can.
+JUDGE_PRECOMPILE_LANGUAGES = [l for l in os.getenv("JUDGE_PRECOMPILE_LANGUAGES", "").split(",") if l]
+JUDGE_COMPILE_TIMEOUT    = float(os.getenv("JUDGE_COMPILE_TIMEOUT", 30))
+JUDGE_COMPILE_MEMORY_MB  = int(os.getenv("JUDGE_COMPILE_MEMORY_MB", 1024))
+JUDGE_COMPILE_FILE_MB    = int(os.getenv("JUDGE_COMPILE_FILE_MB", 64))
+# Processes (threads included) the server's user may have while a compiler or
+# local-judge program runs; RLIMIT_NPROC counts every process of that user.
+JUDGE_MAX_PROCESSES      = int(os.getenv("JUDGE_MAX_PROCESSES", 256))
+JUDGE0_JAVA_PATH         = os.getenv("JUDGE0_JAVA_PATH", "/usr/local/openjdk13/bin/java")
+JUDGE_JAVA_RELEASE       = os.getenv("JUDGE_JAVA_RELEASE", "13")
+ARTIFACT_CACHE_DIR       = os.getenv("ARTIFACT_CACHE_DIR", os.path.join(".judge_cache", "artifacts"))
+ARTIFACT_CACHE_MAX_MB    = int(os.getenv("ARTIFACT_CACHE_MAX_MB", 256))
+
+LOCAL_JUDGE_WORKERS      = int(os.getenv("LOCAL_JUDGE_WORKERS", os.cpu_count() or 2))
+LOCAL_CPU_SECONDS        = int(os.getenv("LOCAL_CPU_SECONDS", 2))
+LOCAL_WALL_SECONDS       = float(os.getenv("LOCAL_WALL_SECONDS", 5))
+LOCAL_MEMORY_MB          = int(os.getenv("LOCAL_MEMORY_MB", 256))
+LOCAL_OUTPUT_KB          = int(os.getenv("LOCAL_OUTPUT_KB", 1024))
+
+RESULT_CACHE_TTL_SECONDS = int(os.getenv("RESULT_CACHE_TTL_SECONDS", 600))
+RESULT_CACHE_MAX_MB      = int(os.getenv("RESULT_CACHE_MAX_MB", 64))
+
+# Bulk rejudge (routes/rejudge.py). Stored attempts are graded again by
+# REJUDGE_WORKERS threads of their own, so live judging keeps its workers.
+# Verdicts are applied in transactions of up to REJUDGE_BATCH_SIZE programs,
+# at least every REJUDGE_CHECKPOINT_SECONDS. A run that has not checkpointed
+# for REJUDGE_STALE_SECONDS was interrupted and can be resumed.
+REJUDGE_WORKERS          = int(os.getenv("REJUDGE_WORKERS", 2))
+REJUDGE_BATCH_SIZE       = int(os.getenv("REJUDGE_BATCH_SIZE", 50))
+REJUDGE_CHECKPOINT_SECONDS = float(os.getenv("REJUDGE_CHECKPOINT_SECONDS", 2))
+REJUDGE_STALE_SECONDS    = float(os.getenv("REJUDGE_STALE_SECONDS", 30))
+
+# /api/events (server-sent events). Each worker process has one dispatcher
+# thread that polls the events table; streams end after EVENTS_STREAM_SECONDS
+# so clients reconnect and resync. EVENTS_MAX_STREAMS caps open streams per
+# process (beyond it clients fall back to polling /api/contest_status).
+EVENTS_POLL_INTERVAL     = float(os.getenv("EVENTS_POLL_INTERVAL", 0.5))
+EVENTS_HEARTBEAT_SECONDS = float(os.getenv("EVENTS_HEARTBEAT_SECONDS", 15))
+EVENTS_STREAM_SECONDS    = float(os.getenv("EVENTS_STREAM_SECONDS", 300))
+EVENTS_MAX_STREAMS       = int(os.getenv("EVENTS_MAX_STREAMS", 1000))
+
+# Admin gateway to the Java backend (routes/admin_gateway.py). Responses are
+# cached for GATEWAY_CACHE_TTL seconds; while the backend is down the last good
+# response is served for up to GATEWAY_STALE_SECONDS.
+JAVA_BACKEND_URL         = os.getenv("JAVA_BACKEND_URL", "http://localhost:8080")
+GATEWAY_CONNECT_TIMEOUT  = float(os.getenv("GATEWAY_CONNECT_TIMEOUT", 1))
+GATEWAY_READ_TIMEOUT     = float(os.getenv("GATEWAY_READ_TIMEOUT", 3))
+GATEWAY_POOL_SIZE        = int(os.getenv("GATEWAY_POOL_SIZE", 8))
+GATEWAY_CACHE_TTL        = float(os.getenv("GATEWAY_CACHE_TTL", 2))
+GATEWAY_STALE_SECONDS    = float(os.getenv("GATEWAY_STALE_SECONDS", 300))
+GATEWAY_BREAKER_FAILURES = int(os.getenv("GATEWAY_BREAKER_FAILURES", 3))
+GATEWAY_BREAKER_RESET_SECONDS = float(os.getenv("GATEWAY_BREAKER_RESET_SECONDS", 10))
+
+# Request, SQLite and judge timers exported at /metrics (Prometheus text
+# format) for an admin session, or for a scraper sending
+# "Authorization: Bearer <METRICS_TOKEN>" when a token is set.
+METRICS_ENABLED          = os.getenv("METRICS_ENABLED", "1") == "1"
+METRICS_TOKEN            = os.getenv("METRICS_TOKEN", "")
+
 LANGUAGE_IDS = {
     "python": 71,
     "cpp":    54,
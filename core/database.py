@@ -1,63 +1,624 @@
+import hashlib
+import os
+import queue
 import sqlite3
-from core.config import DB_PATH
+import threading
+import time
+from collections import namedtuple
+from functools import lru_cache
+from flask import g, has_app_context
+from core import metrics
+from core.config import (DB_PATH, DB_POOL_SIZE, DB_BUSY_TIMEOUT_MS,
+                         CONTEST_STATE_VERSION_FILE, CONTEST_STATE_MAX_AGE, METRICS_ENABLED)
+
+
+class TimedConnection(sqlite3.Connection):
+    """
+    A connection that times execute(), executemany() and commit() into
+    contest_db_statement_seconds, labelled by the statement's first keyword.
+    Time spent in SQLite's busy handler waiting for the write lock lands on
+    the BEGIN or write statement that waited.
+    """
+
+    def execute(self, sql, parameters=()):
+        t0 = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            metrics.db_statement.observe(time.perf_counter() - t0, _keyword(sql))
+
+    def executemany(self, sql, seq_of_parameters):
+        t0 = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            metrics.db_statement.observe(time.perf_counter() - t0, _keyword(sql))
+
+    def commit(self):
+        t0 = time.perf_counter()
+        try:
+            return super().commit()
+        finally:
+            metrics.db_statement.observe(time.perf_counter() - t0, "COMMIT")
+
+
+@lru_cache(maxsize=1024)
+def _keyword(sql):
+    return sql.lstrip().split(None, 1)[0].upper()
+
+
+class ConnectionPool:
+    """
+    Reusable SQLite connections, so a request does not pay for connect() and
+    pragma setup on every query.
+
+    Every connection runs in WAL mode (readers never block on the autosave and
+    submit writers) with synchronous=NORMAL and a busy timeout. Connections
+    are handed to one thread at a time, hence check_same_thread=False.
+    """
+
+    def __init__(self, path, size):
+        self.path  = path
+        self._idle = queue.LifoQueue(maxsize=size)
+
+    def acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            return self._connect()
+
+    def release(self, conn):
+        if conn.in_transaction:
+            conn.rollback()
+        try:
+            self._idle.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=DB_BUSY_TIMEOUT_MS / 1000, check_same_thread=False,
+                               factory=TimedConnection if METRICS_ENABLED else sqlite3.Connection)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA busy_timeout={int(DB_BUSY_TIMEOUT_MS)}")
+        return conn
+
+
+_pool  = ConnectionPool(DB_PATH, DB_POOL_SIZE)
+_local = threading.local()
 
 
 def get_db():
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
+    """
+    Return the connection for the current request, or for the current thread
+    outside a request (judge workers). Inside a request every call shares one
+    pooled connection, which goes back to the pool at teardown.
+    """
+    if has_app_context():
+        if "db" not in g:
+            with metrics.db_acquire.time():
+                g.db = _pool.acquire()
+        return g.db
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        with metrics.db_acquire.time():
+            conn = _local.conn = _pool.acquire()
     return conn
 
 
+def release_db(exc=None):
+    """Flask teardown hook: return the request's connection to the pool."""
+    conn = g.pop("db", None)
+    if conn is not None:
+        _pool.release(conn)
+
+
 def init_db():
-    with get_db() as conn:
-        conn.executescript("""
-            CREATE TABLE IF NOT EXISTS contest_config (
-                key   TEXT PRIMARY KEY,
-                value TEXT
-            );
-            CREATE TABLE IF NOT EXISTS participants (
-                id            INTEGER PRIMARY KEY AUTOINCREMENT,
-                name          TEXT    NOT NULL,
-                college       TEXT    NOT NULL,
-                system_number TEXT    NOT NULL,
-                phone         TEXT    NOT NULL,
-                login_time    TEXT,
-                submitted     INTEGER DEFAULT 0,
-                submit_time   TEXT,
-                UNIQUE(phone)
-            );
-            CREATE TABLE IF NOT EXISTS submissions (
-                id                 INTEGER PRIMARY KEY AUTOINCREMENT,
-                participant_id     INTEGER,
-                problem_id         INTEGER,
-                language           TEXT,
-                code               TEXT,
-                passed_all         INTEGER DEFAULT 0,
-                wrong_attempts     INTEGER DEFAULT 0,
-                first_opened_at    TEXT,
-                solved_at          TEXT,
-                time_taken_seconds REAL,
-                last_updated       TEXT,
-                FOREIGN KEY(participant_id) REFERENCES participants(id)
-            );
-            CREATE TABLE IF NOT EXISTS solved (
-                participant_id INTEGER,
-                problem_id     INTEGER,
-                PRIMARY KEY(participant_id, problem_id)
-            );
-        """)
-        conn.execute("INSERT OR IGNORE INTO contest_config VALUES ('start_time', '')")
-        conn.execute("INSERT OR IGNORE INTO contest_config VALUES ('contest_active', '0')")
-        conn.commit()
+    """
+    Bring the schema up to date. Uses a private connection that is closed
+    afterwards, so calling this in a preloading server master leaves no open
+    SQLite handle to be inherited by forked workers.
+    """
+    conn = _pool._connect()
+    try:
+        migrate(conn)
+    finally:
+        conn.close()
+
+
+def open_snapshot():
+    """
+    A private, read-only connection already inside a read transaction, for
+    reads that outlive a request (streamed exports). Every query on it sees
+    the database as it was when this returned, while writers carry on; the
+    caller closes it. WAL cannot be checkpointed past the snapshot until then.
+    """
+    conn = _pool._connect()
+    try:
+        conn.execute("PRAGMA query_only=1")
+        conn.execute("BEGIN")
+        conn.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()   # the first read fixes the snapshot
+    except BaseException:
+        conn.close()
+        raise
+    return conn
+
+
+# ── SCHEMA MIGRATIONS ─────────────────────────────────────────────────────────
+# The schema version lives in PRAGMA user_version. Each migration runs once,
+# in its own write transaction, and bumps the version when it commits. Append
+# new steps to MIGRATIONS; never edit one that has shipped.
+
+def _migration_1(conn):
+    """Base schema."""
+    _execute_script(conn, """
+        CREATE TABLE IF NOT EXISTS contest_config (
+            key   TEXT PRIMARY KEY,
+            value TEXT
+        );
+        CREATE TABLE IF NOT EXISTS participants (
+            id            INTEGER PRIMARY KEY AUTOINCREMENT,
+            name          TEXT    NOT NULL,
+            college       TEXT    NOT NULL,
+            system_number TEXT    NOT NULL,
+            phone         TEXT    NOT NULL,
+            login_time    TEXT,
+            submitted     INTEGER DEFAULT 0,
+            submit_time   TEXT,
+            UNIQUE(phone)
+        );
+        CREATE TABLE IF NOT EXISTS submissions (
+            id                 INTEGER PRIMARY KEY AUTOINCREMENT,
+            participant_id     INTEGER,
+            problem_id         INTEGER,
+            language           TEXT,
+            code               TEXT,
+            passed_all         INTEGER DEFAULT 0,
+            wrong_attempts     INTEGER DEFAULT 0,
+            first_opened_at    TEXT,
+            solved_at          TEXT,
+            time_taken_seconds REAL,
+            last_updated       TEXT,
+            FOREIGN KEY(participant_id) REFERENCES participants(id)
+        );
+        CREATE TABLE IF NOT EXISTS solved (
+            participant_id INTEGER,
+            problem_id     INTEGER,
+            PRIMARY KEY(participant_id, problem_id)
+        );
+        INSERT OR IGNORE INTO contest_config VALUES ('start_time', '');
+        INSERT OR IGNORE INTO contest_config VALUES ('contest_active', '0');
+    """)
+
+
+def _migration_2(conn):
+    """One submissions row per (participant, problem), enforced by a unique index."""
+    # Concurrent open_problem/save_code calls could insert duplicates. Keep the
+    # most advanced row of each pair and fold the others' wrong attempts into it.
+    _execute_script(conn, """
+        CREATE TEMP TABLE keep AS
+            SELECT id, participant_id, problem_id FROM (
+                SELECT id, participant_id, problem_id,
+                       ROW_NUMBER() OVER (
+                           PARTITION BY participant_id, problem_id
+                           ORDER BY passed_all DESC, last_updated DESC, id DESC
+                       ) AS rn
+                FROM submissions
+            ) WHERE rn = 1;
+        UPDATE submissions SET
+            wrong_attempts  = (SELECT SUM(COALESCE(d.wrong_attempts, 0)) FROM submissions d
+                                WHERE d.participant_id = submissions.participant_id
+                                  AND d.problem_id     = submissions.problem_id),
+            first_opened_at = (SELECT MIN(d.first_opened_at) FROM submissions d
+                                WHERE d.participant_id = submissions.participant_id
+                                  AND d.problem_id     = submissions.problem_id)
+        WHERE id IN (SELECT id FROM keep);
+        DELETE FROM submissions WHERE id NOT IN (SELECT id FROM keep);
+        DROP TABLE keep;
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_submissions_participant_problem
+            ON submissions(participant_id, problem_id);
+    """)
+
+
+def _migration_3(conn):
+    """Materialized scoreboard, kept current by triggers."""
+    # Totals are recomputed from the participant's own rows (an index range
+    # of at most one row per problem) rather than adjusted by deltas, so the
+    # floating-point sums are bit-identical to a from-scratch aggregate. Every
+    # change bumps counters.scoreboard, which the leaderboard serves as ETag.
+    _execute_script(conn, """
+        CREATE TABLE IF NOT EXISTS counters (
+            name  TEXT PRIMARY KEY,
+            value INTEGER NOT NULL
+        );
+        INSERT OR IGNORE INTO counters VALUES ('scoreboard', 0);
+
+        CREATE TABLE IF NOT EXISTS scoreboard (
+            participant_id INTEGER PRIMARY KEY REFERENCES participants(id),
+            solved_count   INTEGER NOT NULL DEFAULT 0,
+            total_time     REAL    NOT NULL DEFAULT 0,
+            total_wrong    INTEGER NOT NULL DEFAULT 0
+        );
+        CREATE INDEX IF NOT EXISTS idx_scoreboard_rank
+            ON scoreboard(solved_count DESC, total_time ASC, participant_id ASC);
+
+        INSERT OR REPLACE INTO scoreboard (participant_id, solved_count, total_time, total_wrong)
+            SELECT p.id,
+                   (SELECT COUNT(*) FROM solved s WHERE s.participant_id = p.id),
+                   (SELECT COALESCE(SUM(sub.time_taken_seconds), 0) FROM submissions sub WHERE sub.participant_id = p.id),
+                   (SELECT COALESCE(SUM(sub.wrong_attempts), 0) FROM submissions sub WHERE sub.participant_id = p.id)
+            FROM participants p;
+
+        CREATE TRIGGER IF NOT EXISTS scoreboard_participant_insert
+        AFTER INSERT ON participants
+        BEGIN
+            INSERT OR IGNORE INTO scoreboard (participant_id) VALUES (NEW.id);
+            UPDATE counters SET value = value + 1 WHERE name = 'scoreboard';
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS scoreboard_solved_insert
+        AFTER INSERT ON solved
+        BEGIN
+            UPDATE scoreboard
+               SET solved_count = (SELECT COUNT(*) FROM solved WHERE participant_id = NEW.participant_id)
+             WHERE participant_id = NEW.participant_id;
+            UPDATE counters SET value = value + 1 WHERE name = 'scoreboard';
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS scoreboard_solved_delete
+        AFTER DELETE ON solved
+        BEGIN
+            UPDATE scoreboard
+               SET solved_count = (SELECT COUNT(*) FROM solved WHERE participant_id = OLD.participant_id)
+             WHERE participant_id = OLD.participant_id;
+            UPDATE counters SET value = value + 1 WHERE name = 'scoreboard';
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS scoreboard_submission_insert
+        AFTER INSERT ON submissions
+        WHEN COALESCE(NEW.wrong_attempts, 0) != 0 OR NEW.time_taken_seconds IS NOT NULL
+        BEGIN
+            UPDATE scoreboard
+               SET total_time  = (SELECT COALESCE(SUM(time_taken_seconds), 0) FROM submissions WHERE participant_id = NEW.participant_id),
+                   total_wrong = (SELECT COALESCE(SUM(wrong_attempts), 0) FROM submissions WHERE participant_id = NEW.participant_id)
+             WHERE participant_id = NEW.participant_id;
+            UPDATE counters SET value = value + 1 WHERE name = 'scoreboard';
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS scoreboard_submission_update
+        AFTER UPDATE OF wrong_attempts, time_taken_seconds ON submissions
+        WHEN OLD.wrong_attempts IS NOT NEW.wrong_attempts OR OLD.time_taken_seconds IS NOT NEW.time_taken_seconds
+        BEGIN
+            UPDATE scoreboard
+               SET total_time  = (SELECT COALESCE(SUM(time_taken_seconds), 0) FROM submissions WHERE participant_id = NEW.participant_id),
+                   total_wrong = (SELECT COALESCE(SUM(wrong_attempts), 0) FROM submissions WHERE participant_id = NEW.participant_id)
+             WHERE participant_id = NEW.participant_id;
+            UPDATE counters SET value = value + 1 WHERE name = 'scoreboard';
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS scoreboard_submission_delete
+        AFTER DELETE ON submissions
+        BEGIN
+            UPDATE scoreboard
+               SET total_time  = (SELECT COALESCE(SUM(time_taken_seconds), 0) FROM submissions WHERE participant_id = OLD.participant_id),
+                   total_wrong = (SELECT COALESCE(SUM(wrong_attempts), 0) FROM submissions WHERE participant_id = OLD.participant_id)
+             WHERE participant_id = OLD.participant_id;
+            UPDATE counters SET value = value + 1 WHERE name = 'scoreboard';
+        END;
+    """)
+
+
+def _migration_4(conn):
+    """Contest events pushed to clients over /api/events."""
+    _execute_script(conn, """
+        CREATE TABLE IF NOT EXISTS events (
+            id             INTEGER PRIMARY KEY AUTOINCREMENT,
+            kind           TEXT NOT NULL,
+            participant_id INTEGER,
+            data           TEXT NOT NULL,
+            created_at     TEXT
+        );
+    """)
+
+
+def _migration_5(conn):
+    """Version counter for the cached contest state."""
+    _execute_script(conn, """
+        INSERT OR IGNORE INTO counters VALUES ('contest', 0);
+    """)
+
+
+def _migration_6(conn):
+    """Hash of (language, code), so autosave can skip rewriting unchanged drafts."""
+    _execute_script(conn, """
+        ALTER TABLE submissions ADD COLUMN code_hash TEXT;
+    """)
+
+
+def _migration_7(conn):
+    """Change sequence on participants for the admin delta feed."""
+    # Every insert or update of a participant, and every solve (which changes
+    # its solved_count), stamps the row with the next counters.participants
+    # value. Writers are serialized, so a reader that has seen sequence N will
+    # find every later change at change_seq > N.
+    _execute_script(conn, """
+        ALTER TABLE participants ADD COLUMN change_seq INTEGER NOT NULL DEFAULT 0;
+        INSERT OR IGNORE INTO counters VALUES ('participants', 0);
+        UPDATE participants SET change_seq = id;
+        UPDATE counters SET value = (SELECT COALESCE(MAX(id), 0) FROM participants) WHERE name = 'participants';
+        CREATE INDEX IF NOT EXISTS idx_participants_change_seq ON participants(change_seq);
+
+        CREATE TRIGGER IF NOT EXISTS participants_seq_insert
+        AFTER INSERT ON participants
+        BEGIN
+            UPDATE counters SET value = value + 1 WHERE name = 'participants';
+            UPDATE participants SET change_seq = (SELECT value FROM counters WHERE name = 'participants')
+             WHERE id = NEW.id;
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS participants_seq_update
+        AFTER UPDATE OF name, college, system_number, phone, login_time, submitted, submit_time ON participants
+        BEGIN
+            UPDATE counters SET value = value + 1 WHERE name = 'participants';
+            UPDATE participants SET change_seq = (SELECT value FROM counters WHERE name = 'participants')
+             WHERE id = NEW.id;
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS participants_seq_solved_insert
+        AFTER INSERT ON solved
+        BEGIN
+            UPDATE counters SET value = value + 1 WHERE name = 'participants';
+            UPDATE participants SET change_seq = (SELECT value FROM counters WHERE name = 'participants')
+             WHERE id = NEW.participant_id;
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS participants_seq_solved_delete
+        AFTER DELETE ON solved
+        BEGIN
+            UPDATE counters SET value = value + 1 WHERE name = 'participants';
+            UPDATE participants SET change_seq = (SELECT value FROM counters WHERE name = 'participants')
+             WHERE id = OLD.participant_id;
+        END;
+    """)
+
+
+def _migration_8(conn):
+    """Judge jobs, so any worker process can answer a poll for a job another one runs."""
+    _execute_script(conn, """
+        CREATE TABLE IF NOT EXISTS jobs (
+            id             TEXT PRIMARY KEY,
+            participant_id INTEGER NOT NULL,
+            kind           TEXT NOT NULL,
+            status         TEXT NOT NULL,
+            total          INTEGER NOT NULL,
+            done           INTEGER NOT NULL DEFAULT 0,
+            results        TEXT,
+            result         TEXT,
+            error          TEXT,
+            created_at     REAL NOT NULL,
+            updated_at     REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_jobs_participant ON jobs(participant_id, kind, status);
+        CREATE INDEX IF NOT EXISTS idx_jobs_updated ON jobs(updated_at);
+    """)
+
+
+def _migration_9(conn):
+    """Every judged submission with its code, so a rejudge can grade it again; rejudge runs."""
+    # submissions keeps only the latest code per problem. Rows from before this
+    # migration are carried over as far as they can be: each wrong attempt
+    # becomes an attempt without code (a rejudge keeps its verdict) and a
+    # solve becomes a passing attempt with the stored code.
+    _execute_script(conn, """
+        CREATE TABLE IF NOT EXISTS attempts (
+            id             INTEGER PRIMARY KEY AUTOINCREMENT,
+            participant_id INTEGER NOT NULL,
+            problem_id     INTEGER NOT NULL,
+            language       TEXT,
+            code           TEXT,
+            code_hash      TEXT,
+            active_seconds REAL,
+            passed         INTEGER NOT NULL,
+            submitted_at   TEXT NOT NULL,
+            rejudged_by    INTEGER
+        );
+        CREATE INDEX IF NOT EXISTS idx_attempts_participant_problem ON attempts(participant_id, problem_id, id);
+        CREATE INDEX IF NOT EXISTS idx_attempts_program ON attempts(problem_id, code_hash);
+
+        CREATE TABLE IF NOT EXISTS rejudges (
+            id             INTEGER PRIMARY KEY AUTOINCREMENT,
+            problem_ids    TEXT NOT NULL,
+            max_attempt_id INTEGER NOT NULL,
+            status         TEXT NOT NULL,
+            total          INTEGER NOT NULL DEFAULT 0,
+            done           INTEGER NOT NULL DEFAULT 0,
+            changed        INTEGER NOT NULL DEFAULT 0,
+            gained         INTEGER NOT NULL DEFAULT 0,
+            lost           INTEGER NOT NULL DEFAULT 0,
+            errors         INTEGER NOT NULL DEFAULT 0,
+            error          TEXT,
+            started_at     REAL NOT NULL,
+            resumed_at     REAL NOT NULL,
+            resumed_done   INTEGER NOT NULL DEFAULT 0,
+            updated_at     REAL NOT NULL,
+            finished_at    REAL
+        );
+    """)
+    rows = conn.execute(
+        "SELECT participant_id, problem_id, language, code, passed_all, wrong_attempts, solved_at, "
+        "time_taken_seconds, last_updated FROM submissions WHERE passed_all=1 OR wrong_attempts > 0 ORDER BY id"
+    ).fetchall()
+    for r in rows:
+        conn.executemany(
+            "INSERT INTO attempts (participant_id, problem_id, language, passed, submitted_at) VALUES (?,?,?,0,?)",
+            [(r["participant_id"], r["problem_id"], r["language"], r["last_updated"] or "")] * (r["wrong_attempts"] or 0))
+        if r["passed_all"]:
+            # Same digest as core.autosave.code_hash.
+            digest = hashlib.sha256(f"{r['language']}\0{r['code'] or ''}".encode("utf-8")).hexdigest()
+            conn.execute(
+                "INSERT INTO attempts (participant_id, problem_id, language, code, code_hash, active_seconds, passed, submitted_at) "
+                "VALUES (?,?,?,?,?,?,1,?)",
+                (r["participant_id"], r["problem_id"], r["language"], r["code"] or "", digest,
+                 r["time_taken_seconds"], r["solved_at"] or ""))
+
+
+def _migration_10(conn):
+    """Judge rate-limit token buckets, so the limits hold across worker processes."""
+    _execute_script(conn, """
+        CREATE TABLE IF NOT EXISTS job_buckets (
+            participant_id INTEGER NOT NULL,
+            kind           TEXT NOT NULL,
+            tokens         REAL NOT NULL,
+            refilled_at    REAL NOT NULL,
+            PRIMARY KEY (participant_id, kind)
+        );
+    """)
+
+
+MIGRATIONS = [_migration_1, _migration_2, _migration_3, _migration_4, _migration_5, _migration_6,
+              _migration_7, _migration_8, _migration_9, _migration_10]
+
+
+def schema_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn, target=None):
+    """Apply pending migrations up to ``target`` (default: latest)."""
+    target = len(MIGRATIONS) if target is None else target
+    while schema_version(conn) < target:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Re-read under the write lock: another process may have migrated.
+            version = schema_version(conn)
+            if version >= target:
+                conn.rollback()
+                break
+            MIGRATIONS[version](conn)
+            conn.execute(f"PRAGMA user_version={version + 1}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+
+def _execute_script(conn, script):
+    """Like executescript(), but runs inside the caller's transaction."""
+    statement = ""
+    for line in script.splitlines(keepends=True):
+        statement += line
+        if sqlite3.complete_statement(statement):
+            conn.execute(statement)
+            statement = ""
+
+
+# ── CONTEST STATE ─────────────────────────────────────────────────────────────
+
+ContestState = namedtuple("ContestState", ["version", "config", "active", "start_time", "ended"])
+
+
+class ContestStateCache:
+    """
+    Process-local snapshot of contest_config plus the ids of participants
+    whose test has ended, so status checks need no database round trip.
+
+    Every change bumps counters.contest in the writer's transaction and then
+    replaces a small version file next to the database. Readers compare the
+    file's stat() with the one seen at their last load, which invalidates
+    the cache in every worker process without touching SQLite. The snapshot
+    is also reloaded after ``max_age`` seconds in case a writer died between
+    its commit and the file update.
+    """
+
+    def __init__(self, version_path, max_age):
+        self.version_path = version_path
+        self.max_age      = max_age
+        self._lock        = threading.Lock()
+        self._state       = None
+        self._stamp       = None
+        self._loaded_at   = 0.0
+
+    def get(self):
+        stamp = self._file_stamp()
+        if self._fresh(stamp):
+            return self._state
+        with self._lock:
+            if not self._fresh(stamp):
+                self._state     = self._load()
+                self._stamp     = stamp
+                self._loaded_at = time.monotonic()
+            return self._state
+
+    def changed(self, version):
+        """Announce a committed change to every process, this one included."""
+        tmp = f"{self.version_path}.{os.getpid()}.{threading.get_ident()}"
+        try:
+            with open(tmp, "w") as f:
+                f.write(str(version))
+            os.replace(tmp, self.version_path)     # new inode, so stat() always differs
+        except OSError:
+            pass                                   # other processes catch up via max_age
+        with self._lock:
+            self._state = None
+
+    def _fresh(self, stamp):
+        return (self._state is not None and stamp == self._stamp
+                and time.monotonic() - self._loaded_at < self.max_age)
+
+    def _file_stamp(self):
+        try:
+            st = os.stat(self.version_path)
+            return st.st_ino, st.st_mtime_ns, st.st_size
+        except OSError:
+            return None
+
+    def _load(self):
+        conn = _pool.acquire()
+        try:
+            conn.execute("BEGIN")
+            version = conn.execute("SELECT value FROM counters WHERE name='contest'").fetchone()
+            config  = {r["key"]: r["value"] for r in conn.execute("SELECT key, value FROM contest_config")}
+            ended   = frozenset(r["id"] for r in conn.execute("SELECT id FROM participants WHERE submitted=1"))
+            conn.commit()
+        finally:
+            _pool.release(conn)
+        return ContestState(
+            version    = version["value"] if version else 0,
+            config     = config,
+            active     = config.get("contest_active") == "1",
+            start_time = config.get("start_time", ""),
+            ended      = ended,
+        )
+
+
+contest_state = ContestStateCache(CONTEST_STATE_VERSION_FILE, CONTEST_STATE_MAX_AGE)
+
+
+def bump_contest_version(conn):
+    """Bump counters.contest inside the caller's transaction; returns the new value."""
+    return conn.execute(
+        "UPDATE counters SET value = value + 1 WHERE name='contest' RETURNING value"
+    ).fetchone()["value"]
 
 
 def get_config(key):
-    with get_db() as conn:
-        row = conn.execute("SELECT value FROM contest_config WHERE key=?", (key,)).fetchone()
-        return row["value"] if row else ""
+    return contest_state.get().config.get(key, "")
 
 
 def set_config(key, value):
     with get_db() as conn:
         conn.execute("INSERT OR REPLACE INTO contest_config VALUES (?,?)", (key, value))
-        conn.commit()
\ No newline at end of file
+        version = bump_contest_version(conn)
+        conn.commit()
+    contest_state.changed(version)
+
+
+def mark_ended(participant_id, when):
+    """Record that a participant's test is over (self-ended or force-ended)."""
+    with get_db() as conn:
+        conn.execute("UPDATE participants SET submitted=1, submit_time=? WHERE id=?",
+                     (when, participant_id))
+        version = bump_contest_version(conn)
+        conn.commit()
+    contest_state.changed(version)
@@ -0,0 +1,104 @@
+import json
+import threading
+from collections import deque
+from datetime import datetime, timezone
+from core.config import EVENTS_POLL_INTERVAL, EVENTS_MAX_STREAMS
+from core.database import get_db
+
+
+class EventBus:
+    """
+    Fan-out of contest events to /api/events streams.
+
+    Events are rows in the ``events`` table, so every worker process sees
+    every event whichever process published it. One dispatcher thread per
+    process polls the table and wakes all streams waiting on a shared
+    condition; a stream costs no database work and no thread of its own
+    beyond the one serving its request (a greenlet under gevent).
+    """
+
+    def __init__(self, poll_interval, max_streams, backlog=256):
+        self.poll_interval = poll_interval
+        self.max_streams   = max_streams
+        self._cond         = threading.Condition()
+        self._wake         = threading.Event()
+        self._events       = deque(maxlen=backlog)
+        self._last_id      = 0
+        self._evicted      = 0      # newest id pushed out of the backlog
+        self._streams      = 0
+        self._thread       = None
+
+    def publish(self, kind, data, participant_id=None):
+        conn = get_db()
+        conn.execute(
+            "INSERT INTO events (kind, participant_id, data, created_at) VALUES (?,?,?,?)",
+            (kind, participant_id, json.dumps(data), datetime.now(timezone.utc).isoformat()),
+        )
+        conn.commit()
+        self._wake.set()
+
+    def cursor(self):
+        """Id of the newest event seen by this process; wait() returns later ones."""
+        self._start()
+        return self._last_id
+
+    def wait(self, after, timeout):
+        """
+        Block until events newer than ``after`` arrive or ``timeout`` passes.
+
+        Returns the new events as (id, kind, participant_id, data) tuples, or
+        None when some were already dropped from the backlog and the caller
+        must resync from a fresh snapshot.
+        """
+        with self._cond:
+            self._cond.wait_for(lambda: self._last_id > after, timeout)
+            if self._evicted > after:
+                return None
+            return [e for e in self._events if e[0] > after]
+
+    def open_stream(self):
+        with self._cond:
+            if self._streams >= self.max_streams:
+                return False
+            self._streams += 1
+            return True
+
+    def close_stream(self):
+        with self._cond:
+            self._streams -= 1
+
+    def streams(self):
+        return self._streams
+
+    def _start(self):
+        with self._cond:
+            if self._thread is not None:
+                return
+            row = get_db().execute("SELECT COALESCE(MAX(id), 0) FROM events").fetchone()
+            self._last_id = row[0]
+            self._thread  = threading.Thread(target=self._dispatch, name="event-dispatcher", daemon=True)
+            self._thread.start()
+
+    def _dispatch(self):
+        while True:
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+            try:
+                rows = get_db().execute(
+                    "SELECT id, kind, participant_id, data FROM events WHERE id > ? ORDER BY id",
+                    (self._last_id,),
+                ).fetchall()
+            except Exception:
+                continue
+            if not rows:
+                continue
+            with self._cond:
+                for r in rows:
+                    if len(self._events) == self._events.maxlen:
+                        self._evicted = self._events[0][0]
+                    self._events.append((r["id"], r["kind"], r["participant_id"], json.loads(r["data"])))
+                self._last_id = rows[-1]["id"]
+                self._cond.notify_all()
+
+
+event_bus = EventBus(EVENTS_POLL_INTERVAL, EVENTS_MAX_STREAMS)
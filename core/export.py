@@ -0,0 +1,184 @@
+import csv
+import io
+import json
+import zipfile
+from datetime import datetime, timezone
+from core.database import open_snapshot
+
+# Bulk export of a contest: participants, their code and the standings,
+# streamed straight off SQLite cursors in chunks of about CHUNK_BYTES, so
+# memory use does not grow with the contest. Every table is read from one
+# snapshot (core.database.open_snapshot), so an export taken while the
+# contest runs is consistent: standings match the submissions beside them.
+
+CHUNK_BYTES = 64 * 1024
+
+TABLES = {
+    "participants": """
+        SELECT id, name, college, system_number, phone, login_time, submitted, submit_time
+          FROM participants
+         ORDER BY id
+    """,
+    # Latest code per problem, with its result.
+    "submissions": """
+        SELECT participant_id, problem_id, language, passed_all, wrong_attempts,
+               first_opened_at, solved_at, time_taken_seconds, last_updated, code
+          FROM submissions
+         ORDER BY participant_id, problem_id
+    """,
+    # Every judged submit (see routes/rejudge.py); code is NULL for wrong
+    # attempts made before attempts were stored.
+    "attempts": """
+        SELECT id, participant_id, problem_id, language, passed, active_seconds, submitted_at, rejudged_by, code
+          FROM attempts
+         ORDER BY id
+    """,
+    # Same order as the admin leaderboard (core/scoreboard.py).
+    "standings": """
+        SELECT ROW_NUMBER() OVER (ORDER BY sb.solved_count DESC, sb.total_time ASC, sb.participant_id ASC) AS rank,
+               sb.participant_id, p.name, p.college, p.system_number,
+               sb.solved_count, sb.total_time, sb.total_wrong
+          FROM scoreboard sb
+          JOIN participants p ON p.id = sb.participant_id
+         ORDER BY rank
+    """,
+}
+FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+class ExportError(Exception):
+    """An export that cannot be produced as asked (bad table or format)."""
+
+
+class Export:
+    """
+    One export, iterable as bytes. ``fmt`` is "ndjson" or "csv"; unzipped,
+    NDJSON interleaves the tables as {"table": ..., column: value} lines after
+    a header line ({"table": "export", ...}), while CSV holds a single table.
+    ``zipped`` writes one file per table plus export.json instead.
+
+    The snapshot is taken here, not when iteration starts; iterating to the
+    end or close() releases it.
+    """
+
+    def __init__(self, tables=None, fmt="ndjson", zipped=False):
+        tables  = list(dict.fromkeys(tables or TABLES))
+        unknown = [t for t in tables if t not in TABLES]
+        if unknown:
+            raise ExportError(f"Unknown tables: {', '.join(unknown)} (choose from {', '.join(TABLES)}).")
+        if fmt not in FORMATS:
+            raise ExportError(f"Unknown format {fmt!r} (choose from {', '.join(FORMATS)}).")
+        if fmt == "csv" and not zipped and len(tables) != 1:
+            raise ExportError("A CSV export holds one table; pick one, or ask for a zip.")
+        self.tables = tables
+        self.format = fmt
+        self.zipped = zipped
+        self._conn  = open_snapshot()
+        try:
+            self.meta = self._meta()
+        except BaseException:
+            self.close()
+            raise
+
+    @property
+    def filename(self):
+        stamp = self.meta["exported_at"][:19].replace(":", "").replace("-", "")
+        name  = self.tables[0] if self.format == "csv" and not self.zipped else "contest"
+        return f"{name}-{stamp}.{'zip' if self.zipped else self.format}"
+
+    @property
+    def mimetype(self):
+        return "application/zip" if self.zipped else FORMATS[self.format]
+
+    def __iter__(self):
+        try:
+            for chunk in self._zip() if self.zipped else self._encoded(self._chunks(self.tables, header=True)):
+                if chunk:
+                    yield chunk
+        finally:
+            self.close()
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def _meta(self):
+        conn   = self._conn
+        config = dict(conn.execute("SELECT key, value FROM contest_config").fetchall())
+        board  = conn.execute("SELECT value FROM counters WHERE name='scoreboard'").fetchone()
+        return {
+            "exported_at":        datetime.now(timezone.utc).isoformat(),
+            "schema_version":     conn.execute("PRAGMA user_version").fetchone()[0],
+            "scoreboard_version": board[0] if board else 0,
+            "contest_active":     config.get("contest_active") == "1",
+            "start_time":         config.get("start_time"),
+            "tables":             self.tables,
+        }
+
+    def _chunks(self, tables, header=False):
+        """The tables in this export's text format, as strings of about CHUNK_BYTES."""
+        out = io.StringIO()
+        if self.format == "csv":
+            writer = csv.writer(out)
+            for table in tables:
+                cursor = self._conn.execute(TABLES[table])
+                writer.writerow(d[0] for d in cursor.description)
+                for row in cursor:
+                    writer.writerow(row)
+                    if out.tell() >= CHUNK_BYTES:
+                        yield _drain(out)
+        else:
+            if header:
+                out.write(json.dumps(dict(self.meta, table="export"), ensure_ascii=False) + "\n")
+            for table in tables:
+                cursor  = self._conn.execute(TABLES[table])
+                columns = ["table"] + [d[0] for d in cursor.description]
+                for row in cursor:
+                    out.write(json.dumps(dict(zip(columns, (table, *row))), ensure_ascii=False) + "\n")
+                    if out.tell() >= CHUNK_BYTES:
+                        yield _drain(out)
+        yield _drain(out)
+
+    @staticmethod
+    def _encoded(chunks):
+        for chunk in chunks:
+            yield chunk.encode("utf-8")
+
+    def _zip(self):
+        sink = _Sink()
+        with zipfile.ZipFile(sink, "w", zipfile.ZIP_DEFLATED) as z:
+            z.writestr("export.json", json.dumps(self.meta, indent=2))
+            for table in self.tables:
+                with z.open(f"{table}.{self.format}", "w", force_zip64=True) as f:
+                    for chunk in self._encoded(self._chunks([table])):
+                        f.write(chunk)
+                        yield sink.drain()
+                yield sink.drain()
+        yield sink.drain()
+
+
+def _drain(out):
+    text = out.getvalue()
+    out.seek(0)
+    out.truncate()
+    return text
+
+
+class _Sink:
+    """A write-only file for ZipFile that hands over what was written since the last drain()."""
+
+    def __init__(self):
+        self._parts = []
+
+    def write(self, data):
+        self._parts.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b"".join(self._parts)
+        self._parts.clear()
+        return data
@@ -0,0 +1,211 @@
+import threading
+import time
+from collections import deque
+import requests
+from requests.adapters import HTTPAdapter
+
+# Shared plumbing for calls to other services: pooled keep-alive sessions, a
+# circuit breaker and per-upstream latency stats. GatewayClient combines them
+# with a short response cache for the admin gateway.
+
+
+class UpstreamError(Exception):
+    """An upstream call failed and there was nothing (not even stale) to serve."""
+
+
+def make_session(pool_size):
+    """A requests.Session keeping up to ``pool_size`` idle keep-alive connections per host."""
+    s       = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=0)
+    s.mount("http://", adapter)
+    s.mount("https://", adapter)
+    return s
+
+
+# ── CIRCUIT BREAKER ───────────────────────────────────────────────────────────
+
+class CircuitBreaker:
+    """
+    Opens after ``failures`` consecutive failures and rejects calls for
+    ``reset_seconds``; then lets one trial call through (half-open) and
+    closes again if it succeeds.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, failures, reset_seconds):
+        self.failures      = failures
+        self.reset_seconds = reset_seconds
+        self.state         = self.CLOSED
+        self.opened        = 0          # times the breaker tripped
+        self._consecutive  = 0
+        self._opened_at    = 0.0
+        self._trial        = False
+        self._lock         = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_seconds:
+                self.state  = self.HALF_OPEN
+                self._trial = False
+            if self.state == self.HALF_OPEN and not self._trial:
+                self._trial = True
+                return True
+            return False
+
+    def success(self):
+        with self._lock:
+            self.state        = self.CLOSED
+            self._consecutive = 0
+
+    def failure(self):
+        with self._lock:
+            self._consecutive += 1
+            if self.state == self.HALF_OPEN or self._consecutive >= self.failures:
+                if self.state != self.OPEN:
+                    self.opened += 1
+                self.state      = self.OPEN
+                self._opened_at = time.monotonic()
+
+
+# ── LATENCY STATS ─────────────────────────────────────────────────────────────
+
+class LatencyStats:
+    """Call counts and latency percentiles over the last ``window`` calls."""
+
+    def __init__(self, window=1024):
+        self.calls    = 0
+        self.errors   = 0
+        self._samples = deque(maxlen=window)
+        self._lock    = threading.Lock()
+
+    def record(self, seconds, ok):
+        with self._lock:
+            self.calls += 1
+            self.errors += not ok
+            self._samples.append(seconds)
+
+    def snapshot(self):
+        with self._lock:
+            samples = sorted(self._samples)
+        def pct(q):
+            return round(samples[min(len(samples) - 1, int(len(samples) * q))] * 1000, 2) if samples else None
+        return {"calls": self.calls, "errors": self.errors,
+                "p50_ms": pct(0.50), "p95_ms": pct(0.95), "p99_ms": pct(0.99),
+                "max_ms": round(samples[-1] * 1000, 2) if samples else None}
+
+
+# ── GATEWAY CLIENT ────────────────────────────────────────────────────────────
+
+class _Flight:
+    def __init__(self):
+        self.done   = threading.Event()
+        self.result = None
+        self.error  = None
+
+
+class GatewayClient:
+    """
+    JSON GETs against one upstream service.
+
+    Successful responses are cached for ``cache_ttl`` seconds and concurrent
+    misses for the same URL share a single upstream call. When the call
+    fails, or the breaker is open, the last good response is served as
+    "stale" for up to ``stale_seconds``; only when there is none does
+    get_json raise UpstreamError.
+    """
+
+    def __init__(self, name, base_url, connect_timeout, read_timeout, pool_size,
+                 cache_ttl, stale_seconds, breaker_failures, breaker_reset_seconds):
+        self.name          = name
+        self.base_url      = base_url.rstrip("/")
+        self.timeout       = (connect_timeout, read_timeout)
+        self.cache_ttl     = cache_ttl
+        self.stale_seconds = stale_seconds
+        self.session       = make_session(pool_size)
+        self.breaker       = CircuitBreaker(breaker_failures, breaker_reset_seconds)
+        self.latency       = LatencyStats()
+        self.hits          = 0
+        self.misses        = 0
+        self.coalesced     = 0
+        self.stale_served  = 0
+        self._cache        = {}     # path -> (fetched_at, status, body)
+        self._flights      = {}     # path -> _Flight
+        self._lock         = threading.Lock()
+
+    def get_json(self, path):
+        """Return (status, body, source) where source is "hit", "miss" or "stale"."""
+        now = time.monotonic()
+        with self._lock:
+            cached = self._cache.get(path)
+            if cached is not None and now - cached[0] < self.cache_ttl:
+                self.hits += 1
+                return cached[1], cached[2], "hit"
+            flight = self._flights.get(path)
+            leader = flight is None
+            if leader:
+                flight = self._flights[path] = _Flight()
+                self.misses += 1
+            else:
+                self.coalesced += 1
+
+        if leader:
+            try:
+                flight.result = self._fetch(path)
+            except UpstreamError as e:
+                flight.error = e
+            finally:
+                with self._lock:
+                    del self._flights[path]
+                flight.done.set()
+        else:
+            flight.done.wait()
+
+        if flight.error is None:
+            return flight.result[0], flight.result[1], "miss"
+        return self._stale(path, flight.error)
+
+    def _fetch(self, path):
+        if not self.breaker.allow():
+            raise UpstreamError(f"{self.name}: circuit open")
+        t0 = time.perf_counter()
+        try:
+            r    = self.session.get(self.base_url + path, timeout=self.timeout)
+            body = r.json()
+        except (requests.RequestException, ValueError) as e:
+            self.latency.record(time.perf_counter() - t0, False)
+            self.breaker.failure()
+            raise UpstreamError(f"{self.name}: {type(e).__name__}") from e
+        ok = r.status_code < 500
+        self.latency.record(time.perf_counter() - t0, ok)
+        if not ok:
+            self.breaker.failure()
+            raise UpstreamError(f"{self.name}: HTTP {r.status_code}")
+        self.breaker.success()
+        if r.status_code == 200:
+            with self._lock:
+                self._cache[path] = (time.monotonic(), r.status_code, body)
+        return r.status_code, body
+
+    def _stale(self, path, error):
+        with self._lock:
+            cached = self._cache.get(path)
+            if cached is None or time.monotonic() - cached[0] > self.stale_seconds:
+                raise error
+            self.stale_served += 1
+            return cached[1], cached[2], "stale"
+
+    def stats(self):
+        return {
+            "upstream":     self.name,
+            "base_url":     self.base_url,
+            "breaker":      self.breaker.state,
+            "breaker_trips": self.breaker.opened,
+            "cache_hits":   self.hits,
+            "cache_misses": self.misses,
+            "coalesced":    self.coalesced,
+            "stale_served": self.stale_served,
+            "latency":      self.latency.snapshot(),
+        }
@@ -0,0 +1,408 @@
+import atexit
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from core.config import (JUDGE_WORKERS, JUDGE_QUEUE_CAPACITY, JUDGE_JOB_TTL_SECONDS,
+                         JUDGE_JOB_HEARTBEAT_SECONDS, JUDGE_JOB_STALE_SECONDS,
+                         JUDGE_JOBS_PER_PARTICIPANT, JUDGE_SUBMIT_RATE_PER_MINUTE, JUDGE_SUBMIT_BURST,
+                         JUDGE_RUNS_PER_PARTICIPANT, JUDGE_RUN_RATE_PER_MINUTE, JUDGE_RUN_BURST)
+from core.database import get_db
+from core.http_client import LatencyStats
+
+# Job kinds in the order workers serve them: a submit never waits behind runs.
+KINDS = ("submit", "run")
+
+# Every job also lives in the jobs table, so a poll that lands on another
+# worker process still finds it and the per-participant in-flight limit holds
+# across processes. Status changes are written at once; per-test-case
+# progress at most every PROGRESS_WRITE_INTERVAL seconds.
+PROGRESS_WRITE_INTERVAL = 0.5
+
+LOST_ERROR = "The judge worker handling this stopped before it finished. Please try again."
+
+
+class QueueFull(Exception):
+    """Raised when the judge queue cannot take another job right now."""
+
+    def __init__(self, message, retry_after, status=503):
+        super().__init__(message)
+        self.retry_after = retry_after
+        self.status      = status
+
+
+class Job:
+    def __init__(self, participant_id, kind, total, fn):
+        self.id             = uuid.uuid4().hex
+        self.participant_id = participant_id
+        self.kind           = kind
+        self.total          = total
+        self.fn             = fn
+        self.status         = "queued"
+        self.results        = [None] * total
+        self.done           = 0
+        self.result         = None
+        self.error          = None
+        self.created_at     = time.monotonic()
+        self.started_at     = None
+        self.finished_at    = None
+        self.on_change      = None         # set by JobQueue to persist progress
+        self.saved_at       = 0.0
+        self.unsaved        = False        # last status change not yet in the jobs table
+        self._lock          = threading.Lock()
+
+    @classmethod
+    def from_row(cls, row):
+        """A read-only copy of a job stored by (possibly) another process."""
+        job         = cls(row["participant_id"], row["kind"], row["total"], None)
+        job.id      = row["id"]
+        job.status  = row["status"]
+        job.done    = row["done"]
+        job.results = json.loads(row["results"]) if row["results"] else job.results
+        job.result  = json.loads(row["result"]) if row["result"] else None
+        job.error   = row["error"]
+        return job
+
+    def progress(self, index, value):
+        """Record the outcome of one test case; called from the judge worker."""
+        with self._lock:
+            if self.results[index] is None:
+                self.done += 1
+            self.results[index] = value
+        if self.on_change:
+            self.on_change(self)
+
+    def to_dict(self):
+        with self._lock:
+            d = {
+                "job_id":  self.id,
+                "kind":    self.kind,
+                "status":  self.status,
+                "done":    self.done,
+                "total":   self.total,
+                "results": list(self.results),
+            }
+        if self.status == "done":
+            d.update(self.result or {})
+        elif self.status == "failed":
+            d["error"] = self.error
+        return d
+
+
+class JobQueue:
+    """
+    Fair scheduler for judge jobs, drained by a fixed pool of worker threads.
+
+    Queued jobs wait in per-participant FIFOs. Workers serve every queued
+    submit before any run and, within a kind, take one job from each waiting
+    participant in turn (round-robin), so a participant clicking Run over and
+    over only queues behind their own jobs.
+
+    ``submit`` never blocks. It raises QueueFull with a retry hint when the
+    participant already has ``limits[kind][0]`` jobs of that kind queued or
+    running, when their token bucket for the kind (``limits[kind][1]`` jobs
+    per minute, bursts of ``limits[kind][2]``) is empty, or when ``capacity``
+    jobs are already waiting, so the route can answer with a backpressure
+    response instead of pinning a worker.
+
+    The in-flight limit is counted in the jobs table and the token buckets
+    live in job_buckets, so both hold across server processes; the queues
+    and workers are per process. A heartbeat thread keeps this process's
+    unfinished jobs' rows fresh. Rows left queued or running by a process
+    that died go silent and are failed after ``stale_seconds``, so they stop
+    counting towards the participant's limit.
+    """
+
+    def __init__(self, workers, capacity, limits, ttl_seconds,
+                 stale_seconds=JUDGE_JOB_STALE_SECONDS, heartbeat_seconds=JUDGE_JOB_HEARTBEAT_SECONDS):
+        self.workers           = workers
+        self.capacity          = capacity
+        self.limits            = limits         # kind -> (in flight, jobs per minute, burst)
+        self.ttl_seconds       = ttl_seconds
+        self.stale_seconds     = stale_seconds
+        self.heartbeat_seconds = heartbeat_seconds
+        self.throttled         = dict.fromkeys(KINDS, 0)
+        self.rejected          = 0
+        self.save_errors       = 0
+        self.waits             = {kind: LatencyStats() for kind in KINDS}
+        self._pending          = {kind: OrderedDict() for kind in KINDS}   # participant -> deque of jobs
+        self._queued           = 0
+        self._running          = 0
+        self._jobs             = {}
+        self._lock             = threading.Lock()
+        self._ready            = threading.Condition(self._lock)
+        self._threads          = []
+        self._avg_seconds      = 2.0
+
+    def submit(self, participant_id, total, fn, kind="submit"):
+        self._ensure_workers()
+        in_flight_max, per_minute, burst = self.limits[kind]
+        with self._lock:
+            self._expire()
+            if self._queued >= self.capacity:
+                self.rejected += 1
+                raise QueueFull("The judge is busy. Please try again shortly.", self._retry_after())
+
+        # Nothing in the write transaction may wait on a Python lock: under
+        # gevent that yields to another greenlet, whose BEGIN IMMEDIATE then
+        # blocks the whole worker in SQLite's busy handler until it times out.
+        now  = time.time()
+        job  = Job(participant_id, kind, total, fn)
+        wait = 0
+        conn = get_db()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM jobs WHERE updated_at < ?", (now - self.ttl_seconds,))
+            # A long idle bucket would be full again anyway.
+            conn.execute("DELETE FROM job_buckets WHERE refilled_at < ?", (now - self.ttl_seconds,))
+            conn.execute(
+                "UPDATE jobs SET status='failed', error=?, updated_at=? "
+                "WHERE status IN ('queued', 'running') AND updated_at < ?",
+                (LOST_ERROR, now, now - self.stale_seconds))
+            in_flight = conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE participant_id=? AND kind=? AND status IN ('queued', 'running')",
+                (participant_id, kind)).fetchone()[0]
+            if in_flight < in_flight_max:
+                wait = self._take_token(conn, participant_id, kind, per_minute, burst, now)
+            if in_flight < in_flight_max and not wait:
+                conn.execute(
+                    "INSERT INTO jobs (id, participant_id, kind, status, total, created_at, updated_at) "
+                    "VALUES (?,?,?,?,?,?,?)",
+                    (job.id, participant_id, kind, job.status, total, now, now))
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        if in_flight >= in_flight_max or wait:
+            with self._lock:
+                self.throttled[kind] += 1
+        if in_flight >= in_flight_max:
+            what = "submission" if kind == "submit" else "run"
+            raise QueueFull(f"You already have a {what} being judged.", 2, status=429)
+        if wait:
+            raise QueueFull("Too many requests. Please wait a moment.", wait, status=429)
+        job.on_change = self._save
+        with self._lock:
+            self._pending[kind].setdefault(participant_id, deque()).append(job)
+            self._queued += 1
+            self._jobs[job.id] = job
+            self._ready.notify()
+        return job
+
+    def get(self, job_id):
+        """The job, from this process if it runs here, else from the jobs table."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is not None:
+            return job
+        row = get_db().execute("SELECT * FROM jobs WHERE id=?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = Job.from_row(row)
+        if job.status in ("queued", "running") and row["updated_at"] < time.time() - self.stale_seconds:
+            job.status, job.error = "failed", LOST_ERROR
+        return job
+
+    def abandon(self):
+        """Fail this process's unfinished jobs in the jobs table, e.g. as its worker shuts down."""
+        with self._lock:
+            ids = [job.id for job in self._jobs.values() if job.finished_at is None]
+        if not ids:
+            return
+        conn = get_db()
+        conn.execute(
+            f"UPDATE jobs SET status='failed', error=?, updated_at=? "
+            f"WHERE id IN ({','.join('?' * len(ids))}) AND status IN ('queued', 'running')",
+            (LOST_ERROR, time.time(), *ids))
+        conn.commit()
+
+    def depth(self):
+        return self._queued
+
+    def ahead(self, job):
+        """How many queued jobs will start before ``job`` if nothing else arrives."""
+        with self._lock:
+            if job.status != "queued" or job.id not in self._jobs:
+                return 0
+            count = 0
+            for kind in KINDS:
+                ring = self._pending[kind]
+                if kind != job.kind:
+                    count += sum(len(jobs) for jobs in ring.values())
+                    continue
+                mine   = ring.get(job.participant_id, ())
+                k      = next((n for n, j in enumerate(mine) if j is job), 0)
+                before = True                       # participants served before ours in this round
+                for participant_id, jobs in ring.items():
+                    if participant_id == job.participant_id:
+                        before = False
+                        count += k
+                    else:
+                        count += min(len(jobs), k + before)
+                return count
+
+    def stats(self):
+        with self._lock:
+            queued  = {kind: sum(len(jobs) for jobs in self._pending[kind].values()) for kind in KINDS}
+            waiting = {kind: len(self._pending[kind]) for kind in KINDS}
+            oldest  = {kind: min((jobs[0].created_at for jobs in self._pending[kind].values()), default=None)
+                       for kind in KINDS}
+            running = self._running
+        now = time.monotonic()
+        return {
+            "workers":              self.workers,
+            "running":              running,
+            "queued":               queued,
+            "participants_waiting": waiting,
+            "oldest_wait_seconds":  {k: round(now - t, 2) if t is not None else 0 for k, t in oldest.items()},
+            "wait":                 {kind: self.waits[kind].snapshot() for kind in KINDS},
+            "throttled":            dict(self.throttled),
+            "rejected":             self.rejected,
+            "save_errors":          self.save_errors,
+        }
+
+    def _take_token(self, conn, participant_id, kind, per_minute, burst, now):
+        """Spend one token from the participant's bucket (in ``conn``'s transaction); return seconds to wait if empty."""
+        rate = per_minute / 60.0
+        row  = conn.execute("SELECT tokens, refilled_at FROM job_buckets WHERE participant_id=? AND kind=?",
+                            (participant_id, kind)).fetchone()
+        tokens = float(burst)
+        if row is not None:
+            tokens = min(tokens, row["tokens"] + max(0.0, now - row["refilled_at"]) * rate)
+        wait = 0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            wait = max(1, int((1 - tokens) / rate + 0.999))
+        conn.execute(
+            "INSERT INTO job_buckets (participant_id, kind, tokens, refilled_at) VALUES (?,?,?,?) "
+            "ON CONFLICT(participant_id, kind) DO UPDATE SET tokens=excluded.tokens, refilled_at=excluded.refilled_at",
+            (participant_id, kind, tokens, now))
+        return wait
+
+    def _save(self, job, force=False):
+        """
+        Write ``job``'s state to the jobs table. Progress is rate limited and
+        best effort. A status change (``force``) that fails to save is
+        counted and kept for the heartbeat to retry, so a finished job's row
+        does not stay queued or running.
+        """
+        now = time.time()
+        if not force and now - job.saved_at < PROGRESS_WRITE_INTERVAL:
+            return
+        job.saved_at = now
+        with job._lock:
+            results, done = json.dumps(job.results), job.done
+        conn = get_db()
+        try:
+            conn.execute(
+                "UPDATE jobs SET status=?, done=?, results=?, result=?, error=?, updated_at=? WHERE id=?",
+                (job.status, done, results, json.dumps(job.result) if job.result is not None else None,
+                 job.error, now, job.id))
+            conn.commit()
+        except sqlite3.Error:
+            if conn.in_transaction:
+                conn.rollback()
+            if force:
+                with self._lock:
+                    self.save_errors += 1
+                job.unsaved = True
+            return
+        if force:
+            job.unsaved = False
+
+    def _heartbeat(self):
+        while True:
+            time.sleep(self.heartbeat_seconds)
+            with self._lock:
+                jobs = list(self._jobs.values())
+            for job in jobs:
+                if job.unsaved:
+                    self._save(job, force=True)
+            live = [job.id for job in jobs if job.finished_at is None]
+            if not live:
+                continue
+            conn = get_db()
+            try:
+                conn.execute(
+                    f"UPDATE jobs SET updated_at=? "
+                    f"WHERE id IN ({','.join('?' * len(live))}) AND status IN ('queued', 'running')",
+                    (time.time(), *live))
+                conn.commit()
+            except sqlite3.Error:
+                if conn.in_transaction:
+                    conn.rollback()     # a missed beat is retried long before the jobs go stale
+
+    def _next_job(self):
+        """Pop the next job to run (caller holds the lock)."""
+        for kind in KINDS:
+            ring = self._pending[kind]
+            if ring:
+                participant_id, jobs = next(iter(ring.items()))
+                job = jobs.popleft()
+                del ring[participant_id]
+                if jobs:
+                    ring[participant_id] = jobs         # back of the line
+                self._queued -= 1
+                return job
+        return None
+
+    def _retry_after(self):
+        return max(1, int(self._queued * self._avg_seconds / max(self.workers, 1)))
+
+    def _expire(self):
+        now = time.monotonic()
+        for job_id, job in list(self._jobs.items()):
+            if job.finished_at is not None and not job.unsaved and now - job.finished_at > self.ttl_seconds:
+                del self._jobs[job_id]
+
+    def _ensure_workers(self):
+        if self._threads:
+            return
+        with self._lock:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                t = threading.Thread(target=self._work, name=f"judge-worker-{i}", daemon=True)
+                t.start()
+                self._threads.append(t)
+            t = threading.Thread(target=self._heartbeat, name="judge-heartbeat", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def _work(self):
+        while True:
+            with self._lock:
+                job = self._next_job()
+                while job is None:
+                    self._ready.wait()
+                    job = self._next_job()
+                self._running += 1
+            job.status     = "running"
+            job.started_at = time.monotonic()
+            self.waits[job.kind].record(job.started_at - job.created_at, True)
+            self._save(job, force=True)
+            try:
+                job.result = job.fn(job)
+                job.status = "done"
+            except Exception as e:
+                job.error  = f"Judging failed: {e}"
+                job.status = "failed"
+            job.finished_at   = time.monotonic()
+            self._avg_seconds = 0.8 * self._avg_seconds + 0.2 * (job.finished_at - job.started_at)
+            self._save(job, force=True)
+            with self._lock:
+                self._running -= 1
+
+
+judge_queue = JobQueue(
+    JUDGE_WORKERS, JUDGE_QUEUE_CAPACITY,
+    limits = {
+        "submit": (JUDGE_JOBS_PER_PARTICIPANT, JUDGE_SUBMIT_RATE_PER_MINUTE, JUDGE_SUBMIT_BURST),
+        "run":    (JUDGE_RUNS_PER_PARTICIPANT, JUDGE_RUN_RATE_PER_MINUTE, JUDGE_RUN_BURST),
+    },
+    ttl_seconds = JUDGE_JOB_TTL_SECONDS,
+)
+atexit.register(judge_queue.abandon)
@@ -0,0 +1,246 @@
+import bisect
+import os
+import threading
+import time
+from flask import request
+from core.config import METRICS_ENABLED
+
+# Hot-path timers and counters, exported at /metrics in the Prometheus text
+# format. Values live in this process only: under gunicorn each worker keeps
+# its own, and every sample carries the worker's pid so series from different
+# workers never merge. With METRICS_ENABLED off nothing is recorded and the
+# request hooks and the timed SQLite connection are not installed.
+
+# Upper bounds in seconds: 100 µs for cache hits and single statements up to
+# 30 s for a judge batch.
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Counter:
+    """A monotonically increasing count per label combination."""
+
+    kind = "counter"
+
+    def __init__(self, name, help, labels=()):
+        self.name    = name
+        self.help    = help
+        self.labels  = labels
+        self._values = {}
+        self._lock   = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        if not METRICS_ENABLED:
+            return
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def values(self):
+        with self._lock:
+            return dict(self._values)
+
+    def samples(self):
+        for labels, value in sorted(self.values().items()):
+            yield self.name, dict(zip(self.labels, labels)), value
+
+
+class Histogram:
+    """Observations counted into fixed buckets per label combination."""
+
+    kind = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name    = name
+        self.help    = help
+        self.labels  = labels
+        self.buckets = buckets
+        self._series = {}                  # labels -> [per-bucket counts (+Inf last), sum]
+        self._lock   = threading.Lock()
+
+    def observe(self, seconds, *labels):
+        if not METRICS_ENABLED:
+            return
+        i = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][i] += 1
+            series[1]    += seconds
+
+    def time(self, *labels):
+        return _Timer(self, labels)
+
+    def summary(self, by=None):
+        """
+        {label values: {"count", "sum", "p50_ms", "p95_ms", "p99_ms"}}, with
+        percentiles estimated from the buckets. ``by`` names the labels to
+        group on (default: all); series differing only in others are merged.
+        """
+        positions = [self.labels.index(name) for name in (self.labels if by is None else by)]
+        groups    = {}
+        with self._lock:
+            for labels, (counts, total) in self._series.items():
+                key   = tuple(labels[i] for i in positions)
+                group = groups.setdefault(key, [[0] * len(counts), 0.0])
+                group[0] = [a + b for a, b in zip(group[0], counts)]
+                group[1] += total
+        return {
+            key: {
+                "count":  sum(counts),
+                "sum":    total,
+                "p50_ms": self._quantile(counts, 0.50) * 1000,
+                "p95_ms": self._quantile(counts, 0.95) * 1000,
+                "p99_ms": self._quantile(counts, 0.99) * 1000,
+            }
+            for key, (counts, total) in groups.items()
+        }
+
+    def samples(self):
+        with self._lock:
+            series = sorted((labels, list(counts), total) for labels, (counts, total) in self._series.items())
+        for labels, counts, total in series:
+            named, running = dict(zip(self.labels, labels)), 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                running += count
+                yield self.name + "_bucket", dict(named, le=_format(bound)), running
+            yield self.name + "_sum",   named, total
+            yield self.name + "_count", named, running
+
+    def _quantile(self, counts, q):
+        """Linear interpolation inside the bucket holding the q-th observation."""
+        total = sum(counts)
+        if not total:
+            return 0.0
+        rank, seen = q * total, 0
+        for i, count in enumerate(counts):
+            if seen + count >= rank and count:
+                if i == len(self.buckets):
+                    return self.buckets[-1]
+                lower = self.buckets[i - 1] if i else 0.0
+                return lower + (self.buckets[i] - lower) * (rank - seen) / count
+            seen += count
+        return self.buckets[-1]
+
+
+class Collected:
+    """A gauge or counter read from ``fn()`` at scrape time: {label tuple: value}."""
+
+    def __init__(self, name, help, kind, labels, fn):
+        self.name   = name
+        self.help   = help
+        self.kind   = kind
+        self.labels = labels
+        self.fn     = fn
+
+    def samples(self):
+        for labels, value in sorted(self.fn().items()):
+            yield self.name, dict(zip(self.labels, labels)), value
+
+
+class _Timer:
+    __slots__ = ("histogram", "labels", "start")
+
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels    = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start, *self.labels)
+
+
+# ── REGISTRY ──────────────────────────────────────────────────────────────────
+
+_METRICS = []
+
+
+def _register(metric):
+    _METRICS.append(metric)
+    return metric
+
+
+def counter(name, help, labels=()):
+    return _register(Counter(name, help, labels))
+
+
+def histogram(name, help, labels=(), buckets=DEFAULT_BUCKETS):
+    return _register(Histogram(name, help, labels, buckets))
+
+
+def collect(name, help, kind, labels, fn):
+    """Export ``fn()`` (a {label tuple: value} dict) as a gauge or counter."""
+    return _register(Collected(name, help, kind, labels, fn))
+
+
+def render():
+    """Every metric in the Prometheus text exposition format (version 0.0.4)."""
+    lines = []
+    pid   = str(os.getpid())             # not at import: workers fork from a preloaded master
+    for metric in _METRICS:
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        for name, labels, value in metric.samples():
+            labels = dict(labels, pid=pid)
+            inner  = ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items())
+            lines.append(f"{name}{{{inner}}} {_format(value)}")
+    return "\n".join(lines) + "\n"
+
+
+def _escape(value):
+    return str(value).replace("\\", r"\\").replace("\n", r"\n").replace('"', r'\"')
+
+
+def _format(value):
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and not value.is_integer():
+        return repr(value)
+    return str(int(value))
+
+
+# ── HOT-PATH METRICS ──────────────────────────────────────────────────────────
+
+http_seconds   = histogram("contest_http_request_seconds", "Request handling time by route, method and status.",
+                           ("route", "method", "status"))
+db_acquire     = histogram("contest_db_acquire_seconds", "Time to get a pooled SQLite connection.")
+db_statement   = histogram("contest_db_statement_seconds",
+                           "SQLite statement time by leading keyword; BEGIN and writes include lock waits.",
+                           ("statement",))
+judge_seconds  = histogram("contest_judge_call_seconds", "Judge backend call time (cache hits excluded).",
+                           ("backend", "call"))
+judge_results  = counter("contest_judge_results_total", "Test case executions by judge status and source.",
+                         ("status", "source"))
+judge_errors   = counter("contest_judge_errors_total",
+                         "Executions the judge could not complete (internal, unavailable, exception).",
+                         ("reason",))
+submissions    = counter("contest_submissions_total", "Judged submissions by verdict.", ("verdict",))
+
+
+def instrument(app):
+    """
+    Time every request the app serves, labelled by its URL rule. Wraps
+    full_dispatch_request rather than adding before/after_request hooks: one
+    call per request, and the time includes the app's own hooks.
+    """
+    if not METRICS_ENABLED:
+        return
+    dispatch = app.full_dispatch_request
+
+    def timed_dispatch():
+        start  = time.perf_counter()
+        status = "500"
+        try:
+            response = dispatch()
+            status   = str(response.status_code)
+            return response
+        finally:
+            req  = request._get_current_object()
+            rule = req.url_rule
+            http_seconds.observe(time.perf_counter() - start,
+                                 rule.rule if rule is not None else "unmatched", req.method, status)
+
+    app.full_dispatch_request = timed_dispatch
@@ -1,31 +1,88 @@
+import gzip
+import hashlib
 import json
 import os
+import threading
+import time
+from collections import namedtuple
+from core.config import PROBLEMS_FILE, PROBLEMS_RELOAD_INTERVAL
+from core.testdata import MANIFEST, load_cases
 
-_PROBLEMS = None
+# One immutable snapshot of the problem file. A reload builds a new one and
+# swaps the reference, so a request never sees half of an old set and half
+# of a new one. Hidden test cases kept in files (core/testdata.py) are
+# appended from their manifests; rewriting a manifest reloads the set too.
+ProblemSet = namedtuple("ProblemSet", ["problems", "by_id", "safe", "payload", "payload_gzip", "etag", "stamp"])
+
+_SET              = None
+_RELOAD_LISTENERS = []
+_reload_lock      = threading.Lock()
+_checked_at       = 0.0
+
+
+def on_reload(fn):
+    """Register ``fn(changed_ids)``, called when a reload changes problems."""
+    _RELOAD_LISTENERS.append(fn)
+    return fn
 
 
 def load_problems():
-    global _PROBLEMS
-    with open(os.path.join("data", "problems_fake.json")) as f:
-        _PROBLEMS = json.load(f)
+    """(Re)read the problem file and swap in the new set."""
+    global _SET
+    with _reload_lock:
+        stamp = _file_stamp(PROBLEMS_FILE)
+        with open(PROBLEMS_FILE) as f:
+            problems = json.load(f)
+        problems, manifests = _with_test_files(problems)
+        previous, _SET = _SET, _build(problems, (stamp, manifests))
+    if previous is not None:
+        old     = previous.by_id
+        new     = _SET.by_id
+        changed = {pid for pid in old.keys() | new.keys() if old.get(pid) != new.get(pid)}
+        if changed:
+            for fn in _RELOAD_LISTENERS:
+                fn(changed)
 
 
-def get_all_problems():
-    if _PROBLEMS is None:
+def problem_set():
+    """
+    The current snapshot, reloaded first if the file changed on disk.
+
+    The file is stat()ed at most every PROBLEMS_RELOAD_INTERVAL seconds. A
+    file that fails to parse (e.g. caught mid-edit) leaves the previous set
+    in place until the next successful read.
+    """
+    global _checked_at
+    current = _SET
+    if current is None:
         load_problems()
-    return _PROBLEMS
+        return _SET
+    now = time.monotonic()
+    if now - _checked_at >= PROBLEMS_RELOAD_INTERVAL:
+        _checked_at = now
+        if _stamp(current) != current.stamp:
+            try:
+                load_problems()
+            except (OSError, ValueError):
+                pass
+    return _SET
+
+
+def get_all_problems():
+    return problem_set().problems
 
 
 def get_problem(pid):
-    for p in get_all_problems():
-        if p["id"] == pid:
-            return p
-    return None
+    return problem_set().by_id.get(pid)
 
 
 def get_safe_problems():
-    """Strip hidden_main and hidden_test_cases before sending to client."""
-    return [
+    """Problems with hidden_main and hidden_test_cases stripped, as sent to the client."""
+    return problem_set().safe
+
+
+def _build(problems, stamp):
+    safe = [
         {
             "id":                p["id"],
             "title":             p["title"],
@@ -37,5 +94,47 @@ def get_safe_problems():
             "visible_test_cases": p["visible_test_cases"],
             "boilerplate":       p["boilerplate"],
         }
-        for p in get_all_problems()
-    ]
\ No newline at end of file
+        for p in problems
+    ]
+    payload = json.dumps(safe, separators=(",", ":")).encode("utf-8")
+    return ProblemSet(
+        problems     = problems,
+        by_id        = {p["id"]: p for p in problems},
+        safe         = safe,
+        payload      = payload,
+        payload_gzip = gzip.compress(payload, compresslevel=9, mtime=0),
+        etag         = hashlib.sha256(payload).hexdigest()[:32],
+        stamp        = stamp,
+    )
+
+
+def _with_test_files(problems):
+    """
+    Problems with the cases of their ``hidden_test_dir`` appended to the
+    hidden test cases, and the (path, stamp) of each manifest read.
+    """
+    base      = os.path.dirname(PROBLEMS_FILE)
+    manifests = []
+    expanded  = []
+    for p in problems:
+        if p.get("hidden_test_dir"):
+            directory = os.path.join(base, p["hidden_test_dir"])
+            manifest  = os.path.join(directory, MANIFEST)
+            manifests.append((manifest, _file_stamp(manifest)))
+            p = dict(p, hidden_test_cases=p.get("hidden_test_cases", []) + load_cases(directory))
+        expanded.append(p)
+    return expanded, tuple(manifests)
+
+
+def _stamp(current):
+    """What ``current.stamp`` would be if the files were read now."""
+    manifests = current.stamp[1]
+    return _file_stamp(PROBLEMS_FILE), tuple((path, _file_stamp(path)) for path, _ in manifests)
+
+
+def _file_stamp(path):
+    try:
+        st = os.stat(path)
+        return st.st_ino, st.st_mtime_ns, st.st_size
+    except OSError:
+        return None
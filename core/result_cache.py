@@ -0,0 +1,92 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from core.config import RESULT_CACHE_TTL_SECONDS, RESULT_CACHE_MAX_MB
+from core.testdata import TestFile
+
+
+def result_key(language, full_code, stdin):
+    """``stdin`` may be a TestFile, keyed by its checksum rather than read."""
+    h = hashlib.sha256()
+    for part in (language, full_code):
+        h.update(part.encode("utf-8"))
+        h.update(b"\0")
+    if isinstance(stdin, TestFile):
+        h.update(b"\1file:" + stdin.sha256.encode("ascii"))
+    else:
+        h.update((stdin or "").encode("utf-8"))
+    h.update(b"\0")
+    return h.hexdigest()
+
+
+class ResultCache:
+    """
+    In-memory LRU of judge results keyed by (language, full_code, stdin).
+
+    Entries expire after ``ttl`` seconds and the cache evicts least recently
+    used entries once the stored output exceeds ``max_bytes``. Each entry is
+    tagged (with its problem id) so a problem reload can drop just its results.
+    """
+
+    def __init__(self, ttl, max_bytes):
+        self.ttl       = ttl
+        self.max_bytes = max_bytes
+        self.hits      = 0
+        self.misses    = 0
+        self.bytes     = 0
+        self._entries  = OrderedDict()     # key -> (expires_at, size, tag, value)
+        self._tags     = {}                # tag -> set of keys
+        self._lock     = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    self._drop(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return dict(entry[3])
+
+    def put(self, key, tag, value):
+        size = sum(len(v) for v in value.values() if isinstance(v, str)) + 256
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (time.monotonic() + self.ttl, size, tag, dict(value))
+            self._tags.setdefault(tag, set()).add(key)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+
+    def invalidate(self, tag):
+        with self._lock:
+            for key in list(self._tags.get(tag, ())):
+                self._drop(key)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits":      self.hits,
+                "misses":    self.misses,
+                "entries":   len(self._entries),
+                "bytes":     self.bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+    def _drop(self, key):
+        _, size, tag, _ = self._entries.pop(key)
+        self.bytes -= size
+        keys = self._tags.get(tag)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._tags[tag]
+
+
+result_cache = ResultCache(RESULT_CACHE_TTL_SECONDS, RESULT_CACHE_MAX_MB * 1024 * 1024)
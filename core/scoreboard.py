@@ -0,0 +1,94 @@
+# The leaderboard, read from the materialized ``scoreboard`` table. Triggers
+# installed by migration 3 keep it and its version counter in step with
+# ``solved`` and ``submissions`` inside the writer's own transaction, so a
+# read is one ordered scan of idx_scoreboard_rank. FROM_SCRATCH is the
+# original aggregate query; check() compares the two and rebuild()
+# recomputes the table from it.
+
+# Ties on (solved_count, total_time) fall back to participant id, which is
+# the order the aggregate query returned them in.
+RANKED = """
+    SELECT p.name, p.college, p.system_number,
+           sb.solved_count, sb.total_time, sb.total_wrong
+      FROM scoreboard sb
+      JOIN participants p ON p.id = sb.participant_id
+     ORDER BY sb.solved_count DESC, sb.total_time ASC, sb.participant_id ASC
+"""
+
+FROM_SCRATCH = """
+    SELECT
+        p.id AS participant_id,
+        (SELECT COUNT(*)
+           FROM solved s
+          WHERE s.participant_id = p.id)               AS solved_count,
+        (SELECT COALESCE(SUM(sub.time_taken_seconds), 0)
+           FROM submissions sub
+          WHERE sub.participant_id = p.id)             AS total_time,
+        (SELECT COALESCE(SUM(sub.wrong_attempts), 0)
+           FROM submissions sub
+          WHERE sub.participant_id = p.id)             AS total_wrong
+    FROM participants p
+    ORDER BY solved_count DESC, total_time ASC, p.id ASC
+"""
+
+COLUMNS = ("participant_id", "solved_count", "total_time", "total_wrong")
+
+
+def version(conn):
+    row = conn.execute("SELECT value FROM counters WHERE name='scoreboard'").fetchone()
+    return row["value"] if row else 0
+
+
+def read(conn):
+    """Return (version, ranked rows) from one consistent snapshot."""
+    conn.execute("BEGIN")
+    try:
+        return version(conn), [dict(r) for r in conn.execute(RANKED)]
+    finally:
+        conn.commit()
+
+
+def check(conn):
+    """
+    Compare the materialized board with a from-scratch aggregate.
+
+    Returns a list of human-readable differences (empty when consistent),
+    covering both the per-participant totals and the ranking order.
+    """
+    conn.execute("BEGIN")
+    try:
+        expected = [tuple(r[c] for c in COLUMNS) for r in conn.execute(FROM_SCRATCH)]
+        actual   = [tuple(r[c] for c in COLUMNS) for r in conn.execute(
+            "SELECT participant_id, solved_count, total_time, total_wrong FROM scoreboard "
+            "ORDER BY solved_count DESC, total_time ASC, participant_id ASC")]
+    finally:
+        conn.commit()
+
+    problems = []
+    want, have = {r[0]: r for r in expected}, {r[0]: r for r in actual}
+    for pid in sorted(want.keys() | have.keys()):
+        if pid not in have:
+            problems.append(f"participant {pid}: missing from scoreboard")
+        elif pid not in want:
+            problems.append(f"participant {pid}: on scoreboard but not a participant")
+        elif want[pid] != have[pid]:
+            problems.append(f"participant {pid}: scoreboard {have[pid][1:]} != computed {want[pid][1:]}")
+    if not problems and expected != actual:
+        problems.append("ranking order differs from the computed leaderboard")
+    return problems
+
+
+def rebuild(conn):
+    """Recompute every row from solved/submissions and bump the version."""
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.execute("DELETE FROM scoreboard")
+        conn.execute(
+            "INSERT INTO scoreboard (participant_id, solved_count, total_time, total_wrong) "
+            f"SELECT participant_id, solved_count, total_time, total_wrong FROM ({FROM_SCRATCH})"
+        )
+        conn.execute("UPDATE counters SET value = value + 1 WHERE name = 'scoreboard'")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
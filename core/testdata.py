@@ -0,0 +1,204 @@
+import codecs
+import hashlib
+import json
+import mmap
+import os
+from contextlib import contextmanager
+
+# External test data. A problem may keep hidden test cases in files instead
+# of inline in the problem file: "hidden_test_dir" names a directory
+# (relative to the problem file) holding a manifest.json and the files it
+# lists. Loading a problem only stats the files; their contents are mapped
+# from the page cache when a judge call or a comparison needs them, so
+# worker processes share one copy and hold none between submits.
+#
+# manifest.json:
+#   {"cases": [{"name": "max-n", "input": "max-n.in", "expected": "max-n.out",
+#               "input_bytes": 78123, "input_sha256": "...",
+#               "expected_bytes": 14, "expected_sha256": "...", "weight": 4}]}
+
+MANIFEST      = "manifest.json"
+PREVIEW_CHARS = 200
+
+
+class TestDataError(ValueError):
+    """A manifest that does not match the files on disk."""
+
+
+class TestFile:
+    """
+    A test input or expected output on disk. Stands in for the string in a
+    test case: len() is its size in bytes, and equality (for reload change
+    detection) and the result cache key use the manifest's checksum.
+    """
+
+    __slots__ = ("path", "size", "sha256")
+
+    def __init__(self, path, size, sha256):
+        self.path   = path
+        self.size   = size
+        self.sha256 = sha256
+
+    def __len__(self):
+        return self.size
+
+    def __eq__(self, other):
+        return isinstance(other, TestFile) and (self.path, self.size, self.sha256) == \
+            (other.path, other.size, other.sha256)
+
+    def __hash__(self):
+        return hash((self.path, self.sha256))
+
+    def __repr__(self):
+        return f"TestFile({self.path!r}, {self.size} bytes)"
+
+    def open(self):
+        """The file for reading, e.g. as a program's stdin."""
+        return open(self.path, "rb")
+
+    def data(self):
+        """The contents as bytes (one copy; prefer open() or lines() where a stream will do)."""
+        with self.open() as f:
+            return f.read()
+
+    def text(self):
+        return self.data().decode("utf-8")
+
+    @contextmanager
+    def mapping(self):
+        """The contents as a read-only buffer mapped from the page cache (b"" when empty)."""
+        if self.size == 0:
+            yield b""
+            return
+        with self.open() as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+            yield m
+
+    def lines(self):
+        """Yield the lines (without newlines), decoded one at a time from the mapping."""
+        with self.mapping() as m:
+            start, end = 0, len(m)
+            while start < end:
+                stop = m.find(b"\n", start)
+                if stop < 0:
+                    stop = end
+                yield m[start:stop].decode("utf-8")
+                start = stop + 1
+
+    def preview(self, chars=PREVIEW_CHARS):
+        """The start of the file, for showing in place of the whole."""
+        with self.open() as f:
+            raw = f.read(chars * 4)
+        text = raw.decode("utf-8", errors="ignore")
+        if len(raw) == self.size and len(text) <= chars:
+            return text.rstrip("\n")
+        return f"{text[:chars]}… ({self.size} bytes)"
+
+
+def shown(value, chars=PREVIEW_CHARS):
+    """A test case value fit for a progress message: a TestFile's preview, a string as is."""
+    return value.preview(chars) if isinstance(value, TestFile) else value
+
+
+def load_cases(directory):
+    """
+    The test cases of ``directory``'s manifest as test case dicts whose
+    input and expected are TestFiles. Checks that every file exists with the
+    listed size; checksums are left to verify() (tools/check_testdata.py).
+    """
+    path = os.path.join(directory, MANIFEST)
+    with open(path) as f:
+        manifest = json.load(f)
+    cases = []
+    for n, case in enumerate(manifest.get("cases", [])):
+        tc = {"name": case.get("name", str(n + 1))}
+        for key in ("input", "expected"):
+            missing = [k for k in (key, f"{key}_bytes", f"{key}_sha256") if k not in case]
+            if missing:
+                raise TestDataError(f"{path}: case {tc['name']!r} has no {missing[0]!r}")
+            file_path = os.path.join(directory, case[key])
+            size      = os.stat(file_path).st_size
+            if size != case[f"{key}_bytes"]:
+                raise TestDataError(f"{file_path}: {size} bytes, manifest says {case[f'{key}_bytes']}")
+            tc[key] = TestFile(file_path, size, case[f"{key}_sha256"])
+        if "weight" in case:
+            tc["weight"] = case["weight"]
+        cases.append(tc)
+    return cases
+
+
+def verify(directory):
+    """Check every file of ``directory``'s manifest against it; returns a list of problems found."""
+    try:
+        cases = load_cases(directory)
+    except (OSError, ValueError) as e:
+        return [f"{directory}: {type(e).__name__}: {e}"]
+    problems, names = [], set()
+    for tc in cases:
+        if tc["name"] in names:
+            problems.append(f"{directory}: duplicate case name {tc['name']!r}")
+        names.add(tc["name"])
+        for key in ("input", "expected"):
+            f = tc[key]
+            digest, valid = file_digest(f.path)
+            if digest != f.sha256:
+                problems.append(f"{f.path}: sha256 {digest}, manifest says {f.sha256}")
+            if not valid:
+                problems.append(f"{f.path}: not valid UTF-8")
+        if not any(line.strip().startswith("RESULT:") for line in _lines_or_empty(tc["expected"])):
+            problems.append(f"{tc['expected'].path}: no RESULT: line to compare against")
+    return problems
+
+
+def write_manifest(directory):
+    """
+    (Re)write ``directory``'s manifest from its ``<name>.in``/``<name>.out``
+    pairs, keeping the weights of cases already listed. Returns the cases.
+    """
+    weights = {}
+    try:
+        with open(os.path.join(directory, MANIFEST)) as f:
+            weights = {c["name"]: c["weight"] for c in json.load(f).get("cases", []) if "weight" in c}
+    except FileNotFoundError:
+        pass
+    cases = []
+    for name in sorted(n[:-3] for n in os.listdir(directory) if n.endswith(".in")):
+        case = {"name": name, "input": f"{name}.in", "expected": f"{name}.out"}
+        for key, suffix in (("input", ".in"), ("expected", ".out")):
+            path = os.path.join(directory, name + suffix)
+            case[f"{key}_bytes"]  = os.stat(path).st_size
+            case[f"{key}_sha256"] = file_digest(path)[0]
+        if name in weights:
+            case["weight"] = weights[name]
+        cases.append(case)
+    with open(os.path.join(directory, MANIFEST + ".tmp"), "w") as f:
+        json.dump({"cases": cases}, f, indent=2)
+        f.write("\n")
+    os.replace(os.path.join(directory, MANIFEST + ".tmp"), os.path.join(directory, MANIFEST))
+    return cases
+
+
+def file_digest(path, block=1 << 20):
+    """(sha256 hex digest, whether the file is valid UTF-8), reading ``block`` bytes at a time."""
+    h, valid = hashlib.sha256(), True
+    decoder  = codecs.getincrementaldecoder("utf-8")()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(block), b""):
+            h.update(chunk)
+            if valid:
+                try:
+                    decoder.decode(chunk)
+                except UnicodeDecodeError:
+                    valid = False
+    if valid:
+        try:
+            decoder.decode(b"", final=True)
+        except UnicodeDecodeError:
+            valid = False
+    return h.hexdigest(), valid
+
+
+def _lines_or_empty(f):
+    try:
+        yield from f.lines()
+    except UnicodeDecodeError:
+        return
@@ -0,0 +1,46 @@
+"""
+Production server settings.
+
+    gunicorn -c gunicorn.conf.py app:app
+
+Runs one gevent worker process per CPU core (WEB_CONCURRENCY overrides).
+The app is preloaded, so create_app() migrates the database and loads the
+problems once, in the master, before the workers are forked. Shared state
+lives in SQLite (contest config, events, jobs, scoreboard); everything else
+is a per-process cache that re-checks the database or files as documented in
+the README.
+"""
+import gc
+import os
+
+bind               = os.getenv("BIND", "0.0.0.0:5000")
+workers            = int(os.getenv("WEB_CONCURRENCY", os.cpu_count() or 1))
+worker_class       = os.getenv("WORKER_CLASS", "gevent")
+worker_connections = int(os.getenv("WORKER_CONNECTIONS", 1000))
+preload_app        = True
+timeout            = 60
+graceful_timeout   = 30
+keepalive          = 5
+accesslog          = os.getenv("ACCESS_LOG") or None
+
+if worker_class == "gevent":
+    # Patch before the app is preloaded, so the locks and queues its modules
+    # create at import are cooperative once the workers fork.
+    from gevent import monkey
+    monkey.patch_all()
+
+
+def when_ready(server):
+    # Move everything the master has loaded (code, problem set) out of the
+    # collector's reach, so collections in the workers do not write to, and
+    # thereby un-share, those copy-on-write pages.
+    gc.freeze()
+
+
+def worker_exit(server, worker):
+    from core.autosave import autosave_buffer
+    from core.jobs import judge_queue
+    from routes.rejudge import stop_running
+    autosave_buffer.flush()
+    judge_queue.abandon()
+    stop_running()
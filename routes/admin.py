@@ -1,7 +1,18 @@
-from flask import Blueprint, request, jsonify, render_template, session, redirect, url_for
+import hmac
+from flask import Blueprint, Response, request, jsonify, render_template, session, redirect, url_for
 from datetime import datetime, timezone
-from core.database import get_db, get_config, set_config
-from core.config import ADMIN_PASSWORD
+from core.database import get_db, get_config, set_config, mark_ended
+from core.config import ADMIN_PASSWORD, METRICS_TOKEN
+from core import metrics, scoreboard
+from core.export import Export, ExportError
+from core.artifacts import artifact_cache
+from core.autosave import autosave_buffer
+from core.events import event_bus
+from core.jobs import judge_queue
+from core.problems import get_all_problems
+from core.result_cache import result_cache
+from routes import rejudge
+from routes.judge import get_executor
 
 admin_bp = Blueprint("admin", __name__)
 
@@ -44,6 +55,7 @@ def start_contest():
     now = _now()
     set_config("start_time", now)
     set_config("contest_active", "1")
+    event_bus.publish("contest", {"active": True, "start_time": now})
     return jsonify({"success": True, "start_time": now})
 
 
@@ -52,6 +64,7 @@ def stop_contest():
     if not session.get("admin"):
         return jsonify({"error": "Unauthorized"}), 401
     set_config("contest_active", "0")
+    event_bus.publish("contest", {"active": False, "start_time": get_config("start_time")})
     return jsonify({"success": True})
 
 
@@ -60,28 +73,80 @@ def end_participant():
     if not session.get("admin"):
         return jsonify({"error": "Unauthorized"}), 401
     participant_id = int(request.json.get("participant_id", 0))
-    with get_db() as conn:
-        conn.execute(
-            "UPDATE participants SET submitted=1, submit_time=? WHERE id=?",
-            (_now(), participant_id),
-        )
-        conn.commit()
+    autosave_buffer.flush(participant_id)
+    mark_ended(participant_id, _now())
+    event_bus.publish("force_end", {}, participant_id=participant_id)
     return jsonify({"success": True})
 
 
 # ── DATA ENDPOINTS ────────────────────────────────────────────────────────────
 
+PARTICIPANT_FIELDS = {
+    "id":            "p.id",
+    "name":          "p.name",
+    "college":       "p.college",
+    "system_number": "p.system_number",
+    "phone":         "p.phone",
+    "login_time":    "p.login_time",
+    "submitted":     "p.submitted",
+    "submit_time":   "p.submit_time",
+    "solved_count":  "COALESCE(sb.solved_count, 0)",
+    "change_seq":    "p.change_seq",
+}
+PARTICIPANTS_PAGE_MAX = 1000
+
+
 @admin_bp.route("/api/admin/participants")
 def admin_participants():
+    """
+    Participants changed since the ``since`` cursor (0 or absent: all of them),
+    in change order. Returns ``{"cursor", "participants", "has_more",
+    "reset"}``; pass ``cursor`` back as ``since`` to get the next page or the
+    next delta. ``reset`` means the cursor was unknown and this is a full
+    listing, so the client should drop what it has.
+    ``limit`` caps the page size and ``fields`` (comma-separated) picks
+    columns; ``id`` is always included.
+    """
     if not session.get("admin"):
         return jsonify({"error": "Unauthorized"}), 401
-    with get_db() as conn:
-        rows = conn.execute("""
-            SELECT p.*,
-            (SELECT COUNT(*) FROM solved s WHERE s.participant_id = p.id) as solved_count
-            FROM participants p ORDER BY p.id
-        """).fetchall()
-    return jsonify([dict(r) for r in rows])
+    try:
+        since = int(request.args.get("since", 0))
+        limit = min(int(request.args.get("limit", PARTICIPANTS_PAGE_MAX)), PARTICIPANTS_PAGE_MAX)
+    except ValueError:
+        return jsonify({"error": "since and limit must be integers"}), 400
+    fields = [f for f in request.args.get("fields", "").split(",") if f] or list(PARTICIPANT_FIELDS)
+    if any(f not in PARTICIPANT_FIELDS for f in fields):
+        return jsonify({"error": f"fields must be among {', '.join(PARTICIPANT_FIELDS)}"}), 400
+    if "id" not in fields:
+        fields.insert(0, "id")
+    columns = ", ".join(f"{PARTICIPANT_FIELDS[f]} AS {f}" for f in fields)
+
+    conn = get_db()
+    conn.execute("BEGIN")          # cursor and rows from one snapshot
+    try:
+        latest = conn.execute("SELECT value FROM counters WHERE name='participants'").fetchone()["value"]
+        reset  = since > latest    # cursor from an older database: start over
+        if reset:
+            since = 0
+        rows   = conn.execute(f"""
+            SELECT {columns}, p.change_seq AS _seq
+              FROM participants p
+              LEFT JOIN scoreboard sb ON sb.participant_id = p.id
+             WHERE p.change_seq > ?
+             ORDER BY p.change_seq
+             LIMIT ?
+        """, (since, limit + 1)).fetchall()
+    finally:
+        conn.commit()
+
+    has_more = len(rows) > limit
+    rows     = rows[:limit]
+    return jsonify({
+        "cursor":       rows[-1]["_seq"] if has_more else latest,
+        "participants": [{f: r[f] for f in fields} for r in rows],
+        "has_more":     has_more,
+        "reset":        reset,
+    })
 
 
 @admin_bp.route("/api/admin/participant_detail/<int:participant_id>")
@@ -106,20 +171,169 @@ def admin_participant_detail(participant_id):
 def leaderboard():
     if not session.get("admin"):
         return jsonify({"error": "Unauthorized"}), 401
-    with get_db() as conn:
-        rows = conn.execute("""
-            SELECT
-                p.name, p.college, p.system_number,
-                (SELECT COUNT(*)
-                   FROM solved s
-                  WHERE s.participant_id = p.id)               AS solved_count,
-                (SELECT COALESCE(SUM(sub.time_taken_seconds), 0)
-                   FROM submissions sub
-                  WHERE sub.participant_id = p.id)             AS total_time,
-                (SELECT COALESCE(SUM(sub.wrong_attempts), 0)
-                   FROM submissions sub
-                  WHERE sub.participant_id = p.id)             AS total_wrong
-            FROM participants p
-            ORDER BY solved_count DESC, total_time ASC
-        """).fetchall()
-    return jsonify([dict(r) for r in rows])
\ No newline at end of file
+    conn = get_db()
+    etag = str(scoreboard.version(conn))
+    if request.if_none_match.contains(etag):
+        return _not_modified(etag)
+    version, rows = scoreboard.read(conn)
+    resp = jsonify(rows)
+    resp.set_etag(str(version))
+    resp.headers["Cache-Control"] = "no-cache"
+    return resp
+
+
+def _not_modified(etag):
+    resp = Response(status=304)
+    resp.set_etag(etag)
+    resp.headers["Cache-Control"] = "no-cache"
+    return resp
+
+
+@admin_bp.route("/api/admin/judge_stats")
+def judge_stats():
+    if not session.get("admin"):
+        return jsonify({"error": "Unauthorized"}), 401
+    executor = get_executor()
+    return jsonify({
+        "backend":        dict(executor.stats(), name=executor.name),
+        "queue_depth":    judge_queue.depth(),
+        "scheduler":      judge_queue.stats(),
+        "artifact_cache": artifact_cache.stats(),
+        "result_cache":   result_cache.stats(),
+    })
+
+
+# ── EXPORT ────────────────────────────────────────────────────────────────────
+
+@admin_bp.route("/api/admin/export")
+def export_contest():
+    """
+    Stream participants, code and standings from one snapshot as a download:
+    ``format`` ndjson (default) or csv, ``tables`` (comma-separated, default
+    all; one for unzipped CSV), ``zip=1`` for one file per table. Drafts
+    buffered by other workers reach the database within
+    AUTOSAVE_FLUSH_INTERVAL; this worker's are flushed first.
+    """
+    if not session.get("admin"):
+        return jsonify({"error": "Unauthorized"}), 401
+    tables = [t for t in request.args.get("tables", "").split(",") if t]
+    autosave_buffer.flush()
+    try:
+        export = Export(tables, request.args.get("format", "ndjson"), request.args.get("zip") == "1")
+    except ExportError as e:
+        return jsonify({"error": str(e)}), 400
+    return Response(export, mimetype=export.mimetype, headers={
+        "Content-Disposition": f'attachment; filename="{export.filename}"',
+        "Cache-Control":       "no-store",
+        "X-Accel-Buffering":   "no",
+    })
+
+
+# ── REJUDGE ───────────────────────────────────────────────────────────────────
+
+@admin_bp.route("/api/admin/problems")
+def admin_problems():
+    """Id and title of every problem, for choosing what to rejudge."""
+    if not session.get("admin"):
+        return jsonify({"error": "Unauthorized"}), 401
+    return jsonify([{"id": p["id"], "title": p.get("title", f"Problem {p['id']}")} for p in get_all_problems()])
+
+
+@admin_bp.route("/api/admin/rejudge", methods=["GET"])
+def rejudge_status():
+    """Progress of the latest rejudge (or of ``?id=``); null before the first one."""
+    if not session.get("admin"):
+        return jsonify({"error": "Unauthorized"}), 401
+    return jsonify(rejudge.status(request.args.get("id", type=int)))
+
+
+@admin_bp.route("/api/admin/rejudge", methods=["POST"])
+def start_rejudge():
+    """
+    Rejudge ``problem_ids`` (empty or absent: every problem) against the
+    problem file as it is now, or continue run ``resume``. Answers 202 with
+    the run's progress; poll GET /api/admin/rejudge for the rest.
+    """
+    if not session.get("admin"):
+        return jsonify({"error": "Unauthorized"}), 401
+    data = request.json or {}
+    try:
+        if data.get("resume"):
+            run = rejudge.resume(int(data["resume"]))
+        else:
+            run = rejudge.start([int(pid) for pid in data.get("problem_ids") or []])
+    except (TypeError, ValueError):
+        return jsonify({"error": "problem_ids must be a list of problem ids"}), 400
+    except rejudge.RejudgeError as e:
+        return jsonify({"error": str(e)}), e.status
+    return jsonify(rejudge.status(run.id)), 202
+
+
+# ── METRICS ───────────────────────────────────────────────────────────────────
+
+metrics.collect("contest_judge_queue_depth", "Judge jobs waiting, by kind.", "gauge", ("kind",),
+                lambda: {(k,): v for k, v in judge_queue.stats()["queued"].items()})
+metrics.collect("contest_judge_running", "Judge jobs being judged.", "gauge", (),
+                lambda: {(): judge_queue.stats()["running"]})
+metrics.collect("contest_judge_throttled_total", "Judge jobs refused by the per-participant limits.", "counter",
+                ("kind",), lambda: {(k,): v for k, v in judge_queue.stats()["throttled"].items()})
+metrics.collect("contest_judge_rejected_total", "Judge jobs refused because the queue was full.", "counter", (),
+                lambda: {(): judge_queue.stats()["rejected"]})
+metrics.collect("contest_cache_hits_total", "Cache hits by cache.", "counter", ("cache",),
+                lambda: {("result",): result_cache.stats()["hits"], ("artifact",): artifact_cache.stats()["hits"]})
+metrics.collect("contest_cache_misses_total", "Cache misses by cache.", "counter", ("cache",),
+                lambda: {("result",): result_cache.stats()["misses"],
+                         ("artifact",): artifact_cache.stats()["misses"]})
+metrics.collect("contest_autosave_pending", "Drafts buffered and not yet written.", "gauge", (),
+                lambda: {(): autosave_buffer.pending()})
+
+
+@admin_bp.route("/metrics")
+def prometheus_metrics():
+    """This worker's metrics in the Prometheus text format."""
+    bearer = request.headers.get("Authorization", "")
+    if not session.get("admin") and not (METRICS_TOKEN and hmac.compare_digest(bearer, f"Bearer {METRICS_TOKEN}")):
+        return jsonify({"error": "Unauthorized"}), 401
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+
+@admin_bp.route("/api/admin/metrics_summary")
+def metrics_summary():
+    """The /metrics histograms boiled down for the dashboard's Live Metrics panel."""
+    if not session.get("admin"):
+        return jsonify({"error": "Unauthorized"}), 401
+    routes = metrics.http_seconds.summary(by=("route", "method"))
+    errors = {}
+    for (route, method, status), row in metrics.http_seconds.summary().items():
+        if status.startswith("5"):
+            errors[(route, method)] = errors.get((route, method), 0) + row["count"]
+    results = {}
+    for (status, _source), n in metrics.judge_results.values().items():
+        results[status] = results.get(status, 0) + n
+    overall    = metrics.http_seconds.summary(by=()).get((), {})
+    statements = metrics.db_statement.summary()
+    judge      = metrics.judge_seconds.summary(by=())
+    return jsonify({
+        "requests": {
+            "count":  overall.get("count", 0),
+            "errors": sum(errors.values()),
+            "p95_ms": overall.get("p95_ms"),
+        },
+        "routes": sorted(
+            ({"route": route, "method": method, "count": row["count"], "errors": errors.get((route, method), 0),
+              "p50_ms": row["p50_ms"], "p95_ms": row["p95_ms"]}
+             for (route, method), row in routes.items()),
+            key=lambda r: -r["count"])[:12],
+        "db": {
+            "acquire_p95_ms": metrics.db_acquire.summary().get((), {}).get("p95_ms"),
+            "statements":     {verb: {"count": row["count"], "p95_ms": row["p95_ms"]}
+                               for (verb,), row in statements.items()},
+        },
+        "judge": {
+            "calls":   judge.get((), {}).get("count", 0),
+            "p95_ms":  judge.get((), {}).get("p95_ms"),
+            "results": results,
+            "errors":  {reason: n for (reason,), n in metrics.judge_errors.values().items()},
+        },
+        "submissions": {verdict: n for (verdict,), n in metrics.submissions.values().items()},
+    })
@@ -1,11 +1,24 @@
 from flask import Blueprint, request, jsonify, render_template, session, redirect, url_for
-import requests
-from core.config import ADMIN_PASSWORD
+from core.config import (ADMIN_PASSWORD, JAVA_BACKEND_URL, GATEWAY_CONNECT_TIMEOUT,
+                         GATEWAY_READ_TIMEOUT, GATEWAY_POOL_SIZE, GATEWAY_CACHE_TTL,
+                         GATEWAY_STALE_SECONDS, GATEWAY_BREAKER_FAILURES,
+                         GATEWAY_BREAKER_RESET_SECONDS)
+from core.http_client import GatewayClient, UpstreamError
 
 admin_bp = Blueprint("admin", __name__)
 
-# The URL where your Java Spring Boot microservice is running
-JAVA_BACKEND_URL = "http://localhost:8080"
+# One pooled client per process for the Java Spring Boot microservice, so every
+# admin tab shares its connections, cache and circuit breaker.
+java_backend = GatewayClient(
+    "java-backend", JAVA_BACKEND_URL,
+    connect_timeout       = GATEWAY_CONNECT_TIMEOUT,
+    read_timeout          = GATEWAY_READ_TIMEOUT,
+    pool_size             = GATEWAY_POOL_SIZE,
+    cache_ttl             = GATEWAY_CACHE_TTL,
+    stale_seconds         = GATEWAY_STALE_SECONDS,
+    breaker_failures      = GATEWAY_BREAKER_FAILURES,
+    breaker_reset_seconds = GATEWAY_BREAKER_RESET_SECONDS,
+)
 
 
 # ── PAGES (Handled purely by Python) ──────────────────────────────────────────
@@ -26,10 +39,21 @@ def admin_login():
 def leaderboard():
     if not session.get("admin"):
         return jsonify({"error": "Unauthorized"}), 401
-    
-    # Forward the request to the Java backend
+
+    # Forward the request to the Java backend (cached, coalesced, stale on outage)
     try:
-        response = requests.get(f"{JAVA_BACKEND_URL}/api/admin/leaderboard")
-        return jsonify(response.json()), response.status_code
-    except requests.ConnectionError:
+        status, body, source = java_backend.get_json("/api/admin/leaderboard")
+    except UpstreamError:
         return jsonify({"error": "Backend service down"}), 503
+    response = jsonify(body)
+    response.headers["X-Cache"] = source.upper()
+    if source == "stale":
+        response.headers["Warning"] = '110 - "Response is Stale"'
+    return response, status
+
+
+@admin_bp.route("/api/admin/gateway_stats")
+def gateway_stats():
+    if not session.get("admin"):
+        return jsonify({"error": "Unauthorized"}), 401
+    return jsonify([java_backend.stats()])
@@ -0,0 +1,343 @@
+import math
+import os
+import shutil
+import time
+from contextlib import contextmanager
+from itertools import zip_longest
+from core import metrics
+from core.config import (JUDGE_BACKEND, JUDGE_COMPILE_TIMEOUT, JUDGE_COMPILE_MEMORY_MB,
+                         JUDGE_COMPILE_FILE_MB, JUDGE_MAX_PROCESSES)
+from core.problems import on_reload
+from core.result_cache import result_cache, result_key
+from core.testdata import PREVIEW_CHARS, TestFile
+
+# Verdicts use Judge0's status ids whichever backend produced them:
+# 1 In Queue, 2 Processing, 3 Accepted, 4 Wrong Answer, 5 Time Limit Exceeded,
+# 6 Compilation Error, 7-12 Runtime Error, 13 Internal Error,
+# 14 Exec Format Error. STATUS_UNAVAILABLE is this platform's own: the judge
+# could not be reached, so the program was never judged at all.
+STATUS_IN_QUEUE      = 1
+STATUS_PROCESSING    = 2
+STATUS_ACCEPTED      = 3
+STATUS_TIME_LIMIT    = 5
+STATUS_COMPILE_ERROR = 6
+STATUS_SIGSEGV       = 7
+STATUS_SIGXFSZ       = 8
+STATUS_SIGFPE        = 9
+STATUS_SIGABRT       = 10
+STATUS_NZEC          = 11
+STATUS_RUNTIME_OTHER = 12
+STATUS_INTERNAL      = 13
+STATUS_UNAVAILABLE   = 100
+
+STATUS_DESCRIPTIONS = {
+    STATUS_IN_QUEUE:      "In Queue",
+    STATUS_PROCESSING:    "Processing",
+    STATUS_ACCEPTED:      "Accepted",
+    STATUS_TIME_LIMIT:    "Time Limit Exceeded",
+    STATUS_COMPILE_ERROR: "Compilation Error",
+    STATUS_SIGSEGV:       "Runtime Error (SIGSEGV)",
+    STATUS_SIGXFSZ:       "Runtime Error (SIGXFSZ)",
+    STATUS_SIGFPE:        "Runtime Error (SIGFPE)",
+    STATUS_SIGABRT:       "Runtime Error (SIGABRT)",
+    STATUS_NZEC:          "Runtime Error (NZEC)",
+    STATUS_RUNTIME_OTHER: "Runtime Error (Other)",
+    STATUS_INTERNAL:      "Internal Error",
+    STATUS_UNAVAILABLE:   "Judge Unavailable",
+}
+
+# Verdicts that depend only on (program, input) and are safe to memoize.
+# Timeouts, runtime errors and internal errors may not repeat, so they are
+# always re-run.
+CACHEABLE_STATUSES = {STATUS_ACCEPTED, STATUS_COMPILE_ERROR}
+
+# Results that say nothing about the program: the judge never ran it or
+# broke while running it.
+UNJUDGED_STATUSES = {STATUS_INTERNAL, STATUS_UNAVAILABLE}
+
+PREAMBLES = {
+    "python": "",
+    "cpp":    "#include <bits/stdc++.h>\nusing namespace std;\n",
+    "c":      "#include <stdio.h>\n#include <stdlib.h>\n#include <string.h>\n",
+    "java":   "",
+}
+
+
+# ── CODE ASSEMBLY ─────────────────────────────────────────────────────────────
+
+def build_full_code(problem, language, user_code):
+    """Wrap the participant's function with the problem's hidden driver."""
+    hidden_main = problem.get("hidden_main", {}).get(language, "")
+    if language == "java":
+        return "public class Main {\n" + user_code + "\n" + hidden_main + "}\n"
+    return PREAMBLES.get(language, "") + user_code + "\n" + hidden_main
+
+
+# ── BACKENDS ──────────────────────────────────────────────────────────────────
+
+class Executor:
+    """
+    A judge backend. Implementations run an assembled program against inputs
+    and report Judge0-shaped result dicts (stdout, stderr, compile_output,
+    message, status), so grading code does not care which backend ran it.
+    """
+
+    name = ""
+
+    def run_batch(self, full_code, language, items, finish):
+        """
+        Run ``items`` [(index, stdin), ...], calling ``finish(index, out)`` for
+        each. ``stdin`` is a string or a TestFile (core/testdata.py).
+        """
+        raise NotImplementedError
+
+    def stats(self):
+        """Backend-specific health counters for the admin dashboard."""
+        return {}
+
+    def run(self, full_code, language, stdin):
+        outs = {}
+        self.run_batch(full_code, language, [(0, stdin)], outs.__setitem__)
+        return outs[0]
+
+
+_EXECUTORS = {}
+
+
+def get_executor(name=None):
+    """Return the shared executor for ``name``, defaulting to JUDGE_BACKEND."""
+    name = name or JUDGE_BACKEND
+    if name not in _EXECUTORS:
+        if name == "judge0":
+            from routes.judge0 import Judge0Executor
+            _EXECUTORS[name] = Judge0Executor()
+        elif name == "local":
+            from routes.local_judge import LocalExecutor
+            _EXECUTORS[name] = LocalExecutor()
+        else:
+            raise ValueError(f"Unknown JUDGE_BACKEND: {name}")
+    return _EXECUTORS[name]
+
+
+# ── COMPILING ON THIS HOST ────────────────────────────────────────────────────
+
+def compile_command(cmd, java=False):
+    """
+    ``cmd`` wrapped in prlimit(1) with the compile limits, or None when
+    prlimit is not installed. prlimit applies them before the compiler
+    starts, without the preexec_fn that is unsafe in this threaded process.
+    The JVM reserves far more address space than it uses, so javac gets no
+    memory limit.
+    """
+    if shutil.which("prlimit") is None:
+        return None
+    limits = [f"--cpu={math.ceil(JUDGE_COMPILE_TIMEOUT)}", f"--fsize={JUDGE_COMPILE_FILE_MB << 20}",
+              f"--nproc={JUDGE_MAX_PROCESSES}", "--core=0"]
+    if not java:
+        limits.append(f"--as={JUDGE_COMPILE_MEMORY_MB << 20}")
+    return ["prlimit", *limits, "--", *cmd]
+
+
+def bare_env(workdir):
+    """A bare environment for a compiler or program, so none of the server's settings reach it."""
+    return {"PATH": os.environ.get("PATH", "/usr/bin:/bin"), "HOME": workdir, "LANG": "C"}
+
+
+# ── JUDGE CALLS ───────────────────────────────────────────────────────────────
+
+def run_code_on_judge(full_code, language, stdin, cache_tag=None, executor=None):
+    """Run one program against one input and wait for the verdict."""
+    key    = result_key(language, full_code, stdin)
+    cached = result_cache.get(key)
+    if cached is not None:
+        _count(cached, "cache")
+        return cached
+    executor = executor or get_executor()
+    with _timed(executor, "single"):
+        out = executor.run(full_code, language, stdin)
+    _count(out, "judge")
+    _remember(key, cache_tag, out)
+    return out
+
+
+def run_batch_on_judge(full_code, language, inputs, on_result=None, cache_tag=None, executor=None):
+    """
+    Run one program against many inputs in a single backend batch.
+
+    Returns one result dict per input, in input order. ``on_result(index, out)``
+    is called as each verdict arrives so callers can report progress. Inputs
+    whose result is already memoized never reach the backend; ``cache_tag``
+    (the problem id) lets a problem reload invalidate its memoized results.
+    """
+    outs = [None] * len(inputs)
+    keys = [result_key(language, full_code, stdin) for stdin in inputs]
+
+    def finish(i, out):
+        outs[i] = out
+        _count(out, "judge")
+        _remember(keys[i], cache_tag, out)
+        if on_result:
+            on_result(i, out)
+
+    todo = []
+    for i, key in enumerate(keys):
+        cached = result_cache.get(key)
+        if cached is not None:
+            outs[i] = cached
+            _count(cached, "cache")
+            if on_result:
+                on_result(i, cached)
+        else:
+            todo.append((i, inputs[i]))
+    if todo:
+        executor = executor or get_executor()
+        with _timed(executor, "batch"):
+            executor.run_batch(full_code, language, todo, finish)
+    return outs
+
+
+@contextmanager
+def _timed(executor, call):
+    """Time a backend call; a call that raises also counts as a judge error."""
+    t0 = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        metrics.judge_errors.inc("exception")
+        raise
+    finally:
+        metrics.judge_seconds.observe(time.perf_counter() - t0, executor.name, call)
+
+
+def _count(out, source):
+    status = (out.get("status") or {}).get("id")
+    metrics.judge_results.inc(STATUS_DESCRIPTIONS.get(status, str(status)), source)
+    if status == STATUS_INTERNAL:
+        metrics.judge_errors.inc("internal")
+    elif status == STATUS_UNAVAILABLE:
+        metrics.judge_errors.inc("unavailable")
+
+
+def _remember(key, tag, out):
+    if (out.get("status") or {}).get("id") in CACHEABLE_STATUSES:
+        result_cache.put(key, tag, out)
+
+
+@on_reload
+def _invalidate_results(problem_ids):
+    for pid in problem_ids:
+        result_cache.invalidate(pid)
+
+
+# ── RESULTS ───────────────────────────────────────────────────────────────────
+
+def make_result(status_id, stdout=None, stderr=None, compile_output=None, message=None):
+    return {
+        "stdout":         stdout,
+        "stderr":         stderr,
+        "compile_output": compile_output,
+        "message":        message,
+        "status":         {"id": status_id, "description": STATUS_DESCRIPTIONS[status_id]},
+    }
+
+
+def compile_error(output):
+    return make_result(STATUS_COMPILE_ERROR, compile_output=output)
+
+
+def error_result(message):
+    return make_result(STATUS_INTERNAL, message=message)
+
+
+def unavailable_result(message):
+    return make_result(STATUS_UNAVAILABLE, message=message)
+
+
+def is_unjudged(out):
+    """
+    True when ``out`` is no verdict on the program: the judge was unavailable
+    or failed internally, so the attempt must not be held against anyone.
+    """
+    return (out.get("status") or {}).get("id") in UNJUDGED_STATUSES
+
+
+# ── OUTPUT PARSING ────────────────────────────────────────────────────────────
+
+def iter_results(text):
+    """
+    Yield the values printed by the hidden driver as ``RESULT:<value>``, one
+    at a time. ``text`` may be a TestFile, read line by line from a mapping.
+    """
+    for line in text.lines() if isinstance(text, TestFile) else (text or "").splitlines():
+        line = line.strip()
+        if line.startswith("RESULT:"):
+            yield line[len("RESULT:"):].strip()
+
+
+def parse_result(stdout):
+    """Collect the values printed by the hidden driver as ``RESULT:<value>``."""
+    return list(iter_results(stdout))
+
+
+def normalize_expected(expected):
+    return parse_result(expected)
+
+
+def results_match(stdout, expected):
+    """Whether ``stdout`` printed exactly the expected results, compared as both are read."""
+    missing = object()
+    return all(a == b for a, b in zip_longest(iter_results(stdout), iter_results(expected), fillvalue=missing))
+
+
+def best_error(out):
+    """Pick the most useful diagnostic to show when a run produced no result."""
+    for key in ("compile_output", "stderr", "message"):
+        if out.get(key):
+            return out[key].strip()
+    status = out.get("status") or {}
+    if status.get("id") not in (None, STATUS_ACCEPTED):
+        return status.get("description", "")
+    return ""
+
+
+# ── GRADING ───────────────────────────────────────────────────────────────────
+
+def grade(tc, out):
+    """(passed, output to show) for one test case's result; file-backed cases show a preview."""
+    stdout = out.get("stdout") or ""
+    passed = results_match(stdout, tc["expected"])
+    if isinstance(tc["expected"], TestFile):
+        parsed = _preview_results(stdout)
+    else:
+        parsed = "\n".join(parse_result(stdout))
+    return passed, parsed or best_error(out) or "(no output — did your function return a value?)"
+
+
+def _preview_results(stdout):
+    """The start of the printed results, without collecting them all."""
+    got = ""
+    for value in iter_results(stdout):
+        got += ("\n" if got else "") + value
+        if len(got) > PREVIEW_CHARS:
+            return f"{got[:PREVIEW_CHARS]}…"
+    return got
+
+
+def test_waves(problem, all_tcs):
+    """
+    Split test case indices into the batches a submit runs, in order.
+
+    By default everything goes to the judge in one batch. Problems declaring
+    ``"verdict_mode": "first_failure"`` run cheapest first (by the test's
+    ``weight``, then input size) in doubling waves, so a wrong answer stops
+    after the first failing wave instead of paying for every test case.
+    """
+    indices = list(range(len(all_tcs)))
+    if problem.get("verdict_mode") != "first_failure":
+        return [indices]
+    indices.sort(key=lambda i: (all_tcs[i].get("weight", 1), len(all_tcs[i]["input"])))
+    waves, size = [], 1
+    while indices:
+        waves.append(indices[:size])
+        indices, size = indices[size:], size * 2
+    return waves
@@ -0,0 +1,425 @@
+import base64
+import io
+import os
+import random
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+import zipfile
+import requests
+from core.artifacts import artifact_cache, artifact_key
+from core.config import (JUDGE0_URL, LANGUAGE_IDS, JUDGE0_BATCH_SIZE,
+                         JUDGE0_POLL_INTERVAL, JUDGE0_TIMEOUT_SECONDS,
+                         JUDGE0_CONNECT_TIMEOUT, JUDGE0_MAX_CONCURRENCY,
+                         JUDGE0_RETRIES, JUDGE0_RETRY_BASE_SECONDS,
+                         JUDGE0_RETRY_MAX_SECONDS, JUDGE0_BREAKER_FAILURES,
+                         JUDGE0_BREAKER_RESET_SECONDS,
+                         JUDGE_PRECOMPILE_LANGUAGES, JUDGE_COMPILE_TIMEOUT,
+                         JUDGE0_JAVA_PATH, JUDGE_JAVA_RELEASE)
+from core.http_client import CircuitBreaker, LatencyStats, make_session
+from core.testdata import TestFile
+from routes.judge import (Executor, STATUS_IN_QUEUE, STATUS_PROCESSING,
+                          compile_command, bare_env, compile_error,
+                          error_result, unavailable_result)
+
+# Judge0's "Multi-file program" language runs the `run` script shipped in
+# additional_files, which is how precompiled artifacts are executed.
+MULTI_FILE_LANGUAGE_ID = 89
+
+RESULT_FIELDS = "token,stdout,stderr,compile_output,message,status"
+
+# Responses meaning "Judge0 is overloaded or restarting", worth retrying.
+TRANSIENT_STATUSES = {429, 502, 503, 504}
+
+# language -> (source file, local compile command, Judge0 run script)
+COMPILERS = {
+    "c":    ("main.c",    ["gcc", "-O2", "-static", "-o", "main", "main.c", "-lm"],
+             "./main"),
+    "cpp":  ("main.cpp",  ["g++", "-O2", "-static", "-o", "main", "main.cpp"],
+             "./main"),
+    "java": ("Main.java", ["javac", "-proc:none", "--release", JUDGE_JAVA_RELEASE, "Main.java"],
+             f"{JUDGE0_JAVA_PATH} Main"),
+}
+
+# Trivial programs each toolchain must build before participant code is
+# precompiled with it (e.g. -static needs the static C library installed).
+PROBES = {
+    "c":    "int main(void) { return 0; }\n",
+    "cpp":  "int main() { return 0; }\n",
+    "java": "public class Main { public static void main(String[] args) {} }\n",
+}
+
+
+class Judge0Executor(Executor):
+    """Runs programs on a Judge0 server, one /submissions/batch call per chunk."""
+
+    name = "judge0"
+
+    def run(self, full_code, language, stdin):
+        program, failed = _program(full_code, language)
+        if failed:
+            return failed
+        try:
+            r = judge0_client.request("POST", "/submissions?base64_encoded=true&wait=true",
+                                      json=_submission(program, stdin))
+            r.raise_for_status()
+            return _decode(r.json())
+        except JudgeUnavailable as e:
+            return unavailable_result(f"Judge unavailable: {e}")
+        except (requests.RequestException, ValueError) as e:
+            return unavailable_result(f"Judge unavailable: {e}")
+
+    def run_batch(self, full_code, language, items, finish):
+        program, failed = _program(full_code, language)
+        if failed:
+            for i, _ in items:
+                finish(i, dict(failed))
+            return
+        for start in range(0, len(items), JUDGE0_BATCH_SIZE):
+            _run_chunk(program, items[start:start + JUDGE0_BATCH_SIZE], finish)
+
+    def stats(self):
+        return judge0_client.stats()
+
+
+# ── HTTP ──────────────────────────────────────────────────────────────────────
+
+class JudgeUnavailable(Exception):
+    """Judge0 could not be reached or kept refusing work; nothing was judged."""
+
+
+class Judge0Client:
+    """
+    The process-wide connection to Judge0.
+
+    Requests share one keep-alive session and at most ``max_concurrency`` of
+    them are in flight at once, so a burst of submits queues here instead of
+    opening a connection per test case. Connection failures and transient
+    statuses (TRANSIENT_STATUSES) are retried with full-jitter exponential
+    backoff, honouring Retry-After; POSTs are not retried after a read
+    timeout, since Judge0 may already be running them. A call that exhausts
+    its retries counts as one breaker failure and raises JudgeUnavailable;
+    while the breaker is open calls raise it immediately.
+    """
+
+    def __init__(self, base_url, max_concurrency, connect_timeout, read_timeout,
+                 retries, backoff_base, backoff_max, breaker):
+        self.base_url     = base_url.rstrip("/")
+        self.timeout      = (connect_timeout, read_timeout)
+        self.retries      = retries
+        self.backoff_base = backoff_base
+        self.backoff_max  = backoff_max
+        self.breaker      = breaker
+        self.session      = make_session(max_concurrency)
+        self.latency      = LatencyStats()
+        self.retried      = 0
+        self.unavailable  = 0
+        self._slots       = threading.BoundedSemaphore(max_concurrency)
+
+    def request(self, method, path, **kwargs):
+        """Send a request, returning the response for any non-transient status."""
+        if not self.breaker.allow():
+            self.unavailable += 1
+            raise JudgeUnavailable("circuit open after repeated failures")
+        error = None
+        for attempt in range(self.retries + 1):
+            if attempt:
+                self.retried += 1
+                time.sleep(self._backoff(attempt, error))
+            t0 = time.perf_counter()
+            try:
+                with self._slots:
+                    r = self.session.request(method, self.base_url + path, timeout=self.timeout, **kwargs)
+            except requests.ConnectionError as e:
+                error = e
+            except requests.Timeout as e:
+                error = e
+                if method != "GET":
+                    self.latency.record(time.perf_counter() - t0, False)
+                    break
+            else:
+                if r.status_code not in TRANSIENT_STATUSES:
+                    self.latency.record(time.perf_counter() - t0, True)
+                    self.breaker.success()
+                    return r
+                error = r
+            self.latency.record(time.perf_counter() - t0, False)
+        self.breaker.failure()
+        self.unavailable += 1
+        if isinstance(error, requests.Response):
+            raise JudgeUnavailable(f"HTTP {error.status_code} after {self.retries + 1} attempts")
+        raise JudgeUnavailable(type(error).__name__)
+
+    def _backoff(self, attempt, error):
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1)))
+        if isinstance(error, requests.Response):
+            try:
+                delay = max(delay, min(self.backoff_max, float(error.headers.get("Retry-After", 0))))
+            except ValueError:
+                pass
+        return delay
+
+    def stats(self):
+        return {
+            "breaker":       self.breaker.state,
+            "breaker_trips": self.breaker.opened,
+            "retried":       self.retried,
+            "unavailable":   self.unavailable,
+            "latency":       self.latency.snapshot(),
+        }
+
+
+judge0_client = Judge0Client(
+    JUDGE0_URL,
+    max_concurrency = JUDGE0_MAX_CONCURRENCY,
+    connect_timeout = JUDGE0_CONNECT_TIMEOUT,
+    read_timeout    = JUDGE0_TIMEOUT_SECONDS,
+    retries         = JUDGE0_RETRIES,
+    backoff_base    = JUDGE0_RETRY_BASE_SECONDS,
+    backoff_max     = JUDGE0_RETRY_MAX_SECONDS,
+    breaker         = CircuitBreaker(JUDGE0_BREAKER_FAILURES, JUDGE0_BREAKER_RESET_SECONDS),
+)
+
+
+# ── COMPILE ONCE ──────────────────────────────────────────────────────────────
+
+def precompile(language, full_code):
+    """
+    Build a compiled-language program once and reuse it for every test case.
+
+    Returns None when the language is interpreted, disabled or has no
+    working local toolchain, or when the program may read host files while
+    it is compiled (the source is then sent to Judge0 as before); otherwise
+    a dict with ``ok`` and either the zipped artifact or the compiler's
+    messages about the program. All outcomes are cached on disk keyed by
+    (language, full_code).
+    """
+    spec = COMPILERS.get(language)
+    if spec is None or language not in JUDGE_PRECOMPILE_LANGUAGES or not _toolchain_ready(language, spec):
+        return None
+    entry = artifact_cache.get_or_build(artifact_key(f"judge0-{language}", full_code),
+                                        lambda out_dir: _compile(spec, full_code, out_dir))
+    try:
+        with open(os.path.join(entry, "artifact.zip"), "rb") as f:
+            return {"ok": True, "files": base64.b64encode(f.read()).decode("ascii")}
+    except FileNotFoundError:
+        pass
+    try:
+        with open(os.path.join(entry, "compile_output.txt")) as f:
+            return {"ok": False, "compile_output": f.read()}
+    except FileNotFoundError:
+        return None     # judged from source, or evicted between build and read
+
+
+_ready        = {}
+_include_dirs = {}
+
+
+def _toolchain_ready(language, spec):
+    """Whether this host can precompile ``language``: compiler, prlimit and a passing probe build."""
+    if language not in _ready:
+        ready = shutil.which(spec[1][0]) is not None and compile_command(spec[1]) is not None
+        if ready:
+            with tempfile.TemporaryDirectory(prefix="probe-") as out_dir:
+                _compile(spec, PROBES[language], out_dir)
+                ready = os.path.exists(os.path.join(out_dir, "artifact.zip"))
+        _ready[language] = ready
+    return _ready[language]
+
+
+def _compile(spec, full_code, out_dir):
+    """
+    Build into ``out_dir``: artifact.zip, compile_output.txt, or nothing when
+    the program has to be compiled by Judge0 instead.
+
+    The compiler runs on this host, outside Judge0's sandbox, so C and C++
+    are built in steps that check it reads no host files: the preprocessor
+    may only pull in the compiler's own headers, and the generated assembly
+    may hold no inline asm (whose .incbin could embed any file the server
+    can read). Programs failing a check are left to Judge0.
+    """
+    source_name, compile_cmd, run_script = spec
+    with tempfile.TemporaryDirectory(prefix="compile-") as workdir:
+        with open(os.path.join(workdir, source_name), "w") as f:
+            f.write(full_code)
+        try:
+            if source_name.endswith(".java"):
+                ok, output = _run_compiler(compile_cmd, workdir, source_name)
+            else:
+                compiler = compile_cmd[0]
+                if not _reads_only_headers(compiler, source_name, workdir):
+                    return
+                ok, output = _run_compiler([compiler, "-O2", "-S", "-o", "main.s", source_name],
+                                           workdir, source_name)
+                if ok:
+                    with open(os.path.join(workdir, "main.s"), errors="replace") as f:
+                        if any(line.startswith("#APP") for line in f):
+                            return
+                    os.remove(os.path.join(workdir, source_name))
+                    ok, output = _run_compiler([("main.s" if part == source_name else part)
+                                                for part in compile_cmd], workdir, source_name)
+                    os.remove(os.path.join(workdir, "main.s"))
+        except subprocess.TimeoutExpired:
+            ok, output = False, "Compilation timed out"
+        if not ok:
+            with open(os.path.join(out_dir, "compile_output.txt"), "w") as f:
+                f.write(output)
+            return
+
+        buf = io.BytesIO()
+        with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as z:
+            for name in os.listdir(workdir):
+                if name != source_name:
+                    z.write(os.path.join(workdir, name), name)
+            z.writestr("run", f"#!/bin/bash\n{run_script}\n")
+        with open(os.path.join(out_dir, "artifact.zip"), "wb") as f:
+            f.write(buf.getvalue())
+
+
+def _run_compiler(cmd, workdir, source_name):
+    """(ok, diagnostics) of one compiler run under the compile limits."""
+    c = subprocess.run(compile_command(cmd, java=source_name.endswith(".java")), cwd=workdir,
+                       env=bare_env(workdir), capture_output=True, text=True,
+                       timeout=JUDGE_COMPILE_TIMEOUT)
+    return c.returncode == 0, _diagnostics(c.stdout + c.stderr, source_name)
+
+
+def _reads_only_headers(compiler, source_name, workdir):
+    """Whether preprocessing ``source_name`` opens nothing but it and the compiler's include dirs."""
+    c = subprocess.run(compile_command([compiler, "-M", source_name]), cwd=workdir,
+                       env=bare_env(workdir), capture_output=True, text=True,
+                       timeout=JUDGE_COMPILE_TIMEOUT)
+    if c.returncode != 0:
+        return False
+    allowed = _system_include_dirs(compiler, workdir)
+    for path in c.stdout.replace("\\\n", " ").split()[1:]:
+        path = os.path.realpath(os.path.join(workdir, path))
+        if path != os.path.realpath(os.path.join(workdir, source_name)) and \
+                not any(path.startswith(d + os.sep) for d in allowed):
+            return False
+    return True
+
+
+def _system_include_dirs(compiler, workdir):
+    """The directories ``compiler`` searches for <headers>, as it reports them."""
+    if compiler not in _include_dirs:
+        c = subprocess.run([compiler, "-E", "-v", "-x", "c++" if compiler == "g++" else "c", os.devnull],
+                           cwd=workdir, env=bare_env(workdir), capture_output=True, text=True,
+                           timeout=JUDGE_COMPILE_TIMEOUT)
+        lines = c.stderr.splitlines()
+        try:
+            start = lines.index("#include <...> search starts here:") + 1
+            stop  = lines.index("End of search list.", start)
+        except ValueError:
+            start = stop = 0
+        _include_dirs[compiler] = [os.path.realpath(line.strip()) for line in lines[start:stop]]
+    return _include_dirs[compiler]
+
+
+def _diagnostics(output, source_name):
+    """
+    The compiler's messages about the participant's own source file. What it
+    says about any other file is dropped: an ``#include`` of a host file
+    would otherwise show that file's contents to the participant.
+    """
+    kept, keep = [], False
+    for line in output.splitlines():
+        if not line.startswith((" ", "\t")):
+            keep = line.startswith(source_name + ":")
+        if keep:
+            kept.append(line)
+    return "\n".join(kept) or "Compilation failed"
+
+
+def _program(full_code, language):
+    """Return (submission fields shared by every test case, error result)."""
+    language_id = LANGUAGE_IDS.get(language)
+    if language_id is None:
+        return None, error_result(f"Unsupported language: {language}")
+    artifact = precompile(language, full_code)
+    if artifact is None:
+        return {"source_code": _b64encode(full_code), "language_id": language_id}, None
+    if not artifact["ok"]:
+        return None, compile_error(artifact["compile_output"])
+    return {"language_id": MULTI_FILE_LANGUAGE_ID, "additional_files": artifact["files"]}, None
+
+
+# ── BATCH CALLS ───────────────────────────────────────────────────────────────
+
+def _run_chunk(program, items, finish):
+    """Judge ``items`` [(index, stdin), ...] in one batch, reporting via ``finish``."""
+    try:
+        r = judge0_client.request("POST", "/submissions/batch?base64_encoded=true",
+                                  json={"submissions": [_submission(program, stdin) for _, stdin in items]})
+        r.raise_for_status()
+        created = r.json()
+    except JudgeUnavailable as e:
+        for i, _ in items:
+            finish(i, unavailable_result(f"Judge unavailable: {e}"))
+        return
+    except (requests.RequestException, ValueError) as e:
+        for i, _ in items:
+            finish(i, unavailable_result(f"Judge unavailable: {e}"))
+        return
+
+    pending = {}
+    for (i, _), entry in zip(items, created):
+        token = entry.get("token") if isinstance(entry, dict) else None
+        if token:
+            pending[token] = i
+        else:
+            finish(i, unavailable_result(f"Judge unavailable: rejected submission: {entry}"))
+
+    # Programs still pending at the deadline were never judged (Judge0 applies
+    # its own time limit to each run), so they are reported as unavailable.
+    deadline = time.monotonic() + JUDGE0_TIMEOUT_SECONDS
+    error    = "Judge unavailable: timed out waiting for results"
+    while pending and time.monotonic() < deadline:
+        time.sleep(JUDGE0_POLL_INTERVAL)
+        try:
+            r = judge0_client.request(
+                "GET", "/submissions/batch",
+                params={"tokens": ",".join(pending), "base64_encoded": "true", "fields": RESULT_FIELDS},
+            )
+            r.raise_for_status()
+            polled = r.json().get("submissions", [])
+        except (JudgeUnavailable, requests.RequestException, ValueError) as e:
+            error = f"Judge unavailable: {e}"
+            continue
+
+        for sub in polled:
+            if not sub or sub.get("token") not in pending:
+                continue
+            if (sub.get("status") or {}).get("id") in (STATUS_IN_QUEUE, STATUS_PROCESSING):
+                continue
+            finish(pending.pop(sub["token"]), _decode(sub))
+
+    for i in pending.values():
+        finish(i, unavailable_result(error))
+
+
+def _submission(program, stdin):
+    if isinstance(stdin, TestFile):
+        with stdin.mapping() as m:      # encoded from the page cache, not read into a string first
+            return dict(program, stdin=base64.b64encode(m).decode("ascii"))
+    return dict(program, stdin=_b64encode(stdin or ""))
+
+
+def _decode(out):
+    for key in ("stdout", "stderr", "compile_output", "message"):
+        if out.get(key):
+            out[key] = _b64decode(out[key])
+    return out
+
+
+def _b64encode(text):
+    return base64.b64encode(text.encode("utf-8")).decode("ascii")
+
+
+def _b64decode(text):
+    try:
+        return base64.b64decode(text).decode("utf-8", errors="replace")
+    except (ValueError, TypeError):
+        return text
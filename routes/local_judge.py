@@ -0,0 +1,172 @@
+import multiprocessing
+import os
+import resource
+import shutil
+import signal
+import subprocess
+import tempfile
+from contextlib import nullcontext
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from core.artifacts import artifact_cache, artifact_key
+from core.config import (LOCAL_JUDGE_WORKERS, LOCAL_CPU_SECONDS, LOCAL_WALL_SECONDS,
+                         LOCAL_MEMORY_MB, LOCAL_OUTPUT_KB, JUDGE_COMPILE_TIMEOUT,
+                         JUDGE_MAX_PROCESSES)
+from core.testdata import TestFile
+from routes.judge import (Executor, make_result, compile_error, error_result,
+                          compile_command, bare_env,
+                          STATUS_ACCEPTED, STATUS_TIME_LIMIT, STATUS_SIGSEGV,
+                          STATUS_SIGXFSZ, STATUS_SIGFPE, STATUS_SIGABRT,
+                          STATUS_NZEC, STATUS_RUNTIME_OTHER)
+
+# language -> (source file, compile command or None, run command).
+# "{dir}" in the run command is the cached artifact directory.
+TOOLCHAINS = {
+    "python": ("main.py",   None,
+               ["python3", "{dir}/main.py"]),
+    "c":      ("main.c",    ["gcc", "-O2", "-o", "main", "main.c", "-lm"],
+               ["{dir}/main"]),
+    "cpp":    ("main.cpp",  ["g++", "-O2", "-o", "main", "main.cpp"],
+               ["{dir}/main"]),
+    "java":   ("Main.java", ["javac", "Main.java"],
+               ["java", f"-Xmx{LOCAL_MEMORY_MB}m", "-Xss64m", "-XX:+UseSerialGC", "-cp", "{dir}", "Main"]),
+}
+
+SIGNAL_STATUSES = {
+    signal.SIGXCPU: STATUS_TIME_LIMIT,
+    signal.SIGKILL: STATUS_TIME_LIMIT,     # RLIMIT_CPU hard limit
+    signal.SIGSEGV: STATUS_SIGSEGV,
+    signal.SIGXFSZ: STATUS_SIGXFSZ,
+    signal.SIGFPE:  STATUS_SIGFPE,
+    signal.SIGABRT: STATUS_SIGABRT,
+}
+
+
+class LocalExecutor(Executor):
+    """
+    Judge0-free backend that runs programs on this machine.
+
+    Programs are compiled once through the shared artifact cache, then each
+    test case runs in a pool of worker processes forked at startup. Workers
+    are single-threaded, so they can safely apply rlimits in preexec_fn
+    (which is unsafe from the threaded Flask process); each run gets its own
+    temp directory and process group.
+    """
+
+    name = "local"
+
+    def __init__(self, workers=LOCAL_JUDGE_WORKERS):
+        self.workers = workers
+        self.pool    = ProcessPoolExecutor(max_workers=workers,
+                                           mp_context=multiprocessing.get_context("forkserver"))
+        # Start the workers now so the first submission doesn't pay for it.
+        list(self.pool.map(_warm, range(workers)))
+
+    def run_batch(self, full_code, language, items, finish):
+        spec = TOOLCHAINS.get(language)
+        if spec is None:
+            for i, _ in items:
+                finish(i, error_result(f"Unsupported language: {language}"))
+            return
+        tools = [(spec[1] or spec[2])[0]] + (["prlimit"] if spec[1] else [])
+        missing = [tool for tool in tools if shutil.which(tool) is None]
+        if missing:
+            for i, _ in items:
+                finish(i, error_result(f"{missing[0]} is not installed on the judge machine"))
+            return
+
+        entry = artifact_cache.get_or_build(artifact_key(f"local-{language}", full_code),
+                                            lambda out_dir: _build(spec, full_code, out_dir))
+        output_path = os.path.join(entry, "compile_output.txt")
+        if os.path.exists(output_path):
+            with open(output_path) as f:
+                failed = compile_error(f.read())
+            for i, _ in items:
+                finish(i, dict(failed))
+            return
+
+        cmd     = [part.replace("{dir}", os.path.abspath(entry)) for part in spec[2]]
+        limits  = (LOCAL_CPU_SECONDS, None if language == "java" else LOCAL_MEMORY_MB,
+                   LOCAL_OUTPUT_KB, LOCAL_WALL_SECONDS, JUDGE_MAX_PROCESSES)
+        futures = {self.pool.submit(_execute, cmd, stdin or "", limits): i for i, stdin in items}
+        for future in as_completed(futures):
+            try:
+                out = future.result()
+            except Exception as e:
+                out = error_result(f"Local judge error: {e}")
+            finish(futures[future], out)
+
+
+def _build(spec, full_code, out_dir):
+    source_name, compile_cmd, _ = spec
+    with open(os.path.join(out_dir, source_name), "w") as f:
+        f.write(full_code)
+    if not compile_cmd:
+        return
+    try:
+        c = subprocess.run(compile_command(compile_cmd, java=source_name.endswith(".java")), cwd=out_dir,
+                           env=bare_env(out_dir), capture_output=True, text=True,
+                           timeout=JUDGE_COMPILE_TIMEOUT)
+        ok, output = c.returncode == 0, c.stdout + c.stderr
+    except subprocess.TimeoutExpired:
+        ok, output = False, "Compilation timed out"
+    if not ok:
+        with open(os.path.join(out_dir, "compile_output.txt"), "w") as f:
+            f.write(output)
+
+
+# ── WORKER PROCESS ────────────────────────────────────────────────────────────
+
+def _warm(_):
+    return os.getpid()
+
+
+def _execute(cmd, stdin, limits):
+    cpu_seconds, memory_mb, output_kb, wall_seconds, processes = limits
+
+    # The program can leave its process group with setsid(), out of killpg's
+    # reach, so RLIMIT_NPROC is what stops a fork bomb.
+    def apply_limits():
+        resource.setrlimit(resource.RLIMIT_CPU, (cpu_seconds, cpu_seconds + 1))
+        resource.setrlimit(resource.RLIMIT_FSIZE, (output_kb * 1024, output_kb * 1024))
+        resource.setrlimit(resource.RLIMIT_CORE, (0, 0))
+        resource.setrlimit(resource.RLIMIT_NPROC, (processes, processes))
+        if memory_mb:
+            resource.setrlimit(resource.RLIMIT_AS, (memory_mb * 1024 * 1024,) * 2)
+
+    with tempfile.TemporaryDirectory(prefix="run-") as workdir:
+        out_path = os.path.join(workdir, "stdout")
+        err_path = os.path.join(workdir, "stderr")
+        # A file-backed input becomes the program's stdin as is, never read in here.
+        from_file = isinstance(stdin, TestFile)
+        with open(out_path, "wb") as out, open(err_path, "wb") as err, \
+                (stdin.open() if from_file else nullcontext(subprocess.PIPE)) as stdin_arg:
+            proc = subprocess.Popen(cmd, cwd=workdir, stdin=stdin_arg, stdout=out, stderr=err,
+                                    env=bare_env(workdir), preexec_fn=apply_limits,
+                                    start_new_session=True)
+            try:
+                proc.communicate(None if from_file else stdin.encode("utf-8"), timeout=wall_seconds)
+            except subprocess.TimeoutExpired:
+                os.killpg(proc.pid, signal.SIGKILL)
+                proc.wait()
+                return make_result(STATUS_TIME_LIMIT)
+            finally:
+                try:
+                    os.killpg(proc.pid, signal.SIGKILL)     # stray children
+                except ProcessLookupError:
+                    pass
+        stdout = _read(out_path, output_kb)
+        stderr = _read(err_path, output_kb)
+
+    rc = proc.returncode
+    if rc < 0:
+        status = SIGNAL_STATUSES.get(-rc, STATUS_RUNTIME_OTHER)
+    elif rc != 0:
+        status = STATUS_NZEC
+    else:
+        status = STATUS_ACCEPTED
+    return make_result(status, stdout=stdout, stderr=stderr or None)
+
+
+def _read(path, limit_kb):
+    with open(path, "rb") as f:
+        return f.read(limit_kb * 1024).decode("utf-8", errors="replace")
@@ -1,9 +1,17 @@
-from flask import Blueprint, request, jsonify, render_template, session, redirect, url_for
+import json
+import time
+from flask import Blueprint, Response, request, jsonify, render_template, session, redirect, url_for
 from datetime import datetime, timezone
-from core.database import get_db, get_config
-from core.problems  import get_safe_problems, get_problem
-from core.config    import CONTEST_DURATION_SECONDS
-from routes.judge   import run_code_on_judge, build_full_code, parse_result, normalize_expected, best_error
+from core import metrics
+from core.database import get_db, contest_state, mark_ended
+from core.problems  import problem_set, get_problem
+from core.config    import (CONTEST_DURATION_SECONDS, EVENTS_HEARTBEAT_SECONDS, EVENTS_STREAM_SECONDS,
+                            AUTOSAVE_MAX_CODE_KB, JUDGE0_BREAKER_RESET_SECONDS)
+from core.events    import event_bus
+from core.autosave  import autosave_buffer, code_hash
+from core.jobs      import judge_queue, QueueFull
+from core.testdata  import shown
+from routes.judge   import run_batch_on_judge, build_full_code, grade, test_waves, is_unjudged
 
 participant_bp = Blueprint("participant", __name__)
 
@@ -21,11 +29,8 @@ def index():
 def contest():
     if "participant_id" not in session:
         return redirect(url_for("participant.index"))
-    with get_db() as conn:
-        p = conn.execute("SELECT submitted FROM participants WHERE id=?",
-                         (session["participant_id"],)).fetchone()
-        if p and p["submitted"]:
-            return redirect(url_for("participant.ended"))
+    if session["participant_id"] in contest_state.get().ended:
+        return redirect(url_for("participant.ended"))
     return render_template("contest.html", participant_name=session.get("participant_name", ""))
 
 
@@ -46,7 +51,7 @@ def register():
 
     if not all([name, college, system_number, phone]):
         return jsonify({"error": "All fields are required."}), 400
-    if get_config("contest_active") != "1":
+    if not contest_state.get().active:
         return jsonify({"error": "Contest has not started yet. Please wait."}), 403
 
     with get_db() as conn:
@@ -73,26 +78,94 @@ def register():
 
 @participant_bp.route("/api/contest_status")
 def contest_status():
-    force_ended = False
-    if "participant_id" in session:
-        with get_db() as conn:
-            p = conn.execute("SELECT submitted FROM participants WHERE id=?",
-                             (session["participant_id"],)).fetchone()
-            if p and p["submitted"]:
-                force_ended = True
-    return jsonify({
-        "active":      get_config("contest_active") == "1",
-        "start_time":  get_config("start_time"),
+    return jsonify(_contest_status(session.get("participant_id")))
+
+
+@participant_bp.route("/api/events")
+def api_events():
+    """
+    Server-sent events: a ``status`` message shaped like /api/contest_status,
+    sent on connect and again whenever the contest starts or stops or this
+    participant is force-ended. Pages fall back to polling on a 503.
+    """
+    if not event_bus.open_stream():
+        return jsonify({"error": "Too many open event streams"}), 503
+    participant_id = session.get("participant_id")
+    try:
+        after = event_bus.cursor()      # before the snapshot, so nothing is missed
+        state = _contest_status(participant_id)
+    except Exception:
+        event_bus.close_stream()
+        raise
+
+    def stream(after):
+        try:
+            yield "retry: 3000\n"
+            yield _sse(after, state)
+            deadline = time.monotonic() + EVENTS_STREAM_SECONDS
+            while time.monotonic() < deadline:
+                events = event_bus.wait(after, EVENTS_HEARTBEAT_SECONDS)
+                if events is None:
+                    return                  # fell behind the backlog: reconnect and resync
+                if not events:
+                    yield ": keep-alive\n\n"
+                    continue
+                changed = False
+                for event_id, kind, pid, data in events:
+                    after = event_id
+                    if kind == "contest":
+                        changed |= _update(state, active=data["active"], start_time=data["start_time"])
+                    elif kind == "force_end" and pid is not None and pid == participant_id:
+                        changed |= _update(state, force_ended=True)
+                if changed:
+                    yield _sse(after, state)
+        finally:
+            event_bus.close_stream()
+
+    return Response(stream(after), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+def _contest_status(participant_id):
+    state = contest_state.get()
+    return {
+        "active":      state.active,
+        "start_time":  state.start_time,
         "duration":    CONTEST_DURATION_SECONDS,
-        "force_ended": force_ended,
-    })
+        "force_ended": participant_id in state.ended,
+    }
+
+
+def _update(state, **values):
+    changed = any(state.get(k) != v for k, v in values.items())
+    state.update(values)
+    return changed
+
+
+def _sse(event_id, state):
+    return f"id: {event_id}\nevent: status\ndata: {json.dumps(state)}\n\n"
 
 
 @participant_bp.route("/api/problems")
 def api_problems():
     if "participant_id" not in session:
         return jsonify({"error": "Not logged in"}), 401
-    return jsonify(get_safe_problems())
+    # Pre-serialized at load time; each encoding is its own representation
+    # with its own strong ETag.
+    problems = problem_set()
+    gzipped  = "gzip" in request.accept_encodings
+    etag     = problems.etag + ("-gzip" if gzipped else "")
+    if request.if_none_match.contains(etag):
+        resp = Response(status=304)
+    elif gzipped:
+        resp = Response(problems.payload_gzip, mimetype="application/json")
+        resp.headers["Content-Encoding"] = "gzip"
+    else:
+        resp = Response(problems.payload, mimetype="application/json")
+    resp.set_etag(etag)
+    resp.headers["Cache-Control"] = "private, no-cache"
+    resp.vary.add("Accept-Encoding")
+    return resp
 
 
 @participant_bp.route("/api/solved")
@@ -113,16 +186,12 @@ def open_problem():
     participant_id = session["participant_id"]
     now            = _now()
     with get_db() as conn:
-        exists = conn.execute(
-            "SELECT id FROM submissions WHERE participant_id=? AND problem_id=?",
-            (participant_id, pid),
-        ).fetchone()
-        if not exists:
-            conn.execute(
-                "INSERT INTO submissions (participant_id, problem_id, language, code, passed_all, wrong_attempts, first_opened_at, last_updated) VALUES (?,?,?,?,0,0,?,?)",
-                (participant_id, pid, "python", "", now, now),
-            )
-            conn.commit()
+        conn.execute(
+            "INSERT INTO submissions (participant_id, problem_id, language, code, passed_all, wrong_attempts, first_opened_at, last_updated) VALUES (?,?,?,?,0,0,?,?) "
+            "ON CONFLICT(participant_id, problem_id) DO NOTHING",
+            (participant_id, pid, "python", "", now, now),
+        )
+        conn.commit()
     return jsonify({"ok": True})
 
 
@@ -149,22 +218,24 @@ def api_run():
         return jsonify({"error": "Problem not found"}), 404
 
     full_code = build_full_code(problem, language, user_code)
-    results   = []
-    for tc in problem["visible_test_cases"]:
-        out    = run_code_on_judge(full_code, language, tc["input"])
-        stdout = out.get("stdout") or ""
-        parsed = parse_result(stdout)
-        exp    = normalize_expected(tc["expected"])
-        passed = parsed == exp
-        got    = "\n".join(parsed) if parsed else (best_error(out) or "(no output — did your function return a value?)")
-        results.append({
-            "input":       tc["input"],
-            "expected":    tc["expected"],
-            "got":         got,
-            "passed":      passed,
-            "explanation": tc.get("explanation", ""),
-        })
-    return jsonify({"results": results})
+    tcs       = problem["visible_test_cases"]
+
+    def judge(job):
+        def on_result(i, out):
+            passed, got = grade(tcs[i], out)
+            job.progress(i, {
+                "input":       tcs[i]["input"],
+                "expected":    tcs[i]["expected"],
+                "got":         got,
+                "passed":      passed,
+                "explanation": tcs[i].get("explanation", ""),
+            })
+
+        outs = run_batch_on_judge(full_code, language, [tc["input"] for tc in tcs], on_result,
+                                  cache_tag=problem_id)
+        return {"judge_unavailable": any(is_unjudged(o) for o in outs)}
+
+    return _enqueue(participant_id, "run", len(tcs), judge)
 
 
 # ── SUBMIT ────────────────────────────────────────────────────────────────────
@@ -192,58 +263,122 @@ def api_submit():
 
     full_code = build_full_code(problem, language, user_code)
     all_tcs   = problem["visible_test_cases"] + problem["hidden_test_cases"]
-    all_passed = True
-    results    = []
-
-    for tc in all_tcs:
-        out    = run_code_on_judge(full_code, language, tc["input"])
-        stdout = out.get("stdout") or ""
-        parsed = parse_result(stdout)
-        exp    = normalize_expected(tc["expected"])
-        passed = parsed == exp
-        if not passed:
-            all_passed = False
-        got = "\n".join(parsed) if parsed else (best_error(out) or "(no output — did your function return a value?)")
-        results.append({"expected": tc["expected"], "got": got, "passed": passed})
-
-    now = _now()
+
+    def judge(job):
+        return _judge_submission(job, participant_id, problem, language, user_code,
+                                 active_seconds, full_code, all_tcs)
+
+    return _enqueue(participant_id, "submit", len(all_tcs), judge)
+
+
+@participant_bp.route("/api/run/<job_id>")
+@participant_bp.route("/api/submit/<job_id>")
+def api_job_status(job_id):
+    if "participant_id" not in session:
+        return jsonify({"error": "Not logged in"}), 401
+    job = judge_queue.get(job_id)
+    if not job or job.participant_id != session["participant_id"]:
+        return jsonify({"error": "Unknown submission"}), 404
+    d = job.to_dict()
+    if d["status"] == "queued":
+        d["ahead"] = judge_queue.ahead(job)
+    return jsonify(d)
+
+
+def _enqueue(participant_id, kind, total, judge):
+    """Queue a judge job; 202 with its id, or 429/503 with a retry hint."""
+    try:
+        job = judge_queue.submit(participant_id, total, judge, kind=kind)
+    except QueueFull as e:
+        resp = jsonify({"error": str(e), "status": "throttled", "retry_after": e.retry_after})
+        resp.headers["Retry-After"] = str(e.retry_after)
+        return resp, e.status
+    return jsonify({"job_id": job.id, "status": job.status, "total": job.total,
+                    "ahead": judge_queue.ahead(job)}), 202
+
+
+def _judge_submission(job, participant_id, problem, language, user_code,
+                      active_seconds, full_code, all_tcs):
+    """
+    Runs on a judge worker: grade the test cases, then record the verdict.
+
+    If the judge was unavailable or failed internally for any test case the
+    attempt is not recorded at all, so a judge fault never costs the
+    participant a wrong attempt.
+    """
+    problem_id  = problem["id"]
+    failed      = False
+    unavailable = []
+    for wave in test_waves(problem, all_tcs):
+        if failed or unavailable:
+            why = "the judge is unavailable" if unavailable else "an earlier test case failed"
+            for i in wave:
+                job.progress(i, {"expected": shown(all_tcs[i]["expected"]), "got": f"(skipped — {why})",
+                                 "passed": False, "skipped": True})
+            continue
+
+        def on_result(j, out, wave=wave):
+            i = wave[j]
+            passed, got = grade(all_tcs[i], out)
+            if is_unjudged(out):
+                unavailable.append(i)
+            job.progress(i, {"expected": shown(all_tcs[i]["expected"]), "got": got, "passed": passed})
+
+        run_batch_on_judge(full_code, language, [all_tcs[i]["input"] for i in wave], on_result,
+                           cache_tag=problem_id)
+        failed = not all(job.results[i]["passed"] for i in wave)
+
+    if unavailable:
+        metrics.submissions.inc("unavailable")
+        return {"all_passed": False, "judge_unavailable": True, "retry_after": int(JUDGE0_BREAKER_RESET_SECONDS),
+                "error": "The judge is unavailable right now, so this submission was not judged "
+                         "and does not count as an attempt. Please submit again."}
+
+    all_passed = not failed
+    _record_submission(participant_id, problem_id, language, user_code, active_seconds, all_passed)
+    metrics.submissions.inc("accepted" if all_passed else "wrong")
+    return {"all_passed": all_passed}
+
+
+def _record_submission(participant_id, problem_id, language, user_code, active_seconds, all_passed):
+    now    = _now()
+    digest = code_hash(language, user_code)
     with get_db() as conn:
-        existing = conn.execute(
-            "SELECT id, wrong_attempts FROM submissions WHERE participant_id=? AND problem_id=?",
-            (participant_id, problem_id),
-        ).fetchone()
+        # Take the write lock up front so the read of the existing row and the
+        # update that follows cannot interleave with another submit.
+        conn.execute("BEGIN IMMEDIATE")
+        if conn.execute("SELECT 1 FROM solved WHERE participant_id=? AND problem_id=?",
+                        (participant_id, problem_id)).fetchone():
+            return
 
-        if existing:
-            sub_id = existing["id"]
-            wrong  = existing["wrong_attempts"] or 0
-            if all_passed:
-                conn.execute(
-                    "UPDATE submissions SET language=?, code=?, passed_all=1, solved_at=?, time_taken_seconds=?, last_updated=? WHERE id=?",
-                    (language, user_code, now, active_seconds, now, sub_id),
-                )
-                conn.execute("INSERT OR IGNORE INTO solved (participant_id, problem_id) VALUES (?,?)",
-                             (participant_id, problem_id))
-            else:
-                conn.execute(
-                    "UPDATE submissions SET language=?, code=?, wrong_attempts=?, last_updated=? WHERE id=?",
-                    (language, user_code, wrong + 1, now, sub_id),
-                )
+        # Every judged attempt keeps its code, so a rejudge can grade it again.
+        conn.execute(
+            "INSERT INTO attempts (participant_id, problem_id, language, code, code_hash, active_seconds, passed, submitted_at) "
+            "VALUES (?,?,?,?,?,?,?,?)",
+            (participant_id, problem_id, language, user_code, digest, active_seconds, int(all_passed), now),
+        )
+        if all_passed:
+            conn.execute(
+                "INSERT INTO submissions (participant_id, problem_id, language, code, code_hash, passed_all, wrong_attempts, first_opened_at, solved_at, time_taken_seconds, last_updated) VALUES (?,?,?,?,?,1,0,?,?,?,?) "
+                "ON CONFLICT(participant_id, problem_id) DO UPDATE SET "
+                "language=excluded.language, code=excluded.code, code_hash=excluded.code_hash, passed_all=1, solved_at=excluded.solved_at, "
+                "time_taken_seconds=excluded.time_taken_seconds, last_updated=excluded.last_updated",
+                (participant_id, problem_id, language, user_code, digest, now, now, active_seconds, now),
+            )
+            conn.execute("INSERT OR IGNORE INTO solved (participant_id, problem_id) VALUES (?,?)",
+                         (participant_id, problem_id))
         else:
-            if all_passed:
-                conn.execute(
-                    "INSERT INTO submissions (participant_id, problem_id, language, code, passed_all, wrong_attempts, first_opened_at, solved_at, time_taken_seconds, last_updated) VALUES (?,?,?,?,1,0,?,?,?,?)",
-                    (participant_id, problem_id, language, user_code, now, now, active_seconds, now),
-                )
-                conn.execute("INSERT OR IGNORE INTO solved (participant_id, problem_id) VALUES (?,?)",
-                             (participant_id, problem_id))
-            else:
-                conn.execute(
-                    "INSERT INTO submissions (participant_id, problem_id, language, code, passed_all, wrong_attempts, first_opened_at, last_updated) VALUES (?,?,?,?,0,1,?,?)",
-                    (participant_id, problem_id, language, user_code, now, now),
-                )
+            conn.execute(
+                "INSERT INTO submissions (participant_id, problem_id, language, code, code_hash, passed_all, wrong_attempts, first_opened_at, last_updated) VALUES (?,?,?,?,?,0,1,?,?) "
+                "ON CONFLICT(participant_id, problem_id) DO UPDATE SET "
+                "language=excluded.language, code=excluded.code, code_hash=excluded.code_hash, "
+                "wrong_attempts=COALESCE(submissions.wrong_attempts, 0) + 1, last_updated=excluded.last_updated",
+                (participant_id, problem_id, language, user_code, digest, now, now),
+            )
         conn.commit()
-
-    return jsonify({"all_passed": all_passed, "results": results})
+    # The stored submission supersedes buffered drafts saved before it. Only
+    # now: a submit that was refused or never judged must not lose the draft.
+    autosave_buffer.discard(participant_id, problem_id, now)
 
 
 # ── SAVE / END ────────────────────────────────────────────────────────────────
@@ -256,22 +391,11 @@ def save_code():
     problem_id     = int(data.get("problem_id", 0))
     language       = data.get("language", "")
     user_code      = data.get("code", "")
-    participant_id = session["participant_id"]
-    now            = _now()
-    with get_db() as conn:
-        existing = conn.execute(
-            "SELECT id FROM submissions WHERE participant_id=? AND problem_id=?",
-            (participant_id, problem_id),
-        ).fetchone()
-        if existing:
-            conn.execute("UPDATE submissions SET language=?, code=?, last_updated=? WHERE id=?",
-                         (language, user_code, now, existing["id"]))
-        else:
-            conn.execute(
-                "INSERT INTO submissions (participant_id, problem_id, language, code, passed_all, wrong_attempts, first_opened_at, last_updated) VALUES (?,?,?,?,0,0,?,?)",
-                (participant_id, problem_id, language, user_code, now, now),
-            )
-        conn.commit()
+    if not get_problem(problem_id):
+        return jsonify({"ok": False, "error": "Problem not found"}), 404
+    if len(user_code) > AUTOSAVE_MAX_CODE_KB * 1024:
+        return jsonify({"ok": False, "error": "Code too large"}), 413
+    autosave_buffer.save(session["participant_id"], problem_id, language, user_code, _now())
     return jsonify({"ok": True})
 
 
@@ -279,14 +403,13 @@ def save_code():
 def end_test():
     if "participant_id" not in session:
         return jsonify({"error": "Not logged in"}), 401
-    with get_db() as conn:
-        conn.execute("UPDATE participants SET submitted=1, submit_time=? WHERE id=?",
-                     (_now(), session["participant_id"]))
-        conn.commit()
+    autosave_buffer.flush(session["participant_id"])
+    mark_ended(session["participant_id"], _now())
     session.clear()
     return jsonify({"success": True})
 
 
 # ── HELPER ────────────────────────────────────────────────────────────────────
 def _now():
-    return datetime.now(timezone.utc).isoformat()
\ No newline at end of file
+    return datetime.now(timezone.utc).isoformat()
+
@@ -0,0 +1,304 @@
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from core.config import REJUDGE_WORKERS, REJUDGE_BATCH_SIZE, REJUDGE_CHECKPOINT_SECONDS, REJUDGE_STALE_SECONDS
+from core.database import get_db
+from core.problems import get_all_problems, get_problem, load_problems
+from routes.judge import run_batch_on_judge, build_full_code, grade, test_waves, is_unjudged
+
+# Bulk rejudge: grade the stored attempts (migration 9) of some problems again
+# against the current problem data and correct every score that changes.
+# Identical programs (same problem, same language and code) are judged once
+# and the verdict applies to every attempt that submitted them. A checkpoint
+# writes a batch of verdicts, the scores they change and the run's progress
+# in one transaction, so an interrupted run resumes with exactly the programs
+# it has not applied yet.
+
+_running = None          # the run executing in this process, if any
+
+
+class RejudgeError(Exception):
+    """A rejudge that cannot be started or resumed; ``status`` is the HTTP status to answer with."""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+class Rejudge:
+    """
+    One run, stored as a row of the rejudges table.
+
+    ``run()`` judges the pending programs on a pool of ``workers`` threads
+    and applies their verdicts from the calling thread, the only one that
+    writes. Only attempts up to ``max_attempt_id`` are judged: later ones
+    were graded against the new data already. A program the judge could not
+    grade (unavailable, internal error) keeps its verdicts and stays pending,
+    so resuming the run retries it.
+    """
+
+    def __init__(self, rejudge_id, problem_ids, max_attempt_id, workers=REJUDGE_WORKERS,
+                 batch_size=REJUDGE_BATCH_SIZE, executor=None):
+        self.id             = rejudge_id
+        self.problem_ids    = problem_ids
+        self.max_attempt_id = max_attempt_id
+        self.workers        = workers
+        self.batch_size     = batch_size
+        self.executor       = executor
+        self.problems       = {pid: get_problem(pid) for pid in problem_ids}
+        self.finished       = threading.Event()
+        self._stop          = threading.Event()
+
+    def stop(self):
+        """Apply what has been judged and leave the rest for a resume."""
+        self._stop.set()
+
+    def run(self):
+        conn = get_db()
+        pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix=f"rejudge-{self.id}")
+        try:
+            futures = {pool.submit(self._judge, program) for program in _pending(conn, self)}
+            batch, saved = [], time.monotonic()
+            while futures and not self._stop.is_set():
+                finished, futures = wait(futures, timeout=REJUDGE_CHECKPOINT_SECONDS, return_when=FIRST_COMPLETED)
+                batch += [f.result() for f in finished]
+                if len(batch) >= self.batch_size or time.monotonic() - saved >= REJUDGE_CHECKPOINT_SECONDS:
+                    self._checkpoint(conn, batch)
+                    batch, saved = [], time.monotonic()
+            self._checkpoint(conn, batch)
+            self._finish(conn, "interrupted" if futures else "done")
+        except Exception as e:
+            self._finish(conn, "failed", f"{type(e).__name__}: {e}")
+            raise
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+            self.finished.set()
+
+    def _judge(self, program):
+        """(problem id, code hash, verdict): True/False, or None when the judge gave no verdict."""
+        problem_id, code_hash, attempt_id = program
+        try:
+            row = get_db().execute("SELECT language, code FROM attempts WHERE id=?", (attempt_id,)).fetchone()
+            return problem_id, code_hash, self._passes(self.problems[problem_id], row["language"], row["code"])
+        except Exception:
+            return problem_id, code_hash, None
+
+    def _passes(self, problem, language, code):
+        full_code = build_full_code(problem, language, code)
+        tcs       = problem["visible_test_cases"] + problem["hidden_test_cases"]
+        for wave in test_waves(problem, tcs):
+            outs = run_batch_on_judge(full_code, language, [tcs[i]["input"] for i in wave],
+                                      cache_tag=problem["id"], executor=self.executor)
+            if any(is_unjudged(out) for out in outs):
+                return None
+            if not all(grade(tcs[i], out)[0] for i, out in zip(wave, outs)):
+                return False
+        return True
+
+    def _checkpoint(self, conn, batch):
+        """Apply a batch of verdicts, rescore the results they change and record progress."""
+        changed = gained = lost = 0
+        pairs   = set()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for problem_id, code_hash, passed in batch:
+                if passed is None:
+                    continue
+                scope   = (problem_id, code_hash, self.max_attempt_id)
+                flipped = conn.execute(
+                    "SELECT participant_id FROM attempts WHERE problem_id=? AND code_hash=? AND id<=? "
+                    "AND code IS NOT NULL AND passed != ?", scope + (int(passed),)).fetchall()
+                conn.execute(
+                    "UPDATE attempts SET passed=?, rejudged_by=? WHERE problem_id=? AND code_hash=? AND id<=? "
+                    "AND code IS NOT NULL", (int(passed), self.id) + scope)
+                changed += len(flipped)
+                pairs.update((r["participant_id"], problem_id) for r in flipped)
+            for participant_id, problem_id in sorted(pairs):
+                was, now = rescore(conn, participant_id, problem_id)
+                gained  += now and not was
+                lost    += was and not now
+            conn.execute(
+                "UPDATE rejudges SET done=done+?, changed=changed+?, gained=gained+?, lost=lost+?, errors=errors+?, "
+                "updated_at=? WHERE id=?",
+                (len(batch), changed, gained, lost, sum(v is None for _, _, v in batch), time.time(), self.id))
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+
+    def _finish(self, conn, status, error=None):
+        now = time.time()
+        conn.execute("UPDATE rejudges SET status=?, error=?, updated_at=?, finished_at=? WHERE id=?",
+                     (status, error, now, now, self.id))
+        conn.commit()
+
+
+def rescore(conn, participant_id, problem_id):
+    """
+    Recompute a participant's result on a problem from their attempts, inside
+    the caller's transaction: solved at the first passing attempt (its time
+    counts), with the failures before it as wrong attempts. The scoreboard
+    triggers follow. Returns (solved before, solved now).
+    """
+    key   = (participant_id, problem_id)
+    was   = conn.execute("SELECT 1 FROM solved WHERE participant_id=? AND problem_id=?", key).fetchone() is not None
+    wrong = 0
+    solve = None
+    for row in conn.execute("SELECT passed, active_seconds, submitted_at FROM attempts "
+                            "WHERE participant_id=? AND problem_id=? ORDER BY id", key).fetchall():
+        if row["passed"]:
+            solve = row
+            break
+        wrong += 1
+    if solve is not None:
+        conn.execute("UPDATE submissions SET passed_all=1, wrong_attempts=?, solved_at=?, time_taken_seconds=? "
+                     "WHERE participant_id=? AND problem_id=?",
+                     (wrong, solve["submitted_at"], solve["active_seconds"]) + key)
+        conn.execute("INSERT OR IGNORE INTO solved (participant_id, problem_id) VALUES (?,?)", key)
+    else:
+        conn.execute("UPDATE submissions SET passed_all=0, wrong_attempts=?, solved_at=NULL, time_taken_seconds=NULL "
+                     "WHERE participant_id=? AND problem_id=?", (wrong,) + key)
+        conn.execute("DELETE FROM solved WHERE participant_id=? AND problem_id=?", key)
+    return was, solve is not None
+
+
+# ── RUNS ──────────────────────────────────────────────────────────────────────
+
+def start(problem_ids=None, workers=REJUDGE_WORKERS, executor=None, background=True):
+    """
+    Rejudge ``problem_ids`` (default: every problem) and return the run. The
+    problem file is re-read first, so an edit saved a moment ago counts.
+    """
+    problem_ids = _problems(problem_ids)
+    conn        = get_db()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        _check_idle(conn)
+        max_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM attempts").fetchone()[0]
+        total  = len(_programs(conn, problem_ids, max_id))
+        now    = time.time()
+        rejudge_id = conn.execute(
+            "INSERT INTO rejudges (problem_ids, max_attempt_id, status, total, started_at, resumed_at, updated_at) "
+            "VALUES (?,?,'running',?,?,?,?)", (json.dumps(problem_ids), max_id, total, now, now, now)).lastrowid
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    return _launch(Rejudge(rejudge_id, problem_ids, max_id, workers, executor=executor), background)
+
+
+def resume(rejudge_id, workers=REJUDGE_WORKERS, executor=None, background=True):
+    """Continue an interrupted or failed run, or retry the programs a finished one could not judge."""
+    conn = get_db()
+    row  = conn.execute("SELECT * FROM rejudges WHERE id=?", (rejudge_id,)).fetchone()
+    if row is None:
+        raise RejudgeError(f"No rejudge {rejudge_id}.", 404)
+    run = Rejudge(rejudge_id, _problems(json.loads(row["problem_ids"])), row["max_attempt_id"], workers,
+                  executor=executor)
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        _check_idle(conn)
+        row = conn.execute("SELECT * FROM rejudges WHERE id=?", (rejudge_id,)).fetchone()
+        if not describe(row)["resumable"]:
+            raise RejudgeError(f"Rejudge {rejudge_id} has nothing left to do.", 409)
+        done = row["total"] - len(_pending(conn, run))
+        now  = time.time()
+        conn.execute(
+            "UPDATE rejudges SET status='running', done=?, errors=0, error=NULL, resumed_at=?, resumed_done=?, "
+            "updated_at=?, finished_at=NULL WHERE id=?", (done, now, done, now, rejudge_id))
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    return _launch(run, background)
+
+
+def status(rejudge_id=None):
+    """Progress of run ``rejudge_id`` (default: the latest one), or None."""
+    conn = get_db()
+    if rejudge_id is None:
+        row = conn.execute("SELECT * FROM rejudges ORDER BY id DESC LIMIT 1").fetchone()
+    else:
+        row = conn.execute("SELECT * FROM rejudges WHERE id=?", (rejudge_id,)).fetchone()
+    return describe(row) if row is not None else None
+
+
+def describe(row):
+    """A rejudges row as shown to the admin, with its rate and ETA."""
+    state = row["status"]
+    if state == "running" and time.time() - row["updated_at"] > REJUDGE_STALE_SECONDS:
+        state = "interrupted"                   # its process died without a checkpoint
+    elapsed = row["updated_at"] - row["resumed_at"]
+    rate    = (row["done"] - row["resumed_done"]) / elapsed if elapsed > 0 else 0.0
+    eta     = (row["total"] - row["done"]) / rate if state == "running" and rate > 0 else None
+    return {
+        "id":              row["id"],
+        "problem_ids":     json.loads(row["problem_ids"]),
+        "status":          state,
+        "total":           row["total"],
+        "done":            row["done"],
+        "changed":         row["changed"],
+        "gained":          row["gained"],
+        "lost":            row["lost"],
+        "errors":          row["errors"],
+        "error":           row["error"],
+        "rate_per_second": round(rate, 2),
+        "eta_seconds":     round(eta) if eta is not None else None,
+        "started_at":      row["started_at"],
+        "finished_at":     row["finished_at"],
+        "resumable":       state in ("interrupted", "failed") or (state == "done" and row["errors"] > 0),
+    }
+
+
+def stop_running(timeout=10):
+    """Stop this process's run at its next checkpoint (e.g. on worker shutdown)."""
+    run = _running
+    if run is not None and not run.finished.is_set():
+        run.stop()
+        run.finished.wait(timeout)
+
+
+def _launch(run, background):
+    global _running
+    _running = run
+    if background:
+        threading.Thread(target=run.run, name=f"rejudge-{run.id}", daemon=True).start()
+    else:
+        run.run()
+    return run
+
+
+def _problems(problem_ids):
+    try:
+        load_problems()
+    except (OSError, ValueError) as e:
+        raise RejudgeError(f"Cannot read the problem file: {e}")
+    known   = [p["id"] for p in get_all_problems()]
+    unknown = sorted(set(problem_ids or ()) - set(known))
+    if unknown:
+        raise RejudgeError(f"Unknown problem ids: {', '.join(map(str, unknown))}.", 404)
+    return sorted(set(problem_ids)) if problem_ids else known
+
+
+def _check_idle(conn):
+    row = conn.execute("SELECT id FROM rejudges WHERE status='running' AND updated_at >= ?",
+                       (time.time() - REJUDGE_STALE_SECONDS,)).fetchone()
+    if row is not None:
+        raise RejudgeError(f"Rejudge {row['id']} is still running.", 409)
+
+
+def _programs(conn, problem_ids, max_attempt_id, applied_by=0):
+    """[(problem id, code hash, id of an attempt with that code)], less those run ``applied_by`` has applied."""
+    marks = ",".join("?" * len(problem_ids))
+    return [tuple(r) for r in conn.execute(f"""
+        SELECT problem_id, code_hash, MIN(id)
+          FROM attempts
+         WHERE problem_id IN ({marks}) AND id <= ? AND code IS NOT NULL AND rejudged_by IS NOT ?
+         GROUP BY problem_id, code_hash
+         ORDER BY MIN(id)
+    """, (*problem_ids, max_attempt_id, applied_by))]
+
+
+def _pending(conn, run):
+    return _programs(conn, run.problem_ids, run.max_attempt_id, run.id)
@@ -10,7 +10,7 @@ const PROBLEM_NAMES = [
 
 // ── LOAD ALL ──────────────────────────────────────────────────────────────────
 async function loadData() {
-  await Promise.all([loadStatus(), loadParticipants(), loadLeaderboard()]);
+  await Promise.all([loadStatus(), loadParticipants(), loadLeaderboard(), loadJudgeQueue(), loadMetrics(), loadRejudge()]);
 }
 
 // ── STATUS ────────────────────────────────────────────────────────────────────
@@ -27,10 +27,26 @@ async function loadStatus() {
 }
 
 // ── PARTICIPANTS ──────────────────────────────────────────────────────────────
+// Rows are kept by id and updated from the delta feed: each poll asks only
+// for participants changed since the last cursor.
+const participants    = new Map();
+let participantCursor = 0;
+
 async function loadParticipants() {
-  const r    = await fetch('/api/admin/participants');
-  const data = await r.json();
+  let changed = participantCursor === 0;
+  for (;;) {
+    const r     = await fetch(`/api/admin/participants?since=${participantCursor}&limit=500`);
+    const delta = await r.json();
+    if (delta.reset) participants.clear();
+    delta.participants.forEach(p => participants.set(p.id, p));
+    changed           = changed || delta.reset || delta.participants.length > 0;
+    participantCursor = delta.cursor;
+    if (!delta.has_more) break;
+  }
+  if (changed) renderParticipants([...participants.values()].sort((a, b) => a.id - b.id));
+}
 
+function renderParticipants(data) {
   document.getElementById('stat-total').textContent     = data.length;
   document.getElementById('stat-submitted').textContent = data.filter(p => p.submitted).length;
   document.getElementById('stat-active').textContent    = data.filter(p => !p.submitted).length;
@@ -66,8 +82,13 @@ async function loadParticipants() {
 }
 
 // ── LEADERBOARD ───────────────────────────────────────────────────────────────
+let leaderboardEtag = null;
+
 async function loadLeaderboard() {
-  const r    = await fetch('/api/admin/leaderboard');
+  const headers = leaderboardEtag ? { 'If-None-Match': leaderboardEtag } : {};
+  const r       = await fetch('/api/admin/leaderboard', { headers, cache: 'no-store' });
+  if (r.status === 304) return;   // board unchanged since the last render
+  leaderboardEtag = r.headers.get('ETag');
   const data = await r.json();
   const tbody = document.getElementById('leaderboard-body');
 
@@ -94,6 +115,113 @@ async function loadLeaderboard() {
   `).join('');
 }
 
+// ── JUDGE QUEUE ───────────────────────────────────────────────────────────────
+async function loadJudgeQueue() {
+  const r = await fetch('/api/admin/judge_stats');
+  if (!r.ok) return;
+  const q    = (await r.json()).scheduler;
+  const wait = ms => ms == null ? '—' : ms < 1000 ? `${Math.round(ms)}ms` : `${(ms / 1000).toFixed(1)}s`;
+  document.getElementById('judge-running').textContent       = `${q.running}/${q.workers}`;
+  document.getElementById('judge-queued-submit').textContent = q.queued.submit;
+  document.getElementById('judge-queued-run').textContent    = q.queued.run;
+  document.getElementById('judge-wait-submit').textContent   = wait(q.wait.submit.p95_ms);
+  document.getElementById('judge-wait-run').textContent      = wait(q.wait.run.p95_ms);
+  document.getElementById('judge-throttled').textContent     = q.throttled.submit + q.throttled.run + q.rejected;
+}
+
+// ── REJUDGE ───────────────────────────────────────────────────────────────────
+// Polled every second while a run is in progress, with the dashboard otherwise.
+let rejudgeRun   = null;
+let rejudgeTimer = null;
+
+async function loadRejudge() {
+  const r = await fetch('/api/admin/rejudge');
+  if (!r.ok) return;
+  const s    = await r.json();
+  const was  = rejudgeRun;
+  rejudgeRun = s;
+  const text = document.getElementById('rejudge-text');
+  const bar  = document.getElementById('rejudge-bar');
+  document.getElementById('rejudge-resume').hidden = !(s && s.resumable);
+  document.getElementById('rejudge-start').disabled = !!(s && s.status === 'running');
+  if (!s) return;
+
+  const problems = s.problem_ids.map(id => `Task ${id}`).join(', ');
+  const eta      = s.eta_seconds ? `, ETA ${formatTime(s.eta_seconds)}` : '';
+  text.textContent = `#${s.id} ${problems}: ${s.status}, ${s.done}/${s.total} programs${eta}`
+    + ` · ${s.changed} attempts changed, +${s.gained}/-${s.lost} solves`
+    + (s.errors ? ` · ${s.errors} not judged` : '') + (s.error ? ` · ${s.error}` : '');
+  bar.style.width = `${s.total ? s.done / s.total * 100 : 100}%`;
+  bar.classList.toggle('failed', s.status !== 'running' && s.status !== 'done' || s.errors > 0);
+
+  clearTimeout(rejudgeTimer);
+  if (s.status === 'running') rejudgeTimer = setTimeout(loadRejudge, 1000);
+  else if (was && was.id === s.id && was.status === 'running') loadLeaderboard();   // scores just changed
+}
+
+// The problem choices come from the loaded problem file, once per page.
+async function loadRejudgeProblems() {
+  const r = await fetch('/api/admin/problems');
+  if (!r.ok) return;
+  const select = document.getElementById('rejudge-problem');
+  for (const p of await r.json()) select.add(new Option(p.title, p.id));
+}
+
+async function postRejudge(body) {
+  const r = await fetch('/api/admin/rejudge', {
+    method:  'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body:    JSON.stringify(body),
+  });
+  const d = await r.json();
+  if (!r.ok) alert(d.error);
+  loadRejudge();
+}
+
+function startRejudge() {
+  const select = document.getElementById('rejudge-problem');
+  const id     = select.value;
+  const what   = id ? select.selectedOptions[0].text : 'every problem';
+  if (!confirm(`Rejudge all stored attempts of ${what} against the current test data? Scores will change.`)) return;
+  postRejudge({ problem_ids: id ? [Number(id)] : [] });
+}
+
+function resumeRejudge() {
+  if (rejudgeRun) postRejudge({ resume: rejudgeRun.id });
+}
+
+// ── LIVE METRICS ──────────────────────────────────────────────────────────────
+// Counted by the server process that answers, since each worker keeps its own.
+async function loadMetrics() {
+  const r = await fetch('/api/admin/metrics_summary');
+  if (!r.ok) return;
+  const m    = await r.json();
+  const ms   = v => v == null ? '—' : v < 1000 ? `${v.toFixed(v < 10 ? 1 : 0)}ms` : `${(v / 1000).toFixed(1)}s`;
+  const lock = m.db.statements.BEGIN;
+  document.getElementById('metric-requests').textContent     = m.requests.count;
+  document.getElementById('metric-errors').textContent       = m.requests.errors;
+  document.getElementById('metric-p95').textContent          = ms(m.requests.p95_ms);
+  document.getElementById('metric-db-lock').textContent      = ms(lock && lock.p95_ms);
+  document.getElementById('metric-judge-p95').textContent    = ms(m.judge.p95_ms);
+  document.getElementById('metric-judge-errors').textContent = Object.values(m.judge.errors).reduce((a, n) => a + n, 0);
+
+  const tbody = document.getElementById('metrics-body');
+  if (!m.routes.length) {
+    tbody.innerHTML = '<tr><td colspan="6" class="empty-cell">No requests yet.</td></tr>';
+    return;
+  }
+  tbody.innerHTML = m.routes.map(row => `
+    <tr>
+      <td>${esc(row.route)}</td>
+      <td>${esc(row.method)}</td>
+      <td>${row.count}</td>
+      <td class="time-val">${ms(row.p50_ms)}</td>
+      <td class="time-val">${ms(row.p95_ms)}</td>
+      <td>${row.errors ? `<span class="badge badge-orange">${row.errors}</span>` : '<span class="rank-other">—</span>'}</td>
+    </tr>
+  `).join('');
+}
+
 // ── VIEW CODE MODAL ───────────────────────────────────────────────────────────
 async function viewCode(pid, name) {
   document.getElementById('modal-title').textContent = `Submissions — ${name}`;
@@ -176,4 +304,5 @@ function esc(str) {
 
 // ── INIT ──────────────────────────────────────────────────────────────────────
 loadData();
+loadRejudgeProblems();
 setInterval(loadData, 15000);
\ No newline at end of file
@@ -84,30 +84,28 @@ require(['vs/editor/editor.main'], function () {
 
   loadData();
 
-  // Poll contest status every 5 s
-  setInterval(async () => {
-    try {
-      const d = await fetchJSON('/api/contest_status');
-      const shouldEnd = (!d.active || d.force_ended) && !timesUpShown;
-      if (shouldEnd) {
-        timesUpShown = true;
-        clearInterval(timerInterval);
-        pauseCurrentClock();
-        const modal = document.getElementById('timesup-modal');
-        modal.querySelector('p').textContent = d.force_ended
-          ? 'Your test has been ended by the administrator. Your code has been auto-saved. Please submit and exit.'
-          : 'The contest has been stopped by the administrator. Please submit and exit.';
-        modal.classList.add('open');
-      }
-      if (d.active && d.start_time && !contestStart) {
-        contestStart    = new Date(d.start_time);
-        contestDuration = d.duration;
-        startTimer();
-      }
-    } catch (e) { /* ignore */ }
-  }, 5000);
+  watchContestStatus(applyContestStatus);
 });
 
+function applyContestStatus(d) {
+  const shouldEnd = (!d.active || d.force_ended) && !timesUpShown;
+  if (shouldEnd) {
+    timesUpShown = true;
+    clearInterval(timerInterval);
+    pauseCurrentClock();
+    const modal = document.getElementById('timesup-modal');
+    modal.querySelector('p').textContent = d.force_ended
+      ? 'Your test has been ended by the administrator. Your code has been auto-saved. Please submit and exit.'
+      : 'The contest has been stopped by the administrator. Please submit and exit.';
+    modal.classList.add('open');
+  }
+  if (d.active && d.start_time && !contestStart) {
+    contestStart    = new Date(d.start_time);
+    contestDuration = d.duration;
+    startTimer();
+  }
+}
+
 // ── DATA LOADING ──────────────────────────────────────────────────────────────
 async function loadData() {
   const [problems_data, solved_ids, cs] = await Promise.all([
@@ -270,13 +268,24 @@ async function runCode() {
   setRunning(true, false);
   showOutput('<div class="out-line"><span class="spinner"></span>Running visible test cases...</div>');
   try {
-    const data = await postJSON('/api/run', {
+    const data = await waitForJob('/api/run', await postJSON('/api/run', {
       problem_id: currentProblem.id,
       language:   getLang(),
       code:       editor.getValue(),
-    });
+    }), false);
+
+    if (data.error) {
+      showJobError(data);
+      setRunning(false, false);
+      return;
+    }
+
     lastRunResults = data.results || [];
     renderTestCaseResults(lastRunResults, false);
+    if (data.judge_unavailable) {
+      document.getElementById('output-content').insertAdjacentHTML(
+        'afterbegin', '<div class="out-line error">The judge is unavailable right now — some test cases were not run. Try again shortly.</div>');
+    }
     switchTab('testcases');
   } catch (e) {
     showOutput(`<div class="out-line error">Network error: ${e.message}</div>`);
@@ -287,20 +296,27 @@ async function runCode() {
 // ── SUBMIT ────────────────────────────────────────────────────────────────────
 async function submitCode() {
   if (!currentProblem || !editor) return;
+  const problem = currentProblem;
   setRunning(true, true);
   showOutput('<div class="out-line"><span class="spinner"></span>Running all test cases (including hidden)...</div>');
   try {
-    const data = await postJSON('/api/submit', {
-      problem_id:     currentProblem.id,
+    const data = await waitForJob('/api/submit', await postJSON('/api/submit', {
+      problem_id:     problem.id,
       language:       getLang(),
       code:           editor.getValue(),
-      active_seconds: getActiveSeconds(currentProblem.id),
-    });
+      active_seconds: getActiveSeconds(problem.id),
+    }), true);
+
+    if (data.error) {
+      showJobError(data);
+      setRunning(false, true);
+      return;
+    }
 
     if (data.all_passed) {
-      solvedSet.add(currentProblem.id);
-      document.getElementById(`prob-item-${currentProblem.id}`).classList.add('solved');
-      const tick = document.getElementById(`tick-${currentProblem.id}`);
+      solvedSet.add(problem.id);
+      document.getElementById(`prob-item-${problem.id}`).classList.add('solved');
+      const tick = document.getElementById(`tick-${problem.id}`);
       if (tick) tick.classList.add('visible');
     }
 
@@ -312,6 +328,31 @@ async function submitCode() {
   setRunning(false, true);
 }
 
+// The judge works in the background; poll the job until it settles.
+async function waitForJob(base, data, isSubmit) {
+  while (data.status === 'queued' || data.status === 'running') {
+    renderSubmitProgress(data, isSubmit);
+    await sleep(700);
+    data = await fetchJSON(`${base}/${data.job_id}`);
+  }
+  return data;
+}
+
+function showJobError(data) {
+  const retry = data.retry_after ? ` (retry in ~${data.retry_after}s)` : '';
+  showOutput(`<div class="out-line error">${escHtml(data.error)}${retry}</div>`);
+}
+
+function renderSubmitProgress(data, isSubmit) {
+  const ahead = data.ahead ? ` (${data.ahead} ahead of you)` : '';
+  const msg = data.status === 'queued'
+    ? `Queued for judging${ahead}...`
+    : `Judging... ${data.done || 0}/${data.total} test cases`;
+  renderTestCaseResults(data.results || [], isSubmit);
+  document.getElementById('output-content').insertAdjacentHTML(
+    'afterbegin', `<div class="out-line"><span class="spinner"></span>${msg}</div>`);
+}
+
 // ── RENDER RESULTS ────────────────────────────────────────────────────────────
 function renderTestCaseResults(results, isSubmit, allPassed) {
   let html = '';
@@ -328,10 +369,21 @@ function renderTestCaseResults(results, isSubmit, allPassed) {
 
   results.forEach((tc, i) => {
     const hidden  = isSubmit && i >= visibleCount;
+    if (!tc) {
+      html += `
+      <div class="tc-result">
+        <div class="tc-status">⏳</div>
+        <div class="tc-details">
+          <div class="tc-label">Test Case ${i + 1}${hidden ? ' (hidden)' : ''}</div>
+        </div>
+      </div>`;
+      return;
+    }
     const gotCls  = tc.passed ? 'tc-got-pass' : 'tc-got-fail';
+    const icon    = tc.skipped ? '⏭' : (tc.passed ? '✅' : '❌');
     html += `
       <div class="tc-result">
-        <div class="tc-status">${tc.passed ? '✅' : '❌'}</div>
+        <div class="tc-status">${icon}</div>
         <div class="tc-details">
           <div class="tc-label">Test Case ${i + 1}${hidden ? ' (hidden)' : ''}</div>
           <div class="tc-vals">
@@ -533,6 +585,10 @@ async function postJSON(url, body) {
   return r.json();
 }
 
+function sleep(ms) {
+  return new Promise(resolve => setTimeout(resolve, ms));
+}
+
 function escHtml(str) {
   if (!str) return '';
   return String(str)
@@ -1,29 +1,23 @@
 let contestActive = false;
 
-async function checkStatus() {
-  try {
-    const r = await fetch('/api/contest_status');
-    const data = await r.json();
-    contestActive = data.active;
+function showStatus(data) {
+  contestActive = data.active;
 
-    const dot  = document.getElementById('status-dot');
-    const txt  = document.getElementById('status-text');
-    const btn  = document.getElementById('enter-btn');
-    const wmsg = document.getElementById('waiting-msg');
+  const dot  = document.getElementById('status-dot');
+  const txt  = document.getElementById('status-text');
+  const btn  = document.getElementById('enter-btn');
+  const wmsg = document.getElementById('waiting-msg');
 
-    if (contestActive) {
-      dot.classList.add('active');
-      txt.textContent = 'Contest is LIVE';
-      btn.disabled = false;
-      wmsg.style.display = 'none';
-    } else {
-      dot.classList.remove('active');
-      txt.textContent = 'Waiting for contest to start...';
-      btn.disabled = true;
-      wmsg.style.display = 'block';
-    }
-  } catch (e) {
-    document.getElementById('status-text').textContent = 'Server connection error';
+  if (contestActive) {
+    dot.classList.add('active');
+    txt.textContent = 'Contest is LIVE';
+    btn.disabled = false;
+    wmsg.style.display = 'none';
+  } else {
+    dot.classList.remove('active');
+    txt.textContent = 'Waiting for contest to start...';
+    btn.disabled = true;
+    wmsg.style.display = 'block';
   }
 }
 
@@ -72,5 +66,4 @@ document.addEventListener('keydown', e => {
   if (e.key === 'Enter' && contestActive) register();
 });
 
-checkStatus();
-setInterval(checkStatus, 5000);
\ No newline at end of file
+watchContestStatus(showStatus);
\ No newline at end of file
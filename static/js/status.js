@@ -0,0 +1,42 @@
+// ── CONTEST STATUS FEED ───────────────────────────────────────────────────────
+// Calls onStatus(status) with /api/contest_status-shaped objects. Uses the
+// /api/events push stream; polls every 5 s only while the stream is
+// unavailable (no EventSource, server at its stream limit, repeated errors)
+// and retries the stream once a minute.
+function watchContestStatus(onStatus) {
+  let pollTimer = null;
+  let failures  = 0;
+
+  const poll = async () => {
+    try {
+      const r = await fetch('/api/contest_status');
+      onStatus(await r.json());
+    } catch (e) { /* ignore */ }
+  };
+
+  const fallBack = () => {
+    failures = 0;
+    if (!pollTimer) { poll(); pollTimer = setInterval(poll, 5000); }
+    setTimeout(connect, 60000);
+  };
+
+  const connect = () => {
+    const es = new EventSource('/api/events');
+    es.addEventListener('status', e => {
+      failures = 0;
+      if (pollTimer) { clearInterval(pollTimer); pollTimer = null; }
+      onStatus(JSON.parse(e.data));
+    });
+    es.onerror = () => {
+      // A stream that ends normally reconnects by itself (readyState stays
+      // CONNECTING); a refused one (503) is CLOSED.
+      if (es.readyState === EventSource.CLOSED || ++failures >= 3) {
+        es.close();
+        fallBack();
+      }
+    };
+  };
+
+  if (window.EventSource) connect();
+  else { poll(); setInterval(poll, 5000); }
+}
@@ -0,0 +1,115 @@
+"""
+/api/save_code throughput with and without the autosave write-behind buffer.
+
+"writethrough" sets AUTOSAVE_FLUSH_INTERVAL=0 (one transaction per save, as
+before); "buffered" uses the given interval. Both drive save_code from
+several threads through Flask's test client, each mode in its own process
+against a fresh temporary database, and report requests/s, how many
+commits reached SQLite, and the write-lock latency seen by a concurrent
+submit-like writer.
+
+    python3 tools/bench_autosave.py --participants 200 --requests 4000 --threads 8
+"""
+import argparse
+import multiprocessing
+import os
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run(mode, participants, requests, threads):
+    sys.path.insert(0, ROOT)
+    os.chdir(ROOT)
+    from app import app
+    from core.autosave import autosave_buffer
+    import core.database as database
+    from core.database import init_db, set_config
+
+    init_db()
+    set_config("contest_active", "1")
+    clients = []
+    for i in range(participants):
+        c = app.test_client()
+        c.post("/register", json={"name": f"p{i}", "college": "c", "system_number": str(i), "phone": f"{i:010d}"})
+        clients.append(c)
+
+    per_thread = requests // threads
+    barrier    = threading.Barrier(threads + 1)
+
+    def worker(t):
+        barrier.wait()
+        for n in range(per_thread):
+            c = clients[(t * per_thread + n) % participants]
+            c.post("/api/save_code", json={"problem_id": 1 + n % 6, "language": "python",
+                                           "code": f"# draft {n}\n" + "x = 1\n" * 50})
+
+    # The submit-like writer runs in its own process so it competes for the
+    # SQLite write lock, not for this process's GIL.
+    ctx     = multiprocessing.get_context("spawn")
+    done    = ctx.Event()
+    results = ctx.Queue()
+    sub     = ctx.Process(target=submitter, args=(database.DB_PATH, done, results))
+
+    ts = [threading.Thread(target=worker, args=(t,)) for t in range(threads)]
+    for t in ts:
+        t.start()
+    sub.start()
+    barrier.wait()
+    t0 = time.perf_counter()
+    for t in ts:
+        t.join()
+    elapsed = time.perf_counter() - t0
+    done.set()
+    latencies = sorted(results.get())
+    sub.join()
+    autosave_buffer.flush()
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000
+    print(f"{mode:<13} {per_thread * threads / elapsed:>10.0f} {autosave_buffer.flushes:>8} "
+          f"{autosave_buffer.flushed_rows:>8} {statistics.median(latencies) * 1000:>9.2f} {p99:>9.2f}")
+
+
+def submitter(path, done, results):
+    conn      = sqlite3.connect(path, timeout=30)
+    latencies = []
+    while not done.is_set():
+        t0 = time.perf_counter()
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute("UPDATE participants SET login_time=? WHERE id=1", (str(t0),))
+        conn.commit()
+        latencies.append(time.perf_counter() - t0)
+        time.sleep(0.01)
+    results.put(latencies)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark save_code with and without write-behind.")
+    ap.add_argument("--mode", choices=["writethrough", "buffered"])
+    ap.add_argument("--participants", type=int, default=200)
+    ap.add_argument("--requests", type=int, default=4000)
+    ap.add_argument("--threads", type=int, default=8)
+    ap.add_argument("--interval", type=float, default=5)
+    args = ap.parse_args()
+
+    if args.mode:
+        run(args.mode, args.participants, args.requests, args.threads)
+        return
+
+    print(f"{'mode':<13} {'save req/s':>10} {'commits':>8} {'rows':>8} {'lock p50':>9} {'lock p99':>9}")
+    for mode, interval in (("writethrough", 0), ("buffered", args.interval)):
+        with tempfile.TemporaryDirectory() as tmp:
+            env = dict(os.environ, DB_PATH=os.path.join(tmp, "bench.db"), AUTOSAVE_FLUSH_INTERVAL=str(interval))
+            subprocess.run([sys.executable, __file__, "--mode", mode,
+                            "--participants", str(args.participants),
+                            "--requests", str(args.requests),
+                            "--threads", str(args.threads)], env=env, check=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Requests/s for the database-bound hot endpoints, before and after pooling.
+
+Drives /api/contest_status and /api/save_code through Flask's test client
+from several threads. "baseline" swaps the connection pool for the original
+connect-per-use connections on a rollback-journal (journal_mode=DELETE)
+database; every path to SQLite (get_db in each module, the contest state
+cache, init_db) takes its connections from the pool, so all of them switch.
+"pooled" uses core.database as shipped (pooled connections, WAL). Both modes
+write autosaves through and reload the contest state on every request, so
+each request reaches the database. Each mode runs in its own process
+against a fresh temporary database; the last column is the journal mode the
+database actually ran in.
+
+    python3 tools/bench_db.py --participants 100 --requests 2000 --threads 8
+"""
+import argparse
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run(mode, participants, requests, threads):
+    sys.path.insert(0, ROOT)
+    os.chdir(ROOT)
+    import core.database as database
+    from app import app
+
+    if mode == "baseline":
+        database._pool = UnpooledConnections(database.DB_PATH)
+
+    database.init_db()
+    database.set_config("contest_active", "1")
+
+    clients = []
+    for i in range(participants):
+        c = app.test_client()
+        c.post("/register", json={"name": f"p{i}", "college": "c", "system_number": str(i), "phone": f"{i:010d}"})
+        clients.append(c)
+
+    results = {}
+    for endpoint in ("status", "save_code"):
+        per_thread = requests // threads
+        barrier    = threading.Barrier(threads + 1)
+
+        def worker(t):
+            barrier.wait()
+            for n in range(per_thread):
+                c = clients[(t * per_thread + n) % participants]
+                if endpoint == "status":
+                    c.get("/api/contest_status")
+                else:
+                    c.post("/api/save_code", json={"problem_id": 1 + n % 6, "language": "python",
+                                                   "code": f"# draft {n}\n" + "x = 1\n" * 50})
+
+        ts = [threading.Thread(target=worker, args=(t,)) for t in range(threads)]
+        for t in ts:
+            t.start()
+        barrier.wait()
+        t0 = time.perf_counter()
+        for t in ts:
+            t.join()
+        results[endpoint] = per_thread * threads / (time.perf_counter() - t0)
+    conn = sqlite3.connect(database.DB_PATH)
+    journal = conn.execute("PRAGMA journal_mode").fetchone()[0]
+    conn.close()
+    print(f"{mode:<9} {results['status']:>12.0f} {results['save_code']:>12.0f} {journal:>8}")
+
+
+class UnpooledConnections:
+    """core.database's pool as it was before pooling: a new default connection per use, closed after."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def acquire(self):
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=DELETE")
+        return conn
+
+    def release(self, conn):
+        conn.close()
+
+    _connect = acquire
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark DB-bound endpoints.")
+    ap.add_argument("--mode", choices=["baseline", "pooled"])
+    ap.add_argument("--participants", type=int, default=100)
+    ap.add_argument("--requests", type=int, default=2000)
+    ap.add_argument("--threads", type=int, default=8)
+    args = ap.parse_args()
+
+    if args.mode:
+        run(args.mode, args.participants, args.requests, args.threads)
+        return
+
+    print(f"{'mode':<9} {'status req/s':>12} {'save req/s':>12} {'journal':>8}")
+    for mode in ("baseline", "pooled"):
+        with tempfile.TemporaryDirectory() as tmp:
+            env = dict(os.environ, DB_PATH=os.path.join(tmp, "bench.db"),
+                       AUTOSAVE_FLUSH_INTERVAL="0", CONTEST_STATE_MAX_AGE="0")
+            subprocess.run([sys.executable, __file__, "--mode", mode,
+                            "--participants", str(args.participants),
+                            "--requests", str(args.requests),
+                            "--threads", str(args.threads)], env=env, check=True)
+
+
+if __name__ == "__main__":
+    main()
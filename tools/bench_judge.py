@@ -0,0 +1,83 @@
+"""
+Throughput benchmark for the judge backends.
+
+Judges the same stream of submissions (every test case of a problem, like
+/api/submit does) against each backend and reports submissions/s, test
+cases/s and latency percentiles. The result cache is bypassed so every run
+reaches the backend; each submission gets a unique comment so compiled
+languages pay for one compile per submission, as distinct participants would.
+
+    python3 tools/fake_judge0.py &            # or a real Judge0 at JUDGE0_URL
+    python3 tools/bench_judge.py --backends judge0,local --language python -n 40 -c 8
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.problems import get_problem                                  # noqa: E402
+from routes.judge import build_full_code, get_executor, parse_result, normalize_expected  # noqa: E402
+
+SOLUTIONS = {
+    "python": "def sum_even(arr):\n    return sum(x for x in arr if x % 2 == 0)\n",
+    "c":      "int sum_even(int* arr, int n) {\n    int s = 0;\n    for (int i = 0; i < n; i++) if (arr[i] % 2 == 0) s += arr[i];\n    return s;\n}\n",
+    "cpp":    "int sum_even(vector<int>& arr) {\n    int s = 0;\n    for (int x : arr) if (x % 2 == 0) s += x;\n    return s;\n}\n",
+    "java":   "    static int sum_even(int[] arr) {\n        int s = 0;\n        for (int x : arr) if (x % 2 == 0) s += x;\n        return s;\n    }\n",
+}
+COMMENT = {"python": "# {}\n", "c": "// {}\n", "cpp": "// {}\n", "java": "    // {}\n"}
+
+
+def bench(backend, language, submissions, concurrency):
+    executor = get_executor(backend)
+    problem  = get_problem(1)
+    tcs      = problem["visible_test_cases"] + problem["hidden_test_cases"]
+    inputs   = [(i, tc["input"]) for i, tc in enumerate(tcs)]
+
+    def one(n):
+        code = COMMENT[language].format(f"bench {backend} {n} {time.time()}") + SOLUTIONS[language]
+        outs = {}
+        t0   = time.perf_counter()
+        executor.run_batch(build_full_code(problem, language, code), language, inputs, outs.__setitem__)
+        ok = all(parse_result(outs[i].get("stdout")) == normalize_expected(tc["expected"])
+                 for i, tc in enumerate(tcs))
+        return time.perf_counter() - t0, ok
+
+    one(-1)     # warm-up: pool start, JVM/compiler caches
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        runs = list(pool.map(one, range(submissions)))
+    wall = time.perf_counter() - t0
+
+    lat = sorted(r[0] for r in runs)
+    return {
+        "backend":     backend,
+        "ok":          sum(1 for r in runs if r[1]),
+        "subs_per_s":  submissions / wall,
+        "tests_per_s": submissions * len(tcs) / wall,
+        "p50":         statistics.median(lat),
+        "p95":         lat[min(len(lat) - 1, int(len(lat) * 0.95))],
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Compare judge backend throughput.")
+    ap.add_argument("--backends", default="judge0,local")
+    ap.add_argument("--language", default="python", choices=sorted(SOLUTIONS))
+    ap.add_argument("-n", "--submissions", type=int, default=40)
+    ap.add_argument("-c", "--concurrency", type=int, default=8)
+    args = ap.parse_args()
+
+    print(f"{args.submissions} {args.language} submissions, concurrency {args.concurrency}")
+    print(f"{'backend':<8} {'ok':>4} {'subs/s':>8} {'tests/s':>8} {'p50 s':>7} {'p95 s':>7}")
+    for backend in args.backends.split(","):
+        r = bench(backend, args.language, args.submissions, args.concurrency)
+        print(f"{r['backend']:<8} {r['ok']:>4} {r['subs_per_s']:>8.2f} {r['tests_per_s']:>8.1f} "
+              f"{r['p50']:>7.2f} {r['p95']:>7.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Cost of the /metrics instrumentation (core/metrics.py).
+
+Serves a mix of participant and admin requests through Flask's test client
+with METRICS_ENABLED=0 and =1. The two modes alternate in fresh processes,
+each on its own temporary database, and which mode goes first alternates
+between rounds. The script reports CPU time per request for both modes and
+the median of the per-round differences. Because that difference is usually
+within the noise, it also reports a bound: the observations recorded per
+request times the extra cost of one timed SQLite statement (a timer plus a
+histogram update, the most any instrumented call pays).
+
+    python3 tools/bench_metrics.py --requests 3000 --rounds 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# (method, path, JSON body); weights follow the contest mix in tools/loadtest.py
+MIX = (
+    [("GET", "/api/contest_status", None)] * 6
+    + [("GET", "/api/problems", None)] * 2
+    + [("GET", "/api/solved", None)]
+    + [("POST", "/api/save_code", {"problem_id": 1, "language": "python", "code": "def f():\n    return 1\n"})] * 2
+)
+ADMIN_MIX = [("GET", "/api/admin/participants?since=0&limit=500", None), ("GET", "/api/admin/leaderboard", None)]
+
+
+def run(requests):
+    sys.path.insert(0, ROOT)
+    os.chdir(ROOT)
+    from app import app
+
+    admin = app.test_client()
+    admin.post("/admin/login", json={"password": os.environ.get("ADMIN_PASSWORD", "changeme")})
+    admin.post("/api/admin/start_contest")
+    participants = []
+    for i in range(20):
+        c = app.test_client()
+        c.post("/register", json={"name": f"p{i}", "college": "c", "system_number": str(i), "phone": f"{i:010d}"})
+        participants.append(c)
+
+    calls = [(participants[n % 20], *MIX[n % len(MIX)]) for n in range(requests)]
+    calls += [(admin, *ADMIN_MIX[n % 2]) for n in range(requests // 20)]
+    for client, method, path, body in calls[:200]:          # warm up
+        client.open(path, method=method, json=body)
+    t0 = time.process_time()
+    for client, method, path, body in calls:
+        client.open(path, method=method, json=body)
+    per_request = (time.process_time() - t0) / len(calls)
+
+    from core import metrics
+    observed = sum(v["count"] for h in (metrics.http_seconds, metrics.db_acquire, metrics.db_statement)
+                   for v in h.summary().values())
+
+    import sqlite3
+    from core.database import TimedConnection
+    statement = {}
+    for name, factory in (("plain", sqlite3.Connection), ("timed", TimedConnection)):
+        conn = sqlite3.connect(":memory:", factory=factory)
+        t0   = time.perf_counter()
+        for _ in range(50000):
+            conn.execute("SELECT 1")
+        statement[name] = (time.perf_counter() - t0) / 50000
+    print(json.dumps({"per_request": per_request, "statement": statement,
+                      "observations": observed / (len(calls) + 200)}))
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--requests", type=int, default=3000)
+    ap.add_argument("--rounds", type=int, default=5)
+    ap.add_argument("--mode", help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.mode:
+        return run(args.requests)
+
+    results = {"off": [], "on": []}
+    for n in range(args.rounds):
+        modes = (("off", "0"), ("on", "1"))
+        for mode, enabled in (modes if n % 2 else modes[::-1]):
+            env = dict(os.environ, METRICS_ENABLED=enabled, JUDGE_BACKEND="local", PYTHONHASHSEED="0",
+                       DB_PATH=os.path.join(tempfile.mkdtemp(prefix="bench-metrics-"), "bench.db"))
+            out = subprocess.run([sys.executable, __file__, "--mode", mode, "--requests", str(args.requests)],
+                                 env=env, capture_output=True, text=True, check=True).stdout
+            results[mode].append(json.loads(out.strip().splitlines()[-1]))
+
+    off = sorted(r["per_request"] * 1e6 for r in results["off"])
+    on  = sorted(r["per_request"] * 1e6 for r in results["on"])
+    for mode, times in (("off", off), ("on", on)):
+        print(f"metrics {mode:<3}  median {statistics.median(times):7.1f} µs CPU/request  "
+              f"(rounds {times[0]:.1f}-{times[-1]:.1f})")
+    diff = statistics.median((b["per_request"] - a["per_request"]) * 1e6
+                             for a, b in zip(results["off"], results["on"]))
+    base = statistics.median(off)
+    print(f"measured     {diff:+7.1f} µs/request ({diff / base * 100:+.1f}%), median of paired rounds")
+
+    plain    = statistics.median(r["statement"]["plain"] for r in results["on"]) * 1e6
+    timed    = statistics.median(r["statement"]["timed"] for r in results["on"]) * 1e6
+    per_req  = statistics.median(r["observations"] for r in results["on"])
+    bound    = per_req * (timed - plain)
+    print(f"SELECT 1     plain {plain:.2f} µs, timed {timed:.2f} µs ({timed - plain:+.2f} µs per statement)")
+    print(f"bound        {per_req:.2f} timings/request x {timed - plain:.2f} µs = "
+          f"{bound:.1f} µs/request ({bound / base * 100:.2f}%)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Query latency on the submissions table before and after the unique index.
+
+Builds a database with N participants x 6 problems of submissions at schema
+version 1 (no index), times the per-(participant, problem) lookup used by
+open_problem/save_code/submit and the admin leaderboard query, then migrates
+to the latest version and times them again. Each size runs in a temporary
+database file.
+
+    python3 tools/bench_schema.py --sizes 1000,5000,10000 --lookups 2000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBLEMS = 6
+
+LEADERBOARD = """
+    SELECT
+        p.name, p.college, p.system_number,
+        (SELECT COUNT(*) FROM solved s WHERE s.participant_id = p.id)                             AS solved_count,
+        (SELECT COALESCE(SUM(sub.time_taken_seconds), 0) FROM submissions sub WHERE sub.participant_id = p.id) AS total_time,
+        (SELECT COALESCE(SUM(sub.wrong_attempts), 0) FROM submissions sub WHERE sub.participant_id = p.id)     AS total_wrong
+    FROM participants p
+    ORDER BY solved_count DESC, total_time ASC
+"""
+
+
+def populate(conn, participants):
+    rnd = random.Random(participants)
+    conn.executemany(
+        "INSERT INTO participants (name, college, system_number, phone) VALUES (?,?,?,?)",
+        ((f"p{i}", "c", str(i), f"{i:010d}") for i in range(participants)),
+    )
+    subs, solved = [], []
+    for pid in range(1, participants + 1):
+        for prob in range(1, PROBLEMS + 1):
+            passed = rnd.random() < 0.4
+            subs.append((pid, prob, "python", "x = 1\n" * 20, int(passed), rnd.randint(0, 3),
+                         rnd.uniform(10, 3000) if passed else None))
+            if passed:
+                solved.append((pid, prob))
+    rnd.shuffle(subs)       # rows of one participant are not contiguous in practice
+    conn.executemany(
+        "INSERT INTO submissions (participant_id, problem_id, language, code, passed_all, wrong_attempts, time_taken_seconds) "
+        "VALUES (?,?,?,?,?,?,?)", subs)
+    conn.executemany("INSERT INTO solved VALUES (?,?)", solved)
+    conn.commit()
+
+
+def timed(conn, participants, lookups):
+    rnd   = random.Random(0)
+    pairs = [(rnd.randint(1, participants), rnd.randint(1, PROBLEMS)) for _ in range(lookups)]
+    t0 = time.perf_counter()
+    for pair in pairs:
+        conn.execute("SELECT id FROM submissions WHERE participant_id=? AND problem_id=?", pair).fetchone()
+    lookup_us = (time.perf_counter() - t0) / lookups * 1e6
+
+    t0 = time.perf_counter()
+    conn.execute(LEADERBOARD).fetchall()
+    return lookup_us, (time.perf_counter() - t0) * 1000
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark submissions queries against schema versions.")
+    ap.add_argument("--sizes", default="1000,5000,10000")
+    ap.add_argument("--lookups", type=int, default=2000)
+    args = ap.parse_args()
+
+    sys.path.insert(0, ROOT)
+    from core.database import ConnectionPool, migrate, schema_version
+
+    print(f"{'participants':>12} {'schema':>6} {'lookup us':>10} {'leaderboard ms':>15}")
+    for size in (int(s) for s in args.sizes.split(",")):
+        with tempfile.TemporaryDirectory() as tmp:
+            conn = ConnectionPool(os.path.join(tmp, "bench.db"), 1).acquire()
+            migrate(conn, target=1)
+            populate(conn, size)
+            for step in (1, None):
+                migrate(conn, target=step)
+                lookup_us, board_ms = timed(conn, size, args.lookups)
+                print(f"{size:>12} {schema_version(conn):>6} {lookup_us:>10.1f} {board_ms:>15.1f}")
+            conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Inline vs external hidden test data (core/testdata.py).
+
+Builds two copies of one problem with --cases hidden test cases of --mb MB
+of input and --out-mb MB of expected output each: one inline in the problem
+file, one in a test directory with a manifest. For each, a fresh process
+measures loading the problem set (time, resident memory it adds, peak
+Python allocation) and the peak allocation of one submit's work on a case:
+feeding its input to a program (the local judge's runner, here `wc -c`) and
+grading an output equal to the expected one.
+
+    python3 tools/bench_testdata.py --cases 6 --mb 4 --out-mb 1
+"""
+import argparse
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def rss():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * resource.getpagesize()
+
+
+def peak(fn):
+    tracemalloc.start()
+    fn()
+    top = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return top
+
+
+def run(mode):
+    sys.path.insert(0, ROOT)
+    from core import problems
+    from routes.judge import grade
+    from routes.local_judge import _execute
+
+    before = rss()
+    t0     = time.perf_counter()
+    problems.load_problems()
+    load   = time.perf_counter() - t0
+    added  = rss() - before
+    problems._SET = None
+    load_peak = peak(problems.load_problems)
+
+    tc     = problems.get_problem(1)["hidden_test_cases"][-1]
+    stdout = tc["expected"] if isinstance(tc["expected"], str) else tc["expected"].text()
+    limits = (10, None, 64, 30, 256)
+    feed   = peak(lambda: _execute(["wc", "-c"], tc["input"], limits))
+    graded = peak(lambda: grade(tc, {"stdout": stdout}))
+    assert grade(tc, {"stdout": stdout})[0]
+    print(json.dumps({"load_s": load, "rss": added, "load_peak": load_peak, "feed_peak": feed,
+                      "grade_peak": graded}))
+
+
+def build(directory, cases, mb, out_mb):
+    rng     = random.Random(1)
+    problem = json.load(open(os.path.join(ROOT, "data", "problems_fake.json")))[0]
+    problem.pop("hidden_test_dir", None)
+    tests   = os.path.join(directory, "tests")
+    os.makedirs(tests)
+    inline  = []
+    for n in range(cases):
+        numbers = " ".join(str(rng.randint(-10**6, 10**6)) for _ in range(mb * 2**20 // 8))
+        results = "\n".join(f"RESULT:{rng.randint(-10**9, 10**9)}" for _ in range(out_mb * 2**20 // 16))
+        inline.append({"input": f"{len(numbers.split())}\n{numbers}\n", "expected": results + "\n"})
+        with open(os.path.join(tests, f"big-{n}.in"), "w") as f:
+            f.write(inline[-1]["input"])
+        with open(os.path.join(tests, f"big-{n}.out"), "w") as f:
+            f.write(inline[-1]["expected"])
+    sys.path.insert(0, ROOT)
+    from core.testdata import write_manifest
+    write_manifest(tests)
+    with open(os.path.join(directory, "inline.json"), "w") as f:
+        json.dump([dict(problem, hidden_test_cases=problem["hidden_test_cases"] + inline)], f)
+    with open(os.path.join(directory, "external.json"), "w") as f:
+        json.dump([dict(problem, hidden_test_dir="tests")], f)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--cases", type=int, default=6)
+    ap.add_argument("--mb", type=int, default=4, help="input size per case")
+    ap.add_argument("--out-mb", type=int, default=1, help="expected output size per case")
+    ap.add_argument("--mode", help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.mode:
+        return run(args.mode)
+
+    directory = tempfile.mkdtemp(prefix="bench-testdata-")
+    build(directory, args.cases, args.mb, args.out_mb)
+    mb = 2 ** 20
+    print(f"{args.cases} cases x ({args.mb} MB in + {args.out_mb} MB out); "
+          f"inline problem file {os.path.getsize(os.path.join(directory, 'inline.json')) / mb:.1f} MB")
+    for mode in ("inline", "external"):
+        env = dict(os.environ, PROBLEMS_FILE=os.path.join(directory, f"{mode}.json"),
+                   DB_PATH=os.path.join(directory, "bench.db"))
+        out = subprocess.run([sys.executable, __file__, "--mode", mode], env=env, capture_output=True,
+                             text=True, check=True).stdout
+        r   = json.loads(out.strip().splitlines()[-1])
+        print(f"{mode:<9} load {r['load_s'] * 1000:7.1f} ms   resident +{r['rss'] / mb:6.1f} MB   "
+              f"load peak {r['load_peak'] / mb:6.1f} MB   feed input peak {r['feed_peak'] / mb:5.2f} MB   "
+              f"grade peak {r['grade_peak'] / mb:5.2f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""
+Offline checks for the contest export (core/export.py, GET /api/admin/export
+and tools/export.py).
+
+Seeds a temporary database with participants, code and solves, then checks
+that each format round-trips every row (code with newlines, quotes and
+non-ASCII text included), that bad requests are refused, and that an export
+started before a burst of writes contains none of them while the writes
+still commit. It also checks that the memory an export allocates stays flat
+when the contest grows tenfold, and that the CLI writes a valid zip.
+
+    python3 tools/check_export.py
+"""
+import csv
+import io
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import zipfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TMP  = tempfile.mkdtemp(prefix="check-export-")
+sys.path.insert(0, ROOT)
+os.environ["DB_PATH"] = os.path.join(TMP, "check.db")
+os.chdir(ROOT)
+
+from app import app                                   # noqa: E402
+from core import scoreboard                           # noqa: E402
+from core.database import get_db                      # noqa: E402
+from core.export import Export                        # noqa: E402
+
+CODE    = 'def reverse_string(s):\n    # "naïve", 🚀, commas, quotes\n    return s[::-1]\n'
+results = []
+
+
+def check(name, ok, detail=""):
+    results.append(ok)
+    print(f"{'ok  ' if ok else 'FAIL'} {name}" + (f"  ({detail})" if detail else ""))
+
+
+def seed(conn, first, count, code_kb=1):
+    """Participants ``first``.. with a submission per problem, every third problem solved."""
+    body = CODE + "#" * (code_kb * 1024 - len(CODE))
+    conn.execute("BEGIN IMMEDIATE")
+    for n in range(first, first + count):
+        pid = conn.execute("INSERT INTO participants (name, college, system_number, phone, login_time) "
+                           "VALUES (?,?,?,?,?)", (f"crew, \"{n}\"", "Skeld", str(n), f"{n:010d}",
+                                                 "2026-01-01T00:00:00")).lastrowid
+        for problem_id in range(1, 7):
+            solved = (n + problem_id) % 3 == 0
+            conn.execute("INSERT INTO submissions (participant_id, problem_id, language, code, passed_all, "
+                         "wrong_attempts, solved_at, time_taken_seconds) VALUES (?,?,?,?,?,?,?,?)",
+                         (pid, problem_id, "python", body, int(solved), n % 4,
+                          "2026-01-01T00:10:00" if solved else None, 60.0 + n if solved else None))
+            conn.execute("INSERT INTO attempts (participant_id, problem_id, language, code, passed, submitted_at) "
+                         "VALUES (?,?,?,?,?,?)", (pid, problem_id, "python", body, int(solved), "2026-01-01"))
+            if solved:
+                conn.execute("INSERT INTO solved (participant_id, problem_id) VALUES (?,?)", (pid, problem_id))
+    conn.commit()
+
+
+def counts(conn):
+    return {t: conn.execute(f"SELECT COUNT(*) FROM {s}").fetchone()[0]
+            for t, s in (("participants", "participants"), ("submissions", "submissions"),
+                         ("attempts", "attempts"), ("standings", "scoreboard"))}
+
+
+def ndjson_rows(data):
+    lines = [json.loads(line) for line in data.decode("utf-8").splitlines()]
+    by    = {}
+    for row in lines[1:]:
+        by.setdefault(row["table"], []).append(row)
+    return lines[0], by
+
+
+def export_peak(**kwargs):
+    """(peak bytes allocated while exporting, bytes exported)."""
+    export = Export(**kwargs)
+    size   = 0
+    tracemalloc.start()
+    for chunk in export:
+        size += len(chunk)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak, size
+
+
+def main():
+    conn = get_db()
+    seed(conn, 1, 200)
+    want = counts(conn)
+    conn.commit()
+
+    admin = app.test_client()
+    check("the export needs an admin session", admin.get("/api/admin/export").status_code == 401)
+    admin.post("/admin/login", json={"password": os.environ.get("ADMIN_PASSWORD", "changeme")})
+
+    r = admin.get("/api/admin/export")
+    header, rows = ndjson_rows(r.data)
+    check("NDJSON: a header line, then every row of every table",
+          r.status_code == 200 and r.mimetype == "application/x-ndjson" and header["table"] == "export"
+          and {t: len(v) for t, v in rows.items()} == want, str({t: len(v) for t, v in rows.items()}))
+    board = admin.get("/api/admin/leaderboard").get_json()
+    check("standings match the admin leaderboard",
+          [(s["name"], s["solved_count"], s["total_time"]) for s in rows["standings"]]
+          == [(b["name"], b["solved_count"], b["total_time"]) for b in board]
+          and [s["rank"] for s in rows["standings"]] == list(range(1, len(board) + 1)))
+    check("code survives intact", all(s["code"].startswith(CODE) for s in rows["submissions"]))
+
+    r   = admin.get("/api/admin/export?format=csv&tables=submissions")
+    got = list(csv.DictReader(io.StringIO(r.data.decode("utf-8"))))
+    check("CSV: one table, code with newlines and quotes round-trips",
+          r.mimetype == "text/csv" and "submissions-" in r.headers["Content-Disposition"]
+          and len(got) == want["submissions"] and got[0]["code"] == rows["submissions"][0]["code"])
+    check("bad requests are refused with 400", all(admin.get(url).status_code == 400 for url in (
+        "/api/admin/export?format=csv", "/api/admin/export?tables=secrets", "/api/admin/export?format=xml")))
+
+    r = admin.get("/api/admin/export?format=csv&zip=1")
+    z = zipfile.ZipFile(io.BytesIO(r.data))
+    sizes = {name.split(".")[0]: len(list(csv.reader(io.TextIOWrapper(z.open(name), encoding="utf-8")))) - 1
+             for name in z.namelist() if name.endswith(".csv")}
+    check("zip: export.json plus one CSV per table", z.testzip() is None and "export.json" in z.namelist()
+          and sizes == want, str(sizes))
+
+    # A snapshot taken before a burst of writes excludes all of them.
+    version = scoreboard.version(conn)
+    export  = Export()
+    it      = iter(export)
+    first   = next(it)
+    writer  = sqlite3.connect(os.environ["DB_PATH"], timeout=5)
+    t0      = time.perf_counter()
+    seed(writer, 10000, 20)
+    writer.execute("UPDATE submissions SET wrong_attempts = wrong_attempts + 1")
+    writer.commit()
+    wrote   = time.perf_counter() - t0
+    header, rows = ndjson_rows(first + b"".join(it))
+    check("writes commit while an export is streaming", wrote < 2, f"{wrote * 1000:.0f} ms")
+    check("the export shows the database as it was when it started",
+          {t: len(v) for t, v in rows.items()} == want and header["scoreboard_version"] == version and
+          sum(s["total_wrong"] for s in rows["standings"]) == sum(s["wrong_attempts"] for s in rows["submissions"]),
+          str({t: len(v) for t, v in rows.items()}))
+    check("the snapshot is released at the end", export._conn is None)
+
+    # Memory: ten times the contest, about the same allocation.
+    small = export_peak()
+    seed(conn, 20000, 1800)
+    large = export_peak()
+    print(f"     peak allocation {small[0] / 1024:.0f} KiB for {small[1] / 2**20:.1f} MiB, "
+          f"{large[0] / 1024:.0f} KiB for {large[1] / 2**20:.1f} MiB")
+    check("memory use does not grow with the contest", large[0] < small[0] * 1.25 + 64 * 1024)
+
+    out = os.path.join(TMP, "cli.zip")
+    subprocess.run([sys.executable, os.path.join(ROOT, "tools", "export.py"), "--format", "ndjson", "--zip",
+                    "-o", out], check=True, capture_output=True)
+    with zipfile.ZipFile(out) as z:
+        lines = sum(1 for _ in z.open("attempts.ndjson"))
+    check("the CLI writes a zip with every row", lines == counts(conn)["attempts"], f"{lines} attempts")
+
+    failed = results.count(False)
+    print(f"{len(results) - failed}/{len(results)} checks passed")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""
+Scenario checks for the admin gateway client (core/http_client.py).
+
+Starts tools/stub_backend.py in-process on a free port and drives the
+gateway's /api/admin/leaderboard route and its GatewayClient through
+keep-alive reuse, the TTL cache, request coalescing, read and connect
+timeouts, the circuit breaker and stale serving. Prints one line per check
+and exits non-zero if any fails.
+
+    python3 tools/check_gateway.py
+"""
+import os
+import socket
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from stub_backend import make_server                       # noqa: E402
+
+server, stub = make_server("127.0.0.1", 0)
+BASE         = f"http://127.0.0.1:{server.server_address[1]}"
+threading.Thread(target=server.serve_forever, daemon=True).start()
+
+os.environ.update(JAVA_BACKEND_URL=BASE, GATEWAY_READ_TIMEOUT="0.5", GATEWAY_CACHE_TTL="1",
+                  GATEWAY_BREAKER_FAILURES="3", GATEWAY_BREAKER_RESET_SECONDS="1")
+
+from flask import Flask                                     # noqa: E402
+from core.http_client import GatewayClient, UpstreamError  # noqa: E402
+import routes.admin_gateway as gateway                      # noqa: E402
+
+results = []
+
+
+def check(name, ok, detail=""):
+    results.append(ok)
+    print(f"{'ok  ' if ok else 'FAIL'} {name}" + (f"  ({detail})" if detail else ""))
+
+
+def configure(**kw):
+    with stub.lock:
+        for k, v in kw.items():
+            setattr(stub, k, v)
+
+
+def reset():
+    configure(latency=0.0, status=200, requests=0, connections=0)
+
+
+def client(base_url=BASE, **kw):
+    opts = dict(connect_timeout=0.5, read_timeout=0.5, pool_size=8, cache_ttl=0,
+                stale_seconds=60, breaker_failures=3, breaker_reset_seconds=1)
+    opts.update(kw)
+    return GatewayClient("stub", base_url, **opts)
+
+
+def main():
+    app = Flask(__name__)
+    app.secret_key = "check"
+    app.register_blueprint(gateway.admin_bp)
+    web = app.test_client()
+    with web.session_transaction() as s:
+        s["admin"] = True
+
+    # Route: miss then hit, then unauthorized.
+    reset()
+    r1, r2 = web.get("/api/admin/leaderboard"), web.get("/api/admin/leaderboard")
+    check("route serves backend JSON, then from cache",
+          r1.status_code == 200 and r1.json[0]["name"] == "Ada" and r1.headers["X-Cache"] == "MISS"
+          and r2.headers["X-Cache"] == "HIT" and stub.requests == 1,
+          f"{r1.headers.get('X-Cache')}/{r2.headers.get('X-Cache')}, {stub.requests} upstream")
+    check("route requires admin session", app.test_client().get("/api/admin/leaderboard").status_code == 401)
+
+    # Keep-alive: uncached sequential calls reuse one connection.
+    reset()
+    c = client()
+    for _ in range(20):
+        c.get_json("/api/admin/leaderboard")
+    check("20 sequential calls reuse pooled connections",
+          stub.requests == 20 and stub.connections == 1, f"{stub.connections} connection(s)")
+
+    # Coalescing: 20 concurrent misses make one upstream call.
+    reset()
+    configure(latency=0.2)
+    c       = client(cache_ttl=5)
+    sources = []
+    ts      = [threading.Thread(target=lambda: sources.append(c.get_json("/api/admin/leaderboard")[2]))
+               for _ in range(20)]
+    for t in ts:
+        t.start()
+    for t in ts:
+        t.join()
+    check("20 concurrent misses coalesce into one upstream call",
+          stub.requests == 1 and len(sources) == 20, f"{stub.requests} upstream, {c.coalesced} coalesced")
+
+    # TTL: a hit within the TTL, a refetch after it.
+    reset()
+    c = client(cache_ttl=0.3)
+    a = c.get_json("/api/admin/leaderboard")[2]
+    b = c.get_json("/api/admin/leaderboard")[2]
+    time.sleep(0.35)
+    d = c.get_json("/api/admin/leaderboard")[2]
+    check("cache entry expires after its TTL", (a, b, d) == ("miss", "hit", "miss") and stub.requests == 2,
+          f"{a}/{b}/{d}")
+
+    # Read timeout: a hung backend fails within the timeout and stale is served.
+    reset()
+    c = client()
+    c.get_json("/api/admin/leaderboard")
+    configure(latency=3)
+    t0 = time.monotonic()
+    status, body, source = c.get_json("/api/admin/leaderboard")
+    took = time.monotonic() - t0
+    check("read timeout bounds a hung call and serves stale",
+          source == "stale" and body[0]["name"] == "Ada" and took < 1.0, f"{took * 1000:.0f} ms")
+
+    # Breaker: opens after 3 failures, stops calling upstream, recovers half-open.
+    reset()
+    c = client()
+    c.get_json("/api/admin/leaderboard")
+    configure(status=500, requests=0)
+    sources = [c.get_json("/api/admin/leaderboard")[2] for _ in range(10)]
+    check("breaker opens after 3 failures and serves stale meanwhile",
+          c.breaker.state == "open" and stub.requests == 3 and set(sources) == {"stale"},
+          f"{stub.requests} upstream for 10 calls, breaker {c.breaker.state}")
+    configure(status=200)
+    time.sleep(1.05)
+    source = c.get_json("/api/admin/leaderboard")[2]
+    check("half-open trial closes the breaker once the backend recovers",
+          source == "miss" and c.breaker.state == "closed")
+
+    # No cached copy: outage is an error (503 on the route).
+    reset()
+    configure(status=503)
+    try:
+        client().get_json("/api/admin/leaderboard")
+        raised = False
+    except UpstreamError:
+        raised = True
+    check("outage with nothing cached raises UpstreamError", raised)
+
+    # Connect failure: nothing listening fails fast.
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        dead = f"http://127.0.0.1:{s.getsockname()[1]}"
+    c  = client(base_url=dead)
+    t0 = time.monotonic()
+    try:
+        c.get_json("/api/admin/leaderboard")
+    except UpstreamError:
+        pass
+    check("refused connection fails fast", time.monotonic() - t0 < 0.5, f"{(time.monotonic() - t0) * 1000:.0f} ms")
+
+    # Stats endpoint.
+    stats = web.get("/api/admin/gateway_stats").json[0]
+    check("gateway_stats reports latency and cache counters",
+          stats["latency"]["calls"] >= 1 and stats["latency"]["p50_ms"] is not None and stats["cache_hits"] >= 1)
+
+    failed = results.count(False)
+    print(f"{len(results) - failed}/{len(results)} checks passed")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""
+Fault-injection checks for the Judge0 client (routes/judge0.py).
+
+Starts tools/fake_judge0.py in-process and judges problem 1 through the
+Judge0 executor and the /api/submit route while the fake judge fails,
+throttles and drops requests. Checks that transient faults are retried into
+correct verdicts, that concurrency toward the judge stays bounded, that an
+outage yields "Judge Unavailable" verdicts without charging a wrong attempt,
+that the circuit breaker stops calling a dead judge, and that it recovers.
+A judge that answers 500 or rejects a batch must not charge one either.
+Problems are judged without their file-backed test cases (hidden_test_dir):
+those exercise test data handling, not the client, and their size would
+make the fault-injected runs slow.
+
+    python3 tools/check_judge_client.py
+"""
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_judge0 import Faults, serve                     # noqa: E402
+
+faults = Faults()
+server = serve(port=0, workers=4, faults=faults)
+threading.Thread(target=server.serve_forever, daemon=True).start()
+
+tmp = tempfile.mkdtemp(prefix="check-judge-")
+with open(os.path.join(ROOT, os.environ.get("PROBLEMS_FILE", os.path.join("data", "problems_fake.json")))) as f:
+    problems = json.load(f)
+for p in problems:
+    p.pop("hidden_test_dir", None)
+with open(os.path.join(tmp, "problems.json"), "w") as f:
+    json.dump(problems, f)
+os.environ.update(
+    PROBLEMS_FILE=os.path.join(tmp, "problems.json"),
+    JUDGE0_URL=f"http://127.0.0.1:{server.server_address[1]}", JUDGE_BACKEND="judge0",
+    DB_PATH=os.path.join(tmp, "check.db"), JUDGE_PRECOMPILE_LANGUAGES="",
+    JUDGE0_MAX_CONCURRENCY="4", JUDGE0_RETRIES="4", JUDGE0_RETRY_BASE_SECONDS="0.05",
+    JUDGE0_RETRY_MAX_SECONDS="1", JUDGE0_BREAKER_FAILURES="3", JUDGE0_BREAKER_RESET_SECONDS="1",
+    JUDGE0_POLL_INTERVAL="0.05", JUDGE0_TIMEOUT_SECONDS="10", AUTOSAVE_FLUSH_INTERVAL="0",
+)
+os.chdir(ROOT)
+
+from app import app                                         # noqa: E402
+from core.database import get_db, init_db, set_config       # noqa: E402
+from core.problems import get_problem                       # noqa: E402
+from routes.judge import (STATUS_ACCEPTED, STATUS_UNAVAILABLE, build_full_code,  # noqa: E402
+                          get_executor, parse_result, normalize_expected)
+from routes.judge0 import judge0_client                     # noqa: E402
+
+SOLUTION = "def sum_even(arr):\n    return sum(x for x in arr if x % 2 == 0)\n"
+WRONG    = "def sum_even(arr):\n    return 0\n"
+
+results = []
+
+
+def check(name, ok, detail=""):
+    results.append(ok)
+    print(f"{'ok  ' if ok else 'FAIL'} {name}" + (f"  ({detail})" if detail else ""))
+
+
+def judge(n, code=SOLUTION):
+    """Judge every test case of problem 1 once, bypassing the result cache."""
+    problem = get_problem(1)
+    tcs     = problem["visible_test_cases"] + problem["hidden_test_cases"]
+    outs    = {}
+    full    = build_full_code(problem, "python", f"# {n} {time.time()}\n" + code)
+    get_executor().run_batch(full, "python", list(enumerate(tc["input"] for tc in tcs)), outs.__setitem__)
+    return [(outs[i], tc) for i, tc in enumerate(tcs)]
+
+
+def status_of(out):
+    return (out.get("status") or {}).get("id")
+
+
+def submit(client, code):
+    r = client.post("/api/submit", json={"problem_id": 1, "language": "python", "code": code})
+    data = r.get_json()
+    while data.get("status") in ("queued", "running"):
+        time.sleep(0.05)
+        data = client.get(f"/api/submit/{data['job_id']}").get_json()
+    return data
+
+
+def wrong_attempts(pid):
+    row = get_db().execute("SELECT wrong_attempts FROM submissions WHERE participant_id=? AND problem_id=1",
+                           (pid,)).fetchone()
+    return row[0] if row else 0
+
+
+def main():
+    # Transient faults are retried into correct verdicts, within the concurrency cap.
+    faults.update({"fail_rate": 0.1, "throttle_rate": 0.05, "drop_rate": 0.05, "reset_counters": True})
+    with ThreadPoolExecutor(12) as pool:
+        runs = list(pool.map(judge, range(24)))
+    outs = [pair for run in runs for pair in run]
+    good = sum(status_of(o) == STATUS_ACCEPTED and parse_result(o.get("stdout")) == normalize_expected(tc["expected"])
+               for o, tc in outs)
+    seen = faults.to_dict()
+    check("flaky judge: every test case still gets its real verdict", good == len(outs),
+          f"{good}/{len(outs)} correct, {judge0_client.retried} retries, {seen['injected']} faults injected")
+    check("requests in flight never exceed JUDGE0_MAX_CONCURRENCY", seen["max_in_flight"] <= 4,
+          f"peak {seen['max_in_flight']}")
+
+    # A dead judge yields unavailable verdicts and trips the breaker.
+    faults.update({"fail_rate": 1.0, "throttle_rate": 0, "drop_rate": 0, "reset_counters": True})
+    outs = [o for n in range(3) for o, _ in judge(100 + n)]
+    check("dead judge: verdicts are Judge Unavailable", all(status_of(o) == STATUS_UNAVAILABLE for o in outs))
+    check("breaker opens after repeated exhausted calls", judge0_client.breaker.state == "open",
+          judge0_client.breaker.state)
+    before = faults.to_dict()["requests"]
+    t0     = time.monotonic()
+    outs   = [o for o, _ in judge(200)]
+    check("open breaker fails fast without calling the judge",
+          faults.to_dict()["requests"] == before and time.monotonic() - t0 < 0.1
+          and all(status_of(o) == STATUS_UNAVAILABLE for o in outs),
+          f"{(time.monotonic() - t0) * 1000:.0f} ms")
+
+    # Through /api/submit: an outage never costs a wrong attempt.
+    init_db()
+    set_config("contest_active", "1")
+    web = app.test_client()
+    web.post("/register", json={"name": "p", "college": "c", "system_number": "1", "phone": "0000000001"})
+    with web.session_transaction() as s:
+        pid = s["participant_id"]
+    data = submit(web, WRONG)
+    check("submit during an outage is reported, not judged",
+          data.get("judge_unavailable") is True and data.get("error") and not data.get("all_passed"))
+    check("submit during an outage does not count as a wrong attempt", wrong_attempts(pid) == 0,
+          f"wrong_attempts={wrong_attempts(pid)}")
+
+    # Recovery: after the reset window a trial call closes the breaker.
+    faults.update({"fail_rate": 0})
+    time.sleep(1.1)
+    data = submit(web, WRONG)
+    check("breaker closes once the judge is back", judge0_client.breaker.state == "closed")
+    check("a real wrong answer still counts", data.get("all_passed") is False and wrong_attempts(pid) == 1,
+          f"wrong_attempts={wrong_attempts(pid)}")
+    data = submit(web, SOLUTION)
+    check("a correct submission is accepted", data.get("all_passed") is True)
+
+    # Faults that are not worth a retry still leave the attempt unjudged.
+    web = app.test_client()
+    web.post("/register", json={"name": "q", "college": "c", "system_number": "2", "phone": "0000000002"})
+    with web.session_transaction() as s:
+        pid = s["participant_id"]
+    for fault, name in (("error_rate", "judge answering 500"), ("reject_rate", "judge rejecting the batch")):
+        faults.update({fault: 1.0})
+        data = submit(web, f"# {fault}\n" + SOLUTION)
+        faults.update({fault: 0})
+        check(f"{name}: submit is reported, not judged", data.get("judge_unavailable") is True,
+              data.get("error") or data.get("all_passed"))
+        check(f"{name}: no wrong attempt is charged", wrong_attempts(pid) == 0,
+              f"wrong_attempts={wrong_attempts(pid)}")
+
+    failed = results.count(False)
+    print(f"{len(results) - failed}/{len(results)} checks passed")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+"""
+Offline checks for the bulk rejudge (routes/rejudge.py).
+
+Participants submit to problem 2 while one of its hidden test cases expects
+the wrong output, judged by an in-process stub judge that runs the Python
+programs with this interpreter. The script then corrects the test case,
+rejudges through the admin endpoint and checks that solves, wrong attempts,
+times and the scoreboard are corrected and that identical programs are
+judged once, at most REJUDGE_WORKERS at a time. It also checks that a
+stopped run resumes without judging an applied program again, and that a
+program the judge could not grade keeps its verdict until a resume grades
+it.
+
+    python3 tools/check_rejudge.py
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TMP  = tempfile.mkdtemp(prefix="check-rejudge-")
+sys.path.insert(0, ROOT)
+os.environ.update(DB_PATH=os.path.join(TMP, "check.db"), PROBLEMS_FILE=os.path.join(TMP, "problems.json"),
+                  JUDGE_BACKEND="stub", RESULT_CACHE_MAX_MB="0", PROBLEMS_RELOAD_INTERVAL="0",
+                  REJUDGE_WORKERS="2", REJUDGE_CHECKPOINT_SECONDS="0.2")
+os.chdir(ROOT)
+
+with open(os.path.join(ROOT, "data", "problems_fake.json")) as f:
+    PROBLEMS = json.load(f)
+SKELD = next(tc for tc in PROBLEMS[1]["hidden_test_cases"] if tc["input"] == "skeld")
+for problem in PROBLEMS:                 # the copy lives elsewhere; keep its test files found
+    if "hidden_test_dir" in problem:
+        problem["hidden_test_dir"] = os.path.join(ROOT, "data", problem["hidden_test_dir"])
+
+REVERSE   = "def reverse_string(s):\n    return s[::-1]\n"
+REVERSED  = "def reverse_string(s):\n    return ''.join(reversed(s))\n"
+IDENTITY  = "def reverse_string(s):\n    return s\n"
+HARDCODED = "def reverse_string(s):\n    return 'dlelks' if s == 'skeld' else s[::-1]\n"
+SUM_EVEN  = "def sum_even(arr):\n    return sum(x for x in arr if x % 2 == 0)\n"
+
+results = []
+
+
+def check(name, ok, detail=""):
+    results.append(ok)
+    print(f"{'ok  ' if ok else 'FAIL'} {name}" + (f"  ({detail})" if detail else ""))
+
+
+def write_problems(expected):
+    SKELD["expected"] = expected
+    with open(os.environ["PROBLEMS_FILE"] + ".tmp", "w") as f:
+        json.dump(PROBLEMS, f)
+    os.replace(os.environ["PROBLEMS_FILE"] + ".tmp", os.environ["PROBLEMS_FILE"])
+
+
+write_problems("RESULT:dlelks")          # the bug: "skeld" reversed is "dleks"
+
+from routes.judge import (Executor, make_result, error_result, unavailable_result,       # noqa: E402
+                          STATUS_ACCEPTED, STATUS_NZEC, _EXECUTORS)
+
+
+class StubJudge(Executor):
+    """Runs Python programs with this interpreter and records every batch it is given."""
+
+    name = "stub"
+
+    def __init__(self):
+        self.lock          = threading.Lock()
+        self.batches       = []
+        self.in_flight     = 0
+        self.max_in_flight = 0
+        self.delay         = 0.0
+        self.down          = False
+        self.broken        = False
+
+    def run_batch(self, full_code, language, items, finish):
+        with self.lock:
+            self.batches.append(full_code)
+            self.in_flight    += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            time.sleep(self.delay)
+            for i, stdin in items:
+                if self.down:
+                    finish(i, unavailable_result("stub judge is down"))
+                    continue
+                if self.broken:
+                    finish(i, error_result("stub judge is broken"))
+                    continue
+                r = subprocess.run([sys.executable, "-c", full_code],
+                                   input=stdin if isinstance(stdin, str) else stdin.text(),
+                                   capture_output=True, text=True, timeout=10)
+                finish(i, make_result(STATUS_ACCEPTED if r.returncode == 0 else STATUS_NZEC,
+                                      stdout=r.stdout, stderr=r.stderr or None))
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+    def reset(self, delay=0.0):
+        with self.lock:
+            self.batches, self.max_in_flight, self.delay = [], 0, delay
+
+
+stub = _EXECUTORS["stub"] = StubJudge()
+
+from app import app                                                    # noqa: E402
+from core import scoreboard                                            # noqa: E402
+from core.database import get_db, set_config                           # noqa: E402
+from routes import rejudge                                             # noqa: E402
+
+
+def submit(client, problem_id, code, active_seconds):
+    r = client.post("/api/submit", json={"problem_id": problem_id, "language": "python", "code": code,
+                                         "active_seconds": active_seconds})
+    job = r.get_json()["job_id"]
+    while True:
+        d = client.get(f"/api/submit/{job}").get_json()
+        if d["status"] in ("done", "failed"):
+            return d
+        time.sleep(0.02)
+
+
+def state(name, problem_id=2):
+    """(solved, wrong attempts, time taken) of a participant on a problem."""
+    row = get_db().execute("""
+        SELECT sol.problem_id IS NOT NULL AS solved, s.wrong_attempts, s.time_taken_seconds
+          FROM participants p
+          JOIN submissions s ON s.participant_id = p.id AND s.problem_id = ?
+          LEFT JOIN solved sol ON sol.participant_id = p.id AND sol.problem_id = s.problem_id
+         WHERE p.name = ?""", (problem_id, name)).fetchone()
+    get_db().commit()
+    return bool(row["solved"]), row["wrong_attempts"], row["time_taken_seconds"]
+
+
+def wait_for(client, rejudge_id):
+    while True:
+        d = client.get(f"/api/admin/rejudge?id={rejudge_id}").get_json()
+        if d["status"] != "running":
+            return d
+        time.sleep(0.05)
+
+
+def main():
+    set_config("contest_active", "1")
+    attempts = {
+        "alice": [(REVERSE, 100)],
+        "bob":   [(IDENTITY, 40), (REVERSE, 200)],
+        "carol": [(HARDCODED, 50)],
+        "dave":  [(IDENTITY, 30)],
+        "erin":  [(REVERSED, 70)],
+    }
+    attempts.update({f"crew{n}": [(REVERSE, 300 + n)] for n in range(12)})
+    for n, (name, subs) in enumerate(attempts.items()):
+        client = app.test_client()
+        client.post("/register", json={"name": name, "college": "c", "system_number": str(n), "phone": f"{n:010d}"})
+        for code, seconds in subs:
+            submit(client, 2, code, seconds)
+        if name == "alice":
+            submit(client, 1, SUM_EVEN, 10)
+    check("with the wrong expected value only the hard-coded answer is accepted",
+          state("alice") == (False, 1, None) and state("carol") == (True, 0, 50) and state("bob")[:2] == (False, 2))
+
+    # Fix the test case and rejudge problem 2 through the endpoint.
+    write_problems("RESULT:dleks")
+    stub.reset(delay=0.1)
+    admin = app.test_client()
+    admin.post("/admin/login", json={"password": os.environ.get("ADMIN_PASSWORD", "changeme")})
+    etag  = admin.get("/api/admin/leaderboard").headers["ETag"]
+    r     = admin.post("/api/admin/rejudge", json={"problem_ids": [2]})
+    busy  = admin.post("/api/admin/rejudge", json={"problem_ids": [2]}).status_code
+    done  = wait_for(admin, r.get_json()["id"])
+    print(f"     rejudge: {json.dumps({k: done[k] for k in ('status', 'total', 'done', 'changed', 'gained', 'lost')})}")
+    check("the rejudge is accepted with 202 and a second one is refused while it runs",
+          r.status_code == 202 and busy == 409, f"{r.status_code}, {busy}")
+    check("a correct answer judged wrong becomes a solve with its own time", state("alice") == (True, 0, 100.0),
+          str(state("alice")))
+    check("a later correct attempt solves, earlier real failures stay wrong", state("bob") == (True, 1, 200.0),
+          str(state("bob")))
+    check("an answer fitted to the wrong expected value loses its solve", state("carol") == (False, 1, None),
+          str(state("carol")))
+    check("an attempt that still fails is untouched", state("dave") == (False, 1, None), str(state("dave")))
+    check("other problems are not rejudged", state("alice", 1) == (True, 0, 10.0) and get_db().execute(
+        "SELECT COUNT(*) FROM attempts WHERE problem_id=1 AND rejudged_by IS NOT NULL").fetchone()[0] == 0)
+    check("verdict counts: 16 attempts flipped, 15 solves gained, 1 lost",
+          (done["changed"], done["gained"], done["lost"]) == (16, 15, 1),
+          f"{done['changed']}, {done['gained']}, {done['lost']}")
+    check("identical programs are judged once", done["total"] == 4 and len(stub.batches) == 4,
+          f"{sum(len(s) for s in attempts.values())} attempts, {done['total']} programs, {len(stub.batches)} judged")
+    check("the scoreboard matches a from-scratch aggregate and its ETag changed",
+          not scoreboard.check(get_db()) and admin.get("/api/admin/leaderboard").headers["ETag"] != etag)
+
+    # Stop a slow run part-way, then resume it.
+    stub.reset(delay=0.3)
+    run = rejudge.start([1, 2], workers=2)
+    while rejudge.status(run.id)["done"] < 2:
+        time.sleep(0.05)
+    run.stop()
+    run.finished.wait(10)
+    stopped = rejudge.status(run.id)
+    applied = {r[0] for r in get_db().execute("SELECT DISTINCT code FROM attempts WHERE rejudged_by=?", (run.id,))}
+    get_db().commit()
+    while stub.in_flight:                    # programs judged past the stop are discarded
+        time.sleep(0.05)
+    check("a stopped run is interrupted, resumable and keeps what it applied",
+          stopped["status"] == "interrupted" and stopped["resumable"] and 0 < stopped["done"] < stopped["total"],
+          f"{stopped['done']}/{stopped['total']}")
+    stub.reset()
+    resumed = wait_for(admin, admin.post("/api/admin/rejudge", json={"resume": run.id}).get_json()["id"])
+    again   = [code for code in applied if any(code in full for full in stub.batches)]
+    check("the resumed run finishes without judging an applied program again",
+          resumed["status"] == "done" and resumed["done"] == resumed["total"] and not again,
+          f"{len(applied)} applied before the stop, {len(stub.batches)} judged after")
+    check("at most REJUDGE_WORKERS programs are judged at once", stub.max_in_flight <= 2, str(stub.max_in_flight))
+
+    # An internal error from the judge is no verdict: nothing is revoked.
+    write_problems("RESULT:dlelks")
+    board       = admin.get("/api/admin/leaderboard").get_json()
+    stub.broken = True
+    broken      = wait_for(admin, admin.post("/api/admin/rejudge", json={"problem_ids": [2]}).get_json()["id"])
+    stub.broken = False
+    check("internal errors from the judge keep solves and scores",
+          broken["errors"] == broken["total"] and broken["changed"] == 0 and state("alice") == (True, 0, 100.0)
+          and admin.get("/api/admin/leaderboard").get_json() == board,
+          f"{broken['errors']} errors, {broken['changed']} changed, alice {state('alice')}")
+
+    # A judge outage leaves the verdicts alone until a resume can grade them.
+    stub.down = True
+    outage    = wait_for(admin, admin.post("/api/admin/rejudge", json={"problem_ids": [2]}).get_json()["id"])
+    check("programs the judge could not grade keep their verdicts",
+          outage["errors"] == outage["total"] and outage["changed"] == 0 and outage["resumable"]
+          and state("alice") == (True, 0, 100.0), f"{outage['errors']} errors, {outage['changed']} changed")
+    stub.down = False
+    retried   = wait_for(admin, admin.post("/api/admin/rejudge", json={"resume": outage["id"]}).get_json()["id"])
+    check("resuming after the outage grades them", retried["errors"] == 0 and state("alice") == (False, 1, None)
+          and state("carol") == (True, 0, 50.0), f"alice {state('alice')}, carol {state('carol')}")
+    check("the scoreboard still matches", not scoreboard.check(get_db()))
+
+    failed = results.count(False)
+    print(f"{len(results) - failed}/{len(results)} checks passed")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+Fairness and admission checks for the judge scheduler (core/jobs.py).
+
+Drives a JobQueue with sleep-only jobs: one participant floods it with runs
+while others queue a few, and the script checks that the others are served
+round-robin instead of behind the flood, that submits overtake queued runs,
+and that the in-flight and token-bucket limits answer 429 with a retry hint.
+Two queues stand in for two worker processes to check that the buckets are
+shared and that a job left running by a dead process stops blocking its
+participant. Finally it replays the flood through /api/run with the real limits and
+reports how many requests were throttled.
+
+    python3 tools/check_scheduler.py
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("DB_PATH", os.path.join(tempfile.mkdtemp(prefix="check-sched-"), "check.db"))
+os.environ.setdefault("JUDGE_BACKEND", "local")
+os.chdir(ROOT)
+
+from core.database import init_db                           # noqa: E402
+from core.jobs import JobQueue, QueueFull                  # noqa: E402
+
+results = []
+
+
+def check(name, ok, detail=""):
+    results.append(ok)
+    print(f"{'ok  ' if ok else 'FAIL'} {name}" + (f"  ({detail})" if detail else ""))
+
+
+def queue(in_flight=100, per_minute=6000, burst=100, workers=1):
+    limits = {"submit": (in_flight, per_minute, burst), "run": (in_flight, per_minute, burst)}
+    return JobQueue(workers, capacity=1000, limits=limits, ttl_seconds=60)
+
+
+def drain(q):
+    while q.depth() or q.stats()["running"]:
+        time.sleep(0.01)
+
+
+def main():
+    init_db()
+    order = []
+    lock  = threading.Lock()
+
+    def job(tag, seconds=0.01):
+        def fn(_job):
+            with lock:
+                order.append(tag)
+            time.sleep(seconds)
+        return fn
+
+    # A blocker holds the only worker while everything else queues up.
+    q     = queue()
+    gate  = threading.Event()
+    q.submit(0, 1, lambda _j: gate.wait(), kind="run")
+    time.sleep(0.05)
+    for n in range(20):
+        q.submit(1, 1, job(("spam", n)), kind="run")
+    others = [q.submit(p, 1, job(("other", p)), kind="run") for p in range(2, 7)]
+    late   = q.submit(9, 1, job(("submit", 9)), kind="submit")
+    check("queue position accounts for round-robin and priority",
+          q.ahead(others[-1]) == 6 and q.ahead(late) == 0,
+          f"last other has {q.ahead(others[-1])} ahead, submit has {q.ahead(late)}")
+    gate.set()
+    drain(q)
+    first = order.index(("submit", 9))
+    last  = max(order.index(("other", p)) for p in range(2, 7))
+    check("a submit queued last is served before every queued run", first == 0, f"position {first}")
+    check("other participants are not stuck behind one participant's flood",
+          last <= 6, f"last of them served {last + 1}th of {len(order)}")
+    wait = q.stats()["wait"]
+    check("wait times are recorded per kind", wait["run"]["calls"] == 26 and wait["submit"]["calls"] == 1)
+
+    # In-flight limit.
+    q = limited = queue(in_flight=1)
+    q.submit(1, 1, job("a", 0.2), kind="run")
+    try:
+        q.submit(1, 1, job("b"), kind="run")
+        status = None
+    except QueueFull as e:
+        status = (e.status, e.retry_after)
+    try:
+        q.submit(1, 1, job("c"), kind="submit")
+        submit_ok = True
+    except QueueFull:
+        submit_ok = False
+    check("second concurrent run is refused with 429", status is not None and status[0] == 429, str(status))
+    check("a submit is not blocked by the participant's pending run", submit_ok)
+
+    # Token bucket: burst of 3, then 6/minute. The buckets live in the
+    # database, so this uses a participant of its own.
+    q       = queue(per_minute=6, burst=3)
+    refused = None
+    for n in range(5):
+        try:
+            q.submit(20, 1, job(("bucket", n), 0), kind="run")
+        except QueueFull as e:
+            refused = (n, e.status, e.retry_after)
+            break
+    check("token bucket allows the burst, then throttles with retry-after",
+          refused is not None and refused[0] == 3 and refused[1] == 429 and 1 <= refused[2] <= 10, str(refused))
+
+    # Two queues, as in two worker processes, draw on one bucket.
+    a, b     = queue(per_minute=6, burst=3), queue(per_minute=6, burst=3)
+    accepted = 0
+    try:
+        for q2 in (a, b, a, b):
+            q2.submit(21, 1, job(("shared", accepted), 0), kind="run")
+            accepted += 1
+    except QueueFull:
+        pass
+    check("the token bucket is shared across processes", accepted == 3, f"{accepted} accepted")
+
+    # A job row left running by a process that died stops counting once stale.
+    from core.database import get_db
+    stale = time.time() - 60
+    conn  = get_db()
+    conn.execute("INSERT INTO jobs (id, participant_id, kind, status, total, created_at, updated_at) "
+                 "VALUES ('lost', 22, 'submit', 'running', 1, ?, ?)", (stale, stale))
+    conn.commit()
+    c = JobQueue(1, capacity=10, limits={"submit": (1, 6000, 100), "run": (1, 6000, 100)}, ttl_seconds=300,
+                 stale_seconds=30)
+    shown = c.get("lost").status
+    try:
+        c.submit(22, 1, job("after-lost", 0), kind="submit")
+        recovered = True
+    except QueueFull:
+        recovered = False
+    check("a job lost with its worker process is failed and frees the participant",
+          shown == "failed" and recovered, f"polled as {shown}")
+    for q2 in (limited, q, a, b, c):
+        drain(q2)   # their rows count towards in-flight limits below
+
+    # Through the route: a burst of Run clicks with the default limits.
+    from app import app
+    from core.database import set_config
+    from core.jobs import judge_queue
+    set_config("contest_active", "1")
+    web = app.test_client()
+    web.post("/register", json={"name": "s", "college": "c", "system_number": "1", "phone": "0000000001"})
+    codes = []
+    for _ in range(10):
+        r = web.post("/api/run", json={"problem_id": 1, "language": "python", "code": "def sum_even(arr):\n    return 0\n"})
+        codes.append((r.status_code, r.headers.get("Retry-After"), (r.get_json() or {}).get("status")))
+    accepted  = sum(c == 202 for c, _, _ in codes)
+    throttled = [c for c in codes if c[0] == 429]
+    check("/api/run: rapid clicks beyond the limits get 429, Retry-After and status 'throttled'",
+          accepted >= 1 and throttled and all(h and s == "throttled" for _, h, s in throttled),
+          f"{accepted} queued, {len(throttled)} throttled")
+    drain(judge_queue)
+
+    failed = results.count(False)
+    print(f"{len(results) - failed}/{len(results)} checks passed")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+"""
+Verify the materialized scoreboard against a from-scratch aggregate.
+
+Exits 1 and lists the differences when the board has drifted; --repair then
+rebuilds it from solved/submissions.
+
+    python3 tools/check_scoreboard.py [--repair]
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core import scoreboard                 # noqa: E402
+from core.database import get_db, init_db   # noqa: E402
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Check the scoreboard table against solved/submissions.")
+    ap.add_argument("--repair", action="store_true", help="rebuild the scoreboard if it differs")
+    args = ap.parse_args()
+
+    init_db()
+    conn     = get_db()
+    problems = scoreboard.check(conn)
+    if not problems:
+        print(f"scoreboard consistent (version {scoreboard.version(conn)})")
+        return
+    for line in problems:
+        print(line)
+    if args.repair:
+        scoreboard.rebuild(conn)
+        problems = scoreboard.check(conn)
+        print("rebuilt" if not problems else f"still inconsistent after rebuild: {len(problems)} differences")
+    sys.exit(1 if problems else 0)
+
+
+if __name__ == "__main__":
+    main()
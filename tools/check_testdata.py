@@ -0,0 +1,58 @@
+"""
+Validate the external test data of the problem file (core/testdata.py).
+
+For every problem with a "hidden_test_dir", checks each file its manifest
+lists: present, of the listed size and sha256, valid UTF-8, and (for
+expected outputs) holding a RESULT: line to compare against. Exits 1 and
+lists what is wrong otherwise. --manifest DIR first (re)writes DIR's
+manifest from its <name>.in / <name>.out pairs; do that after adding or
+editing test files, since a running server only reloads when the manifest
+changes.
+
+    python3 tools/check_testdata.py [--manifest data/tests/1]
+"""
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.config import PROBLEMS_FILE              # noqa: E402
+from core.testdata import verify, write_manifest   # noqa: E402
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Validate external test data against its manifests.")
+    ap.add_argument("--manifest", metavar="DIR", action="append", default=[],
+                    help="rewrite DIR's manifest.json from its files first (repeatable)")
+    args = ap.parse_args()
+
+    for directory in args.manifest:
+        cases = write_manifest(directory)
+        print(f"wrote {os.path.join(directory, 'manifest.json')}: {len(cases)} cases")
+
+    with open(PROBLEMS_FILE) as f:
+        problems = json.load(f)
+    base  = os.path.dirname(PROBLEMS_FILE)
+    found = []
+    for p in problems:
+        if not p.get("hidden_test_dir"):
+            continue
+        directory = os.path.join(base, p["hidden_test_dir"])
+        errors    = verify(directory)
+        found    += errors
+        if not errors:
+            with open(os.path.join(directory, "manifest.json")) as f:
+                cases = json.load(f)["cases"]
+            size = sum(c["input_bytes"] + c["expected_bytes"] for c in cases)
+            print(f"problem {p['id']}: {len(cases)} cases in {directory} ({size / 1024:.0f} KiB) ok")
+    for line in found:
+        print(line)
+    if not any(p.get("hidden_test_dir") for p in problems):
+        print(f"no problem in {PROBLEMS_FILE} has a hidden_test_dir")
+    sys.exit(1 if found else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Crash-consistency check for the autosave write-behind buffer.
+
+Each round starts a child process that saves numbered drafts for several
+(participant, problem) pairs as fast as it can, logging every acknowledged
+save, and SIGKILLs it at a random moment. The database must then pass
+integrity_check, and for every pair the stored draft must be one that was
+acknowledged, no newer than the last acknowledged one, and no older than
+the last one acknowledged two flush intervals before the kill.
+
+A final check confirms that a buffered draft flushed after a later submit
+does not overwrite the submitted code.
+
+    python3 tools/crash_autosave.py --rounds 20 --interval 0.2
+"""
+import argparse
+import os
+import random
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+ROOT  = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PAIRS = [(p, q) for p in range(1, 6) for q in range(1, 7)]
+
+
+def child(ack_path):
+    sys.path.insert(0, ROOT)
+    from core.autosave import autosave_buffer
+    from core.database import get_db, init_db
+
+    init_db()
+    conn = get_db()
+    conn.executemany("INSERT INTO participants (name, college, system_number, phone) VALUES (?,?,?,?)",
+                     [(f"p{p}", "c", str(p), str(p)) for p in range(1, 6)])
+    conn.commit()
+    with open(ack_path, "w", buffering=1) as ack:
+        ack.write("ready\n")
+        n = 0
+        while True:
+            n += 1
+            for p, q in PAIRS:
+                autosave_buffer.save(p, q, "python", f"draft {n}", datetime.now(timezone.utc).isoformat())
+                ack.write(f"{p} {q} {n} {time.time():.6f}\n")
+
+
+def verify(db_path, ack_path, killed_at, interval):
+    import sqlite3
+    conn = sqlite3.connect(db_path)
+    errors = []
+    if conn.execute("PRAGMA integrity_check").fetchone()[0] != "ok":
+        errors.append("integrity_check failed")
+
+    acked = {}                                  # pair -> [(n, time)]
+    with open(ack_path) as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 4:
+                p, q, n, t = int(parts[0]), int(parts[1]), int(parts[2]), float(parts[3])
+                acked.setdefault((p, q), []).append((n, t))
+
+    stored = {(p, q): code for p, q, code in
+              conn.execute("SELECT participant_id, problem_id, code FROM submissions")}
+    for pair, saves in acked.items():
+        code   = stored.get(pair)
+        n      = int(code.split()[1]) if code else 0
+        last   = saves[-1][0]
+        durable = max((s for s, t in saves if t <= killed_at - 2 * interval), default=0)
+        if n > last:
+            errors.append(f"{pair}: stored draft {n} was never acknowledged (last {last})")
+        if n < durable:
+            errors.append(f"{pair}: stored draft {n} older than draft {durable} acknowledged "
+                          f"{2 * interval:.1f}s before the crash")
+    return errors
+
+
+def ordering_check(tmp):
+    os.environ["DB_PATH"] = os.path.join(tmp, "order.db")
+    sys.path.insert(0, ROOT)
+    from core.autosave import AutosaveBuffer
+    from core.database import get_db, init_db
+
+    init_db()
+    conn = get_db()
+    conn.execute("INSERT INTO participants (name, college, system_number, phone) VALUES ('a','c','1','1')")
+    conn.commit()
+    buf = AutosaveBuffer(flush_interval=3600, max_pending=100)
+    buf.save(1, 1, "python", "old draft", "2024-01-01T00:00:01+00:00")
+    conn.execute("INSERT INTO submissions (participant_id, problem_id, language, code, last_updated) "
+                 "VALUES (1, 1, 'python', 'submitted', '2024-01-01T00:00:02+00:00')")
+    conn.commit()
+    buf.flush()
+    code = conn.execute("SELECT code FROM submissions WHERE participant_id=1 AND problem_id=1").fetchone()[0]
+    return [] if code == "submitted" else [f"late flush overwrote the submitted code with {code!r}"]
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Kill an autosaving process and check what survived.")
+    ap.add_argument("--child", help=argparse.SUPPRESS)
+    ap.add_argument("--rounds", type=int, default=20)
+    ap.add_argument("--interval", type=float, default=0.2)
+    args = ap.parse_args()
+
+    if args.child:
+        child(args.child)
+        return
+
+    failures = 0
+    for r in range(args.rounds):
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path, ack_path = os.path.join(tmp, "crash.db"), os.path.join(tmp, "acks")
+            env  = dict(os.environ, DB_PATH=db_path, AUTOSAVE_FLUSH_INTERVAL=str(args.interval))
+            proc = subprocess.Popen([sys.executable, __file__, "--child", ack_path], env=env)
+            while not (os.path.exists(ack_path) and os.path.getsize(ack_path)):
+                time.sleep(0.01)
+            time.sleep(random.uniform(2 * args.interval, 10 * args.interval))
+            os.kill(proc.pid, signal.SIGKILL)
+            killed_at = time.time()
+            proc.wait()
+            errors = verify(db_path, ack_path, killed_at, args.interval)
+        failures += bool(errors)
+        print(f"round {r + 1:>3}: " + ("ok" if not errors else "; ".join(errors[:3])))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        errors = ordering_check(tmp)
+    failures += bool(errors)
+    print("ordering: " + ("ok" if not errors else "; ".join(errors)))
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
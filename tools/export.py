@@ -0,0 +1,48 @@
+"""
+Export a contest from the database in DB_PATH (see core/export.py).
+
+Streams participants, code and standings from one snapshot, so it is safe to
+run while the contest is live; memory use does not grow with the contest.
+
+    python3 tools/export.py -o contest.ndjson
+    python3 tools/export.py --format csv --tables standings -o standings.csv
+    python3 tools/export.py --format csv --zip -o contest.zip
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.database import init_db                      # noqa: E402
+from core.export import TABLES, FORMATS, Export, ExportError   # noqa: E402
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Export participants, code and standings.")
+    ap.add_argument("--format", choices=sorted(FORMATS), default="ndjson")
+    ap.add_argument("--tables", default="", help=f"comma-separated, from {','.join(TABLES)} (default: all)")
+    ap.add_argument("--zip", action="store_true", help="one file per table in a zip archive")
+    ap.add_argument("-o", "--output", default="-", help="file to write (default: stdout)")
+    args = ap.parse_args()
+
+    init_db()
+    try:
+        export = Export([t for t in args.tables.split(",") if t], args.format, args.zip)
+    except ExportError as e:
+        sys.exit(str(e))
+    out = sys.stdout.buffer if args.output == "-" else open(args.output, "wb")
+    try:
+        for chunk in export:
+            out.write(chunk)
+    finally:
+        export.close()
+        if out is not sys.stdout.buffer:
+            out.close()
+    if args.output != "-":
+        print(f"wrote {args.output} ({os.path.getsize(args.output)} bytes, snapshot of "
+              f"{export.meta['exported_at']})", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,366 @@
+"""
+Local stand-in for the subset of the Judge0 API the platform uses.
+
+Runs submissions with the toolchains installed on this machine, so the
+judge path can be exercised offline:
+
+    python3 tools/fake_judge0.py --port 2358
+    JUDGE0_URL=http://localhost:2358 python3 app.py
+
+Supported endpoints: POST /submissions (wait=true), GET /submissions/<token>,
+POST /submissions/batch and GET /submissions/batch?tokens=...
+
+Prebuilt artifacts (language 89, "Multi-file program") run the shipped `run`
+script; start the app with JUDGE0_JAVA_PATH=java so Java artifacts find the
+local JVM.
+
+Faults can be injected into /submissions calls to exercise the judge client's
+retries and circuit breaker: --fail-rate answers 503, --throttle-rate answers
+429 with Retry-After, --error-rate answers 500 (not worth a retry), --drop-rate
+closes the connection without a response, --reject-rate answers a batch with
+an error in place of each token and --slow-rate delays the response by
+--slow-seconds. GET /_faults shows the
+settings plus request counters (including the peak number of concurrent
+requests); POST /_faults with a JSON object changes them at runtime.
+
+    python3 tools/fake_judge0.py --port 2358 --fail-rate 0.2 --throttle-rate 0.1
+"""
+import argparse
+import base64
+import io
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+STATUSES = {
+    1:  "In Queue",
+    2:  "Processing",
+    3:  "Accepted",
+    5:  "Time Limit Exceeded",
+    6:  "Compilation Error",
+    11: "Runtime Error (NZEC)",
+    13: "Internal Error",
+}
+
+# language_id -> (source file, compile command or None, run command)
+LANGUAGES = {
+    71: ("main.py",   None,                                       [sys.executable, "main.py"]),
+    50: ("main.c",    ["gcc", "-O2", "-o", "main", "main.c", "-lm"], ["./main"]),
+    54: ("main.cpp",  ["g++", "-O2", "-o", "main", "main.cpp"],   ["./main"]),
+    62: ("Main.java", ["javac", "Main.java"],                      ["java", "Main"]),
+}
+MULTI_FILE_LANGUAGE_ID = 89
+
+
+class FakeJudge:
+    def __init__(self, workers, latency, time_limit):
+        self.pool       = ThreadPoolExecutor(max_workers=workers)
+        self.latency    = latency
+        self.time_limit = time_limit
+        self.lock       = threading.Lock()
+        self.results    = {}
+
+    def create(self, sub):
+        token = uuid.uuid4().hex
+        with self.lock:
+            self.results[token] = {"token": token, "status": _status(1)}
+        self.pool.submit(self._run, token, sub)
+        return token
+
+    def get(self, token):
+        with self.lock:
+            return dict(self.results.get(token) or {})
+
+    def _run(self, token, sub):
+        with self.lock:
+            self.results[token]["status"] = _status(2)
+        if self.latency:
+            time.sleep(self.latency)
+        result = execute(sub, self.time_limit)
+        result["token"] = token
+        with self.lock:
+            self.results[token] = result
+
+
+class Faults:
+    FIELDS = ("fail_rate", "throttle_rate", "error_rate", "drop_rate", "reject_rate", "slow_rate",
+              "slow_seconds")
+
+    def __init__(self, fail_rate=0.0, throttle_rate=0.0, drop_rate=0.0, slow_rate=0.0, slow_seconds=5.0,
+                 error_rate=0.0, reject_rate=0.0):
+        self.fail_rate     = fail_rate
+        self.throttle_rate = throttle_rate
+        self.error_rate    = error_rate
+        self.drop_rate     = drop_rate
+        self.reject_rate   = reject_rate
+        self.slow_rate     = slow_rate
+        self.slow_seconds  = slow_seconds
+        self.lock          = threading.Lock()
+        self.requests      = 0
+        self.injected      = 0
+        self.in_flight     = 0
+        self.max_in_flight = 0
+
+    def pick(self):
+        """Return the fault for this request: None, "fail", "throttle", "error", "drop", "reject" or "slow"."""
+        r = random.random()
+        for name, rate in (("fail", self.fail_rate), ("throttle", self.throttle_rate),
+                           ("error", self.error_rate), ("drop", self.drop_rate),
+                           ("reject", self.reject_rate), ("slow", self.slow_rate)):
+            if r < rate:
+                with self.lock:
+                    self.injected += 1
+                return name
+            r -= rate
+        return None
+
+    def enter(self):
+        with self.lock:
+            self.requests     += 1
+            self.in_flight    += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+    def leave(self):
+        with self.lock:
+            self.in_flight -= 1
+
+    def update(self, values):
+        with self.lock:
+            for key in self.FIELDS:
+                if key in values:
+                    setattr(self, key, float(values[key]))
+            if values.get("reset_counters"):
+                self.requests = self.injected = self.max_in_flight = 0
+
+    def to_dict(self):
+        with self.lock:
+            d = {key: getattr(self, key) for key in self.FIELDS}
+            d.update(requests=self.requests, injected=self.injected, max_in_flight=self.max_in_flight)
+        return d
+
+
+def execute(sub, time_limit):
+    if sub.get("language_id") == MULTI_FILE_LANGUAGE_ID:
+        return execute_multi_file(sub, time_limit)
+    spec = LANGUAGES.get(sub.get("language_id"))
+    if spec is None:
+        return {"status": _status(13), "message": "Unknown language_id"}
+    source_name, compile_cmd, run_cmd = spec
+    tool = (compile_cmd or run_cmd)[0]
+    if shutil.which(tool) is None:
+        return {"status": _status(13), "message": f"{tool} is not installed"}
+
+    with tempfile.TemporaryDirectory(prefix="fakejudge-") as workdir:
+        with open(os.path.join(workdir, source_name), "w") as f:
+            f.write(sub.get("source_code") or "")
+        if compile_cmd:
+            c = subprocess.run(compile_cmd, cwd=workdir, capture_output=True, text=True)
+            if c.returncode != 0:
+                return {"status": _status(6), "compile_output": c.stdout + c.stderr}
+        try:
+            r = subprocess.run(run_cmd, cwd=workdir, input=sub.get("stdin") or "",
+                               capture_output=True, text=True, timeout=time_limit)
+        except subprocess.TimeoutExpired:
+            return {"status": _status(5)}
+    status = 3 if r.returncode == 0 else 11
+    return {"status": _status(status), "stdout": r.stdout, "stderr": r.stderr or None}
+
+
+def execute_multi_file(sub, time_limit):
+    with tempfile.TemporaryDirectory(prefix="fakejudge-") as workdir:
+        try:
+            data = base64.b64decode(sub.get("additional_files") or "")
+            with zipfile.ZipFile(io.BytesIO(data)) as z:
+                for info in z.infolist():
+                    z.extract(info, workdir)
+                    mode = info.external_attr >> 16
+                    if mode:
+                        os.chmod(os.path.join(workdir, info.filename), mode)
+        except (ValueError, zipfile.BadZipFile) as e:
+            return {"status": _status(13), "message": f"Bad additional_files: {e}"}
+        if os.path.exists(os.path.join(workdir, "compile")):
+            c = subprocess.run(["bash", "compile"], cwd=workdir, capture_output=True, text=True)
+            if c.returncode != 0:
+                return {"status": _status(6), "compile_output": c.stdout + c.stderr}
+        try:
+            r = subprocess.run(["bash", "run"], cwd=workdir, input=sub.get("stdin") or "",
+                               capture_output=True, text=True, timeout=time_limit)
+        except subprocess.TimeoutExpired:
+            return {"status": _status(5)}
+    status = 3 if r.returncode == 0 else 11
+    return {"status": _status(status), "stdout": r.stdout, "stderr": r.stderr or None}
+
+
+def _status(status_id):
+    return {"id": status_id, "description": STATUSES[status_id]}
+
+
+def _encode(result, b64):
+    if not b64:
+        return result
+    out = dict(result)
+    for key in ("stdout", "stderr", "compile_output", "message"):
+        if out.get(key):
+            out[key] = base64.b64encode(out[key].encode()).decode()
+    return out
+
+
+def _decode(sub, b64):
+    if not b64:
+        return sub
+    sub = dict(sub)
+    for key in ("source_code", "stdin"):
+        if sub.get(key):
+            sub[key] = base64.b64decode(sub[key]).decode()
+    return sub
+
+
+def make_handler(judge, faults):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def do_POST(self):
+            faults.enter()
+            try:
+                self._post()
+            finally:
+                faults.leave()
+
+        def do_GET(self):
+            faults.enter()
+            try:
+                self._get()
+            finally:
+                faults.leave()
+
+        def _inject(self):
+            """
+            Apply a random fault; True when the request has been answered by
+            it. "reject" only changes a batch's answer, so it is left to _post.
+            """
+            fault = self.fault = faults.pick()
+            if fault == "fail":
+                self._send(503, {"error": "injected failure"})
+            elif fault == "error":
+                self._send(500, {"error": "injected internal error"})
+            elif fault == "throttle":
+                self.send_response(429)
+                self.send_header("Retry-After", "1")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+            elif fault == "drop":
+                self.close_connection = True
+                self.connection.shutdown(2)
+            elif fault in ("slow", "reject"):
+                if fault == "slow":
+                    time.sleep(faults.slow_seconds)
+                return False
+            return fault is not None
+
+        def _send(self, code, body):
+            data = json.dumps(body).encode()
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _body(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            return json.loads(self.rfile.read(length) or b"{}")
+
+        def _post(self):
+            url = urlparse(self.path)
+            qs  = parse_qs(url.query)
+            b64 = qs.get("base64_encoded", ["false"])[0] == "true"
+            if url.path == "/_faults":
+                faults.update(self._body())
+                self._send(200, faults.to_dict())
+                return
+            body = self._body()
+            if self._inject():
+                return
+            if url.path == "/submissions/batch":
+                subs = body.get("submissions", [])
+                if self.fault == "reject":
+                    self._send(201, [{"source_code": ["injected rejection"]} for _ in subs])
+                else:
+                    self._send(201, [{"token": judge.create(_decode(s, b64))} for s in subs])
+            elif url.path == "/submissions":
+                sub = _decode(body, b64)
+                if qs.get("wait", ["false"])[0] == "true":
+                    if judge.latency:
+                        time.sleep(judge.latency)
+                    self._send(201, _encode(execute(sub, judge.time_limit), b64))
+                else:
+                    self._send(201, {"token": judge.create(sub)})
+            else:
+                self._send(404, {"error": "not found"})
+
+        def _get(self):
+            url = urlparse(self.path)
+            qs  = parse_qs(url.query)
+            b64 = qs.get("base64_encoded", ["false"])[0] == "true"
+            if url.path == "/_faults":
+                self._send(200, faults.to_dict())
+                return
+            if url.path.startswith("/submissions") and self._inject():
+                return
+            if url.path == "/submissions/batch":
+                tokens = qs.get("tokens", [""])[0].split(",")
+                self._send(200, {"submissions": [_encode(judge.get(t), b64) or None for t in tokens]})
+            elif url.path.startswith("/submissions/"):
+                result = judge.get(url.path.rsplit("/", 1)[-1])
+                self._send(200 if result else 404, _encode(result, b64))
+            elif url.path == "/system_info":
+                self._send(200, {"fake": True})
+            else:
+                self._send(404, {"error": "not found"})
+
+    return Handler
+
+
+def serve(port=2358, workers=4, latency=0.0, time_limit=5.0, faults=None):
+    judge  = FakeJudge(workers, latency, time_limit)
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(judge, faults or Faults()))
+    server.daemon_threads = True
+    return server
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--port",       type=int,   default=2358)
+    ap.add_argument("--workers",    type=int,   default=4,   help="concurrent executions")
+    ap.add_argument("--latency",    type=float, default=0.0, help="extra seconds per execution")
+    ap.add_argument("--time-limit", type=float, default=5.0, help="wall clock limit per run")
+    ap.add_argument("--fail-rate",     type=float, default=0.0, help="fraction of calls answered 503")
+    ap.add_argument("--throttle-rate", type=float, default=0.0, help="fraction of calls answered 429")
+    ap.add_argument("--error-rate",    type=float, default=0.0, help="fraction of calls answered 500")
+    ap.add_argument("--drop-rate",     type=float, default=0.0, help="fraction of connections dropped")
+    ap.add_argument("--reject-rate",   type=float, default=0.0, help="fraction of batches rejected")
+    ap.add_argument("--slow-rate",     type=float, default=0.0, help="fraction of calls delayed")
+    ap.add_argument("--slow-seconds",  type=float, default=5.0, help="delay for slowed calls")
+    args = ap.parse_args()
+    faults = Faults(args.fail_rate, args.throttle_rate, args.drop_rate, args.slow_rate, args.slow_seconds,
+                    args.error_rate, args.reject_rate)
+    server = serve(args.port, args.workers, args.latency, args.time_limit, faults)
+    print(f"Fake Judge0 listening on http://127.0.0.1:{args.port}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
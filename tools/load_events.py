@@ -0,0 +1,137 @@
+"""
+Connection-count load test for /api/events.
+
+Opens N concurrent event streams from one asyncio client, checks that each
+receives its initial status, then logs in as admin and stops and restarts the
+contest, timing how long every stream takes to receive each push. Reports
+refused streams (503 once EVENTS_MAX_STREAMS is reached) and the fan-out
+latency percentiles.
+
+Restarting resets the contest start time, so point this at a test server:
+
+    gunicorn -k gevent -w 1 -b 127.0.0.1:5000 app:app &
+    python3 tools/load_events.py --url http://127.0.0.1:5000 -n 500
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from urllib.parse import urlsplit
+
+import requests
+
+
+class Stream:
+    def __init__(self):
+        self.status   = None
+        self.received = []       # (monotonic time, status dict)
+        self.refused  = False
+
+
+async def open_stream(host, port, stream, ready):
+    try:
+        reader, writer = await asyncio.open_connection(host, port)
+    except OSError:
+        stream.refused = True
+        ready.release()
+        return
+    writer.write(f"GET /api/events HTTP/1.1\r\nHost: {host}\r\nAccept: text/event-stream\r\n\r\n".encode())
+    await writer.drain()
+    status_line = await reader.readline()
+    stream.status = status_line.decode(errors="replace").strip()
+    if b" 200 " not in status_line:
+        stream.refused = True
+        ready.release()
+        writer.close()
+        return
+    while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+        pass                                    # response headers
+
+    first = True
+    try:
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            if line.startswith(b"data:"):
+                stream.received.append((time.monotonic(), json.loads(line[5:])))
+                if first:
+                    first = False
+                    ready.release()
+            # chunked-encoding size lines, ids, comments and blanks are ignored
+    except (ConnectionError, asyncio.CancelledError):
+        pass
+    finally:
+        if first:
+            ready.release()
+        writer.close()
+
+
+async def push(streams, trigger, predicate, timeout):
+    """Run ``trigger`` and return each stream's delay until a status satisfying ``predicate`` arrives."""
+    t0 = time.monotonic()
+    await asyncio.get_running_loop().run_in_executor(None, trigger)
+    deadline = t0 + timeout
+
+    def delay(st):
+        return next((t - t0 for t, s in st.received if t >= t0 and predicate(s)), None)
+
+    while time.monotonic() < deadline and any(delay(st) is None for st in streams):
+        await asyncio.sleep(0.01)
+    return [delay(st) for st in streams]
+
+
+def percentile(values, q):
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+def report(label, delays):
+    got = sorted(d for d in delays if d is not None)
+    if not got:
+        print(f"{label:<8} none of {len(delays)} streams received the event")
+        return
+    print(f"{label:<8} {len(got)}/{len(delays)} received   p50 {statistics.median(got) * 1000:7.1f} ms   "
+          f"p99 {percentile(got, 0.99) * 1000:7.1f} ms   max {got[-1] * 1000:7.1f} ms")
+
+
+async def run(url, n, password, timeout):
+    parts   = urlsplit(url)
+    host    = parts.hostname
+    port    = parts.port or 80
+    streams = [Stream() for _ in range(n)]
+    ready   = asyncio.Semaphore(0)
+
+    t0    = time.monotonic()
+    tasks = [asyncio.create_task(open_stream(host, port, s, ready)) for s in streams]
+    for _ in streams:
+        await asyncio.wait_for(ready.acquire(), timeout)
+    live = [s for s in streams if not s.refused and s.received]
+    print(f"{len(live)}/{n} streams open in {time.monotonic() - t0:.2f}s "
+          f"({sum(s.refused for s in streams)} refused)")
+
+    admin = requests.Session()
+    admin.post(f"{url}/admin/login", json={"password": password}).raise_for_status()
+
+    report("stop", await push(live, lambda: admin.post(f"{url}/api/admin/stop_contest").raise_for_status(),
+                              lambda s: not s["active"], timeout))
+    report("start", await push(live, lambda: admin.post(f"{url}/api/admin/start_contest").raise_for_status(),
+                               lambda s: s["active"], timeout))
+
+    for t in tasks:
+        t.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Open many /api/events streams and time event fan-out.")
+    ap.add_argument("--url", default="http://127.0.0.1:5000")
+    ap.add_argument("-n", "--connections", type=int, default=500)
+    ap.add_argument("--admin-password", default="changeme")
+    ap.add_argument("--timeout", type=float, default=30)
+    args = ap.parse_args()
+    asyncio.run(run(args.url.rstrip("/"), args.connections, args.admin_password, args.timeout))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,476 @@
+"""
+Contest load test: how many lab PCs can one server take?
+
+Simulates --participants contestants and --admins admin dashboards for
+--duration seconds and reports throughput and p50/p95/p99 latency per
+endpoint. Each simulated participant does what contest.js does:
+
+    register, load the problems and the solved list, then
+    poll /api/contest_status        every  5 s   (the no-SSE fallback)
+    autosave via /api/save_code     every 30 s
+    click Run --burst times         every 60 s   then poll the job every 0.7 s
+    submit                          every 180 s  then poll the job every 0.7 s
+
+and each admin refreshes status, participants, leaderboard and judge stats
+every 15 s. --speedup divides every interval, so 60 participants at
+--speedup 5 put roughly the load of 300 real ones on the server (apart
+from registration and the first page load). Each timer
+starts at a random phase. Intervals are jittered by +-20 %. A Run or Submit
+blocks its participant until the job is judged, as the page does. "judged
+run" and "judged submit" rows time a click until its verdict.
+
+--spawn starts a throwaway server (Flask's or gunicorn with gunicorn.conf.py)
+on a fresh database, with the in-repo fake Judge0 (tools/fake_judge0.py)
+answering after --judge-latency seconds per execution:
+
+    python3 tools/loadtest.py --spawn gunicorn --participants 60 --speedup 5
+
+Without --spawn it drives --url. Starting the contest resets its start time,
+so only point it at a test server. --server-pid (implied by --spawn, Linux
+only) adds the server's CPU time per request.
+
+--mix switches to closed-loop mode: --concurrency threads send a weighted
+mix of the cheap participant requests back to back, with no think time,
+to find the ceiling throughput:
+
+    python3 tools/loadtest.py --url http://127.0.0.1:5000 --mix status:6,problems:2,solved:1,save:2
+
+--thresholds FILE compares the results with per-endpoint limits (p50_ms,
+p95_ms, p99_ms, error_rate, min_rps) and exits 1 on a regression;
+tools/loadtest_thresholds.json is the baseline for the default scenario.
+--write-thresholds FILE records this run's latencies times --headroom plus
+--slack-ms as a new baseline. Latency depends on the machine (on one core the
+fake Judge0's executions compete with the server), so record the baseline
+on the machine that will be compared against it.
+"""
+import argparse
+import json
+import math
+import os
+import random
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CODE = "def sum_even(arr):\n    # draft {n}\n    return sum(x for x in arr if x % 2 == 0)\n"
+
+# name -> (method, path, JSON body factory or None), for --mix
+ENDPOINTS = {
+    "status":   ("GET",  "/api/contest_status", None),
+    "problems": ("GET",  "/api/problems",       None),
+    "solved":   ("GET",  "/api/solved",         None),
+    "save":     ("POST", "/api/save_code",
+                 lambda n: {"problem_id": 1 + n % 6, "language": "python", "code": CODE.format(n=n)}),
+}
+
+# Seconds between actions of one real participant / admin tab (see contest.js,
+# status.js and admin.js).
+STATUS_INTERVAL = 5
+SAVE_INTERVAL   = 30
+RUN_INTERVAL    = 60
+SUBMIT_INTERVAL = 180
+ADMIN_INTERVAL  = 15
+JOB_POLL        = 0.7
+CLICK_GAP       = 0.2
+
+SCENARIO_KEYS = ("participants", "admins", "speedup", "burst", "duration", "judge_latency")
+
+
+# ── MEASUREMENT ───────────────────────────────────────────────────────────────
+
+class Stats:
+    """Latency samples and outcome counts per endpoint, shared by all threads."""
+
+    def __init__(self):
+        self.lock      = threading.Lock()
+        self.latencies = {}
+        self.errors    = {}
+        self.refused   = {}
+
+    def record(self, name, seconds, status, refused=False):
+        """
+        ``status``: the HTTP status, or None if the request failed outright.
+        ``refused``: the server pushed back (429, or 503 with Retry-After),
+        which is counted apart from errors.
+        """
+        with self.lock:
+            self.latencies.setdefault(name, []).append(seconds)
+            if refused:
+                self.refused[name] = self.refused.get(name, 0) + 1
+            elif status is None or status >= 400:
+                self.errors[name] = self.errors.get(name, 0) + 1
+
+    def report(self, elapsed):
+        rows = {}
+        for name, samples in self.latencies.items():
+            samples = sorted(samples)
+            count   = len(samples)
+            rows[name] = {
+                "count":      count,
+                "rps":        count / elapsed,
+                "p50_ms":     percentile(samples, 50) * 1000,
+                "p95_ms":     percentile(samples, 95) * 1000,
+                "p99_ms":     percentile(samples, 99) * 1000,
+                "max_ms":     samples[-1] * 1000,
+                "errors":     self.errors.get(name, 0),
+                "refused":    self.refused.get(name, 0),
+                "error_rate": self.errors.get(name, 0) / count,
+            }
+        return rows
+
+
+def percentile(samples, p):
+    """Nearest-rank percentile of an already sorted list."""
+    if not samples:
+        return 0.0
+    return samples[max(0, math.ceil(p / 100 * len(samples)) - 1)]
+
+
+def timed(stats, name, session, method, url, **kw):
+    """Send one request and record it under ``name``; returns the response or None."""
+    t0 = time.perf_counter()
+    try:
+        r = session.request(method, url, timeout=30, **kw)
+    except requests.RequestException:
+        stats.record(name, time.perf_counter() - t0, None)
+        return None
+    refused = r.status_code == 429 or (r.status_code == 503 and "Retry-After" in r.headers)
+    stats.record(name, time.perf_counter() - t0, r.status_code, refused)
+    return r
+
+
+def server_cpu_seconds(pid):
+    """utime + stime of ``pid`` and all of its descendants (Linux /proc)."""
+    ticks    = os.sysconf("SC_CLK_TCK")
+    children = {}
+    cpu      = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+        except OSError:
+            continue
+        children.setdefault(int(fields[1]), []).append(int(entry))
+        cpu[int(entry)] = (int(fields[11]) + int(fields[12])) / ticks
+    total, todo = 0.0, [pid]
+    while todo:
+        p = todo.pop()
+        total += cpu.get(p, 0.0)
+        todo.extend(children.get(p, []))
+    return total
+
+
+# ── SIMULATED USERS ───────────────────────────────────────────────────────────
+
+def admin_session(url, password):
+    admin = requests.Session()
+    admin.post(f"{url}/admin/login", json={"password": password}).raise_for_status()
+    if not admin.get(f"{url}/api/contest_status").json().get("active"):
+        admin.post(f"{url}/api/admin/start_contest").raise_for_status()
+    return admin
+
+
+def register(url, stats, i, tag):
+    s = requests.Session()
+    r = timed(stats, "register", s, "POST", f"{url}/register",
+              json={"name": f"load{i}", "college": "load",
+                    "system_number": f"L{tag}-{i}", "phone": f"9{tag % 10**5:05d}{i:04d}"})
+    if r is None or r.status_code >= 400:
+        raise SystemExit(f"registering participant {i} failed: {r.status_code if r is not None else 'no response'}")
+    return s
+
+
+def judge(url, stats, s, kind, problem_id, code, clicks, deadline):
+    """Click Run/Submit ``clicks`` times, then poll the accepted job to its verdict."""
+    t0   = time.perf_counter()
+    body = {"problem_id": problem_id, "language": "python", "code": code, "active_seconds": 60}
+    job  = None
+    for n in range(clicks):
+        if n:
+            time.sleep(CLICK_GAP)
+        r = timed(stats, kind, s, "POST", f"{url}/api/{kind}", json=body)
+        if job is None and r is not None and r.status_code == 202:
+            job = r.json()
+    if job is None:
+        return
+    while job.get("status") in ("queued", "running"):
+        if time.monotonic() >= deadline:
+            return
+        time.sleep(JOB_POLL)
+        r = timed(stats, "poll", s, "GET", f"{url}/api/{kind}/{job['job_id']}")
+        if r is None or r.status_code != 200:
+            return
+        job = r.json()
+    stats.record(f"judged {kind}", time.perf_counter() - t0, 200 if job.get("status") == "done" else 500)
+
+
+def participant(url, stats, s, deadline, speedup, burst, seed):
+    rng = random.Random(seed)
+    r   = timed(stats, "problems", s, "GET", f"{url}/api/problems")
+    timed(stats, "solved", s, "GET", f"{url}/api/solved")
+    problems = r.json() if r is not None and r.status_code == 200 else []
+    tasks    = [(p["id"], (p.get("boilerplate") or {}).get("python") or CODE) for p in problems] or [(1, CODE)]
+    edits    = 0
+
+    def act(name):
+        # Every action sees freshly edited code, so runs miss the result cache.
+        nonlocal edits
+        edits += 1
+        problem_id, code = rng.choice(tasks)
+        code = f"{code}\n# edit {seed}.{edits}\n"
+        if name == "status":
+            timed(stats, "status", s, "GET", f"{url}/api/contest_status")
+        elif name == "save":
+            timed(stats, "save", s, "POST", f"{url}/api/save_code",
+                  json={"problem_id": problem_id, "language": "python", "code": code})
+        elif name == "run":
+            judge(url, stats, s, "run", problem_id, code, burst, deadline)
+        else:
+            judge(url, stats, s, "submit", problem_id, code, 1, deadline)
+
+    intervals = {"status": STATUS_INTERVAL, "save": SAVE_INTERVAL, "run": RUN_INTERVAL, "submit": SUBMIT_INTERVAL}
+    schedule(rng, intervals, speedup, deadline, act)
+
+
+def admin(url, stats, s, deadline, speedup, seed):
+    cursor = 0
+
+    def act(_name):
+        nonlocal cursor
+        timed(stats, "admin status", s, "GET", f"{url}/api/contest_status")
+        r = timed(stats, "admin participants", s, "GET", f"{url}/api/admin/participants",
+                  params={"since": cursor, "limit": 500})
+        if r is not None and r.status_code == 200:
+            cursor = r.json()["cursor"]
+        timed(stats, "admin leaderboard", s, "GET", f"{url}/api/admin/leaderboard")
+        timed(stats, "admin judge_stats", s, "GET", f"{url}/api/admin/judge_stats")
+
+    schedule(random.Random(seed), {"refresh": ADMIN_INTERVAL}, speedup, deadline, act)
+
+
+def schedule(rng, intervals, speedup, deadline, act):
+    """Call ``act(name)`` whenever a jittered timer from ``intervals`` falls due."""
+    due = {name: time.monotonic() + rng.uniform(0, every / speedup) for name, every in intervals.items()}
+    while True:
+        name = min(due, key=due.get)
+        if due[name] >= deadline:
+            return
+        time.sleep(max(0.0, due[name] - time.monotonic()))
+        act(name)
+        due[name] = max(due[name] + intervals[name] / speedup * rng.uniform(0.8, 1.2), time.monotonic())
+
+
+def closed_loop(url, sessions, mix, deadline, stats, seed):
+    rng     = random.Random(seed)
+    names   = list(mix)
+    weights = [mix[n] for n in names]
+    n       = 0
+    while time.monotonic() < deadline:
+        n += 1
+        name = rng.choices(names, weights)[0]
+        method, path, body = ENDPOINTS[name]
+        timed(stats, name, rng.choice(sessions), method, url + path, json=body(n) if body else None)
+
+
+def parse_mix(spec):
+    mix = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition(":")
+        if name not in ENDPOINTS:
+            raise SystemExit(f"unknown endpoint {name!r}; choose from {', '.join(ENDPOINTS)}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+# ── THROWAWAY SERVER ──────────────────────────────────────────────────────────
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def url_for(port):
+    return f"http://127.0.0.1:{port}"
+
+
+def spawn(kind, judge_latency, judge_workers, password):
+    """Start the fake Judge0 (in this process) and a server on a fresh database."""
+    sys.path.insert(0, ROOT)
+    from tools.fake_judge0 import serve
+
+    judge0 = serve(free_port(), judge_workers, judge_latency)
+    judge0.handle_error = lambda request, address: None    # resets when the server under test exits
+    threading.Thread(target=judge0.serve_forever, daemon=True).start()
+    port = free_port()
+    work = tempfile.mkdtemp(prefix="loadtest-")
+    env  = dict(os.environ,
+                DB_PATH=os.path.join(work, "contest.db"),
+                JUDGE_BACKEND="judge0",
+                JUDGE0_URL=f"http://127.0.0.1:{judge0.server_address[1]}",
+                ADMIN_PASSWORD=password,
+                BIND=f"127.0.0.1:{port}")
+    if kind == "gunicorn":
+        cmd = ["gunicorn", "-c", "gunicorn.conf.py", "app:app"]
+    else:
+        cmd = [sys.executable, "-c", f"from app import app; app.run(port={port}, threaded=True)"]
+    log  = open(os.path.join(work, "server.log"), "w")
+    proc = subprocess.Popen(cmd, cwd=ROOT, env=env, stdout=log, stderr=subprocess.STDOUT)
+    print(f"{kind} server on {url_for(port)}, log in {log.name}")
+    url  = url_for(port)
+    for _ in range(100):
+        if proc.poll() is not None:
+            raise SystemExit(f"{kind} server exited with status {proc.returncode}")
+        try:
+            requests.get(f"{url}/api/contest_status", timeout=1)
+            return url, proc
+        except requests.RequestException:
+            time.sleep(0.2)
+    proc.terminate()
+    raise SystemExit(f"{kind} server did not come up")
+
+
+# ── THRESHOLDS ────────────────────────────────────────────────────────────────
+
+def check_thresholds(rows, scenario, path):
+    """Print every limit in ``path`` that this run broke; return how many."""
+    with open(path) as f:
+        limits = json.load(f)
+    expected = limits.pop("_scenario", {})
+    differs  = {k: (v, scenario.get(k)) for k, v in expected.items() if scenario.get(k) != v}
+    if differs:
+        print(f"warning: thresholds were recorded for a different scenario: {differs}")
+    failures = 0
+    for name, limit in limits.items():
+        row = rows.get(name)
+        if row is None:
+            print(f"FAIL {name}: no requests")
+            failures += 1
+            continue
+        for key, bound in limit.items():
+            value = row[key[len("min_"):]] if key.startswith("min_") else row[key]
+            ok    = value >= bound if key.startswith("min_") else value <= bound
+            if not ok:
+                print(f"FAIL {name} {key}: {value:.3f} (limit {bound})")
+                failures += 1
+    print(f"thresholds: {'ok' if not failures else f'{failures} exceeded'} ({path})")
+    return failures
+
+
+def write_thresholds(rows, scenario, path, headroom, slack_ms):
+    """
+    Record this run as limits: latencies times ``headroom`` plus ``slack_ms``.
+    A percentile is only recorded for rows with enough samples to pin it down
+    (20 for p50 and p95, 100 for p99); below that it is mostly noise.
+    """
+    limits = {"_scenario": scenario}
+    for name, row in sorted(rows.items()):
+        limit = {}
+        if row["count"] >= 20:
+            limit["p50_ms"] = round(row["p50_ms"] * headroom + slack_ms)
+            limit["p95_ms"] = round(row["p95_ms"] * headroom + slack_ms)
+        if row["count"] >= 100:
+            limit["p99_ms"] = round(row["p99_ms"] * headroom + slack_ms)
+        limit["error_rate"] = round(row["error_rate"] * headroom, 3)
+        limits[name] = limit
+    with open(path, "w") as f:
+        json.dump(limits, f, indent=2)
+        f.write("\n")
+    print(f"wrote {path}")
+
+
+# ── MAIN ──────────────────────────────────────────────────────────────────────
+
+def main():
+    ap = argparse.ArgumentParser(description="Simulate a contest against a server and report latency per endpoint.")
+    ap.add_argument("--url", default="http://127.0.0.1:5000")
+    ap.add_argument("--spawn", choices=("flask", "gunicorn"), help="start a throwaway server with a fake Judge0")
+    ap.add_argument("--duration", type=float, default=30)
+    ap.add_argument("--participants", type=int, default=30)
+    ap.add_argument("--admins", type=int, default=2)
+    ap.add_argument("--speedup", type=float, default=5, help="divide every think time by this")
+    ap.add_argument("--burst", type=int, default=3, help="Run clicks per burst")
+    ap.add_argument("--judge-latency", type=float, default=0.2, help="fake Judge0 seconds per execution (--spawn)")
+    ap.add_argument("--judge-workers", type=int, default=8, help="fake Judge0 concurrent executions (--spawn)")
+    ap.add_argument("--mix", help="closed-loop mode: endpoint:weight list, e.g. status:6,problems:2,solved:1,save:2")
+    ap.add_argument("-c", "--concurrency", type=int, default=16, help="closed-loop threads")
+    ap.add_argument("--admin-password", default="changeme")
+    ap.add_argument("--server-pid", type=int, help="report server CPU per request for this process tree")
+    ap.add_argument("--thresholds", help="fail if results exceed the limits in this JSON file")
+    ap.add_argument("--write-thresholds", help="write this run's results times --headroom as limits")
+    ap.add_argument("--headroom", type=float, default=2.0, help="--write-thresholds: multiply latencies by this")
+    ap.add_argument("--slack-ms", type=float, default=100, help="--write-thresholds: then add this")
+    args = ap.parse_args()
+
+    proc = None
+    url  = args.url.rstrip("/")
+    if args.spawn:
+        url, proc = spawn(args.spawn, args.judge_latency, args.judge_workers, args.admin_password)
+        args.server_pid = args.server_pid or proc.pid
+    try:
+        rows, elapsed, cpu = run(url, args)
+    finally:
+        if proc:
+            proc.send_signal(signal.SIGINT)                 # gunicorn: quick shutdown
+            try:
+                proc.wait(10)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+
+    print(f"{'endpoint':<20} {'count':>7} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+          f"{'max ms':>8} {'errors':>7} {'refused':>7}")
+    for name, row in sorted(rows.items()):
+        print(f"{name:<20} {row['count']:>7} {row['rps']:>8.1f} {row['p50_ms']:>8.1f} {row['p95_ms']:>8.1f} "
+              f"{row['p99_ms']:>8.1f} {row['max_ms']:>8.1f} {row['errors']:>7} {row['refused']:>7}")
+    requests_ = sum(row["count"] for name, row in rows.items() if not name.startswith("judged "))
+    print(f"{requests_} requests in {elapsed:.1f} s ({requests_ / elapsed:.1f} req/s)")
+    if cpu is not None and requests_:
+        per_request = cpu / requests_
+        print(f"server CPU {per_request * 1000:.2f} ms/request (~{1 / per_request:.0f} req/s per core)")
+
+    scenario = {k: getattr(args, k) for k in SCENARIO_KEYS} if not args.mix else {"mix": args.mix}
+    if args.write_thresholds:
+        write_thresholds(rows, scenario, args.write_thresholds, args.headroom, args.slack_ms)
+    if args.thresholds and check_thresholds(rows, scenario, args.thresholds):
+        sys.exit(1)
+
+
+def run(url, args):
+    """Drive ``url`` for --duration seconds; returns (report rows, elapsed, server CPU seconds)."""
+    stats    = Stats()
+    tag      = int(time.time())
+    admins   = [admin_session(url, args.admin_password) for _ in range(max(args.admins, 1))]
+    sessions = [register(url, stats, i, tag) for i in range(args.participants)]
+    cpu0     = server_cpu_seconds(args.server_pid) if args.server_pid else None
+    t0       = time.monotonic()
+    deadline = t0 + args.duration
+    if args.mix:
+        mix     = parse_mix(args.mix)
+        stats   = Stats()                   # report the mix only
+        targets = [(closed_loop, (url, sessions, mix, deadline, stats, i)) for i in range(args.concurrency)]
+    else:
+        targets  = [(participant, (url, stats, s, deadline, args.speedup, args.burst, i))
+                    for i, s in enumerate(sessions)]
+        targets += [(admin, (url, stats, s, deadline, args.speedup, i)) for i, s in enumerate(admins[:args.admins])]
+    threads = [threading.Thread(target=fn, args=fn_args, daemon=True) for fn, fn_args in targets]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.monotonic() - t0
+    cpu     = server_cpu_seconds(args.server_pid) - cpu0 if cpu0 is not None else None
+    return stats.report(elapsed), elapsed, cpu
+
+
+if __name__ == "__main__":
+    main()
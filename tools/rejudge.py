@@ -0,0 +1,70 @@
+"""
+Rejudge stored attempts from the command line (see routes/rejudge.py).
+
+Runs in this process with the app's judge settings, against the database in
+DB_PATH, and prints progress until the run ends. Ctrl-C stops it at the next
+checkpoint; --resume continues it later, from here or the admin dashboard.
+
+    python3 tools/rejudge.py --problem 2 [--problem 3] [--workers 4]
+    python3 tools/rejudge.py --all
+    python3 tools/rejudge.py --resume 7
+    python3 tools/rejudge.py --status [--id 7]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.config import REJUDGE_WORKERS     # noqa: E402
+from core.database import init_db           # noqa: E402
+from routes import rejudge                  # noqa: E402
+
+
+def show(s):
+    eta = f", ETA {s['eta_seconds']}s" if s["eta_seconds"] is not None else ""
+    print(f"rejudge {s['id']} {s['status']}: {s['done']}/{s['total']} programs, {s['rate_per_second']}/s{eta}; "
+          f"{s['changed']} attempts changed, +{s['gained']}/-{s['lost']} solves, {s['errors']} not judged"
+          + (f"; {s['error']}" if s["error"] else ""))
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Rejudge stored attempts against the current problem data.")
+    what = ap.add_mutually_exclusive_group(required=True)
+    what.add_argument("--problem", type=int, action="append", help="problem id to rejudge (repeatable)")
+    what.add_argument("--all", action="store_true", help="rejudge every problem")
+    what.add_argument("--resume", type=int, metavar="ID", help="continue an interrupted run")
+    what.add_argument("--status", action="store_true", help="show a run's progress and exit")
+    ap.add_argument("--id", type=int, help="run to show with --status (default: the latest)")
+    ap.add_argument("--workers", type=int, default=REJUDGE_WORKERS)
+    args = ap.parse_args()
+
+    init_db()
+    if args.status:
+        s = rejudge.status(args.id)
+        if s is None:
+            sys.exit("no rejudge runs")
+        return show(s)
+
+    try:
+        if args.resume is not None:
+            run = rejudge.resume(args.resume, workers=args.workers)
+        else:
+            run = rejudge.start(None if args.all else args.problem, workers=args.workers)
+    except rejudge.RejudgeError as e:
+        sys.exit(str(e))
+    try:
+        while not run.finished.wait(2):
+            show(rejudge.status(run.id))
+    except KeyboardInterrupt:
+        print("stopping at the next checkpoint...")
+        run.stop()
+        run.finished.wait()
+    s = rejudge.status(run.id)
+    show(s)
+    sys.exit(0 if s["status"] == "done" and not s["errors"] else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Local stand-in for the Java admin backend (routes/backend.java).
+
+Serves GET /api/admin/leaderboard over keep-alive HTTP/1.1 and lets a test
+script change its behaviour at runtime, so the admin gateway can be exercised
+offline:
+
+    python3 tools/stub_backend.py --port 8080
+    curl -X POST localhost:8080/_stub -d '{"latency": 2, "status": 500}'
+    curl localhost:8080/_stub
+
+POST /_stub sets ``latency`` (seconds), ``status`` (HTTP status to answer
+with) and ``leaderboard`` (the JSON to serve); GET /_stub returns those plus
+the number of requests and TCP connections seen.
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_LEADERBOARD = [
+    {"rank": 1, "name": "Ada",   "solved": 3},
+    {"rank": 2, "name": "Linus", "solved": 2},
+]
+
+
+class StubState:
+    def __init__(self):
+        self.lock        = threading.Lock()
+        self.latency     = 0.0
+        self.status      = 200
+        self.leaderboard = DEFAULT_LEADERBOARD
+        self.requests    = 0
+        self.connections = 0
+
+    def snapshot(self):
+        with self.lock:
+            return {"latency": self.latency, "status": self.status, "leaderboard": self.leaderboard,
+                    "requests": self.requests, "connections": self.connections}
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    state            = None
+
+    def setup(self):
+        super().setup()
+        with self.state.lock:
+            self.state.connections += 1
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path == "/_stub":
+            return self._send(200, self.state.snapshot())
+        if self.path != "/api/admin/leaderboard":
+            return self._send(404, {"error": "not found"})
+        with self.state.lock:
+            self.state.requests += 1
+            latency, status, board = self.state.latency, self.state.status, self.state.leaderboard
+        if latency:
+            time.sleep(latency)
+        self._send(status, board if status == 200 else {"error": f"stub status {status}"})
+
+    def do_POST(self):
+        if self.path != "/_stub":
+            return self._send(404, {"error": "not found"})
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        with self.state.lock:
+            for key in ("latency", "status", "leaderboard"):
+                if key in body:
+                    setattr(self.state, key, body[key])
+            if body.get("reset_counters"):
+                self.state.requests = self.state.connections = 0
+        self._send(200, self.state.snapshot())
+
+
+def make_server(host, port):
+    """Return (server, state); call server.serve_forever() to run it."""
+    state   = StubState()
+    handler = type("StubHandler", (Handler,), {"state": state})
+    server  = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server, state
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Stub Java admin backend.")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8080)
+    ap.add_argument("--latency", type=float, default=0.0)
+    args = ap.parse_args()
+    server, state = make_server(args.host, args.port)
+    state.latency = args.latency
+    print(f"stub backend on http://{args.host}:{server.server_address[1]}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()